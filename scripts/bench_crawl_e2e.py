@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Benchmark de extremo a extremo: scrape_ifc() contra el CATEDU simulado de mock_catedu.py.
+
+Levanta el servidor local, recorre todas sus familias con scrape_ifc() para cada
+--concurrency y compara to_legacy() del resultado con el del catálogo servido.
+Informa de peticiones, errores inyectados, reintentos de fetch_html(), tiempo
+dormido en reintentos, páginas/s y asignaturas que faltan o no coinciden.
+
+Con --frontier el crawl es el de todas las familias guiado por la frontier SQLite
+(crawl_familias) en lugar de scrape_ifc() por familia. En los dos, cada página se
+tiene que descargar una sola vez: un módulo compartido por varios ciclos (FOL, EIE...)
+también. La columna "repetidas" cuenta las descargas de más (sale con código 1 si hay).
+
+Con --low-memory comprueba además que, al terminar cada crawl, el single-flight de
+módulos no retiene ningún Modulo (sale con código 1 si lo hace). Ahí no se exige
+descarga única: sin retener los Modulo, un módulo compartido puede bajarse otra vez.
+
+    python scripts/bench_crawl_e2e.py --concurrency 1 4 8 --latency 50 --jitter 50
+    python scripts/bench_crawl_e2e.py --familias 5 --modulos 200 --p429 0.03 --p5xx 0.02 --concurrency 8
+    python scripts/bench_crawl_e2e.py --low-memory --concurrency 1 8
+    python scripts/bench_crawl_e2e.py --frontier --concurrency 1 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import mock_catedu
+from catedu_fixtures import modulo_cod
+import scrape_catedu_ifc as scraper
+from crawl_frontier import Frontier
+from scrape_metrics import metrics
+
+
+def total(name: str, **match) -> float:
+    """Suma de un contador de metrics para las etiquetas indicadas."""
+    want = {k: str(v) for k, v in match.items()}
+    return sum(v for (n, labels), v in list(metrics.counters.items())
+               if n == name and all(dict(labels).get(k) == x for k, x in want.items()))
+
+
+def esperado(catalogo: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    ciclos = [
+        scraper.Ciclo(codigo=c["codigo"], nombre=c["ciclo"], nivel=c["nivel"],
+                      modulos=[scraper.modulo_from_dict(m) for m in c["modulos"]])
+        for cs in catalogo.values() for c in cs
+    ]
+    return {a["id"]: a for a in scraper.to_legacy(ciclos)}
+
+
+def paginas_unicas(catalogo: Dict[str, List[Dict[str, Any]]]) -> int:
+    """Familias + ciclos + módulos distintos (la página de un módulo es la misma venga del ciclo que venga)."""
+    codigos = {modulo_cod(m) for cs in catalogo.values() for c in cs for m in c["modulos"]}
+    return len(catalogo) + sum(len(cs) for cs in catalogo.values()) + len(codigos)
+
+
+def crawl_frontier(familias: List[str], concurrency: int) -> List[scraper.Ciclo]:
+    with tempfile.TemporaryDirectory() as tmp:
+        frontier = Frontier(os.path.join(tmp, "frontier.sqlite"))
+        try:
+            return scraper.crawl_familias(frontier, familias, concurrency=concurrency)
+        finally:
+            frontier.close()
+
+
+def run(mock: mock_catedu.MockCatedu, familias: List[str], concurrency: int, frontier: bool = False) -> Dict[str, Any]:
+    mock.reset()
+    antes = {k: total(k) for k in ("scraper_fetch_retries_total", "scraper_fetch_errors_total",
+                                   "scraper_modulo_errors_total")}
+    dormido = total("scraper_sleep_seconds_total", motivo="reintento")
+    ahorradas = total("scraper_singleflight_saved_total", capa="modulo")
+    ciclos = []
+    salida = io.StringIO()
+    t0 = time.perf_counter()
+    # el log por módulo del scraper sólo estorbaría en la tabla
+    with contextlib.redirect_stdout(salida):
+        if frontier:
+            ciclos = crawl_frontier(familias, concurrency)
+        for fam in familias if not frontier else []:
+            scraper.FAMILIA_URL = scraper.familia_url(fam)
+            ciclos.extend(scraper.scrape_ifc(concurrency=concurrency))
+    secs = time.perf_counter() - t0
+    st = mock.stats
+    errores = sum(n for k, n in st.items() if isinstance(k, int) and k >= 400)
+    return {
+        "concurrency": concurrency,
+        "segundos": secs,
+        "peticiones": sum(n for k, n in st.items() if isinstance(k, int)),
+        "ok": st[200],
+        "http_429": st[429],
+        "http_5xx": sum(n for k, n in st.items() if isinstance(k, int) and k >= 500),
+        "http_error": errores,
+        "paginas_s": st[200] / secs if secs else 0.0,
+        "mb": st["bytes"] / 1e6,
+        "reintentos": total("scraper_fetch_retries_total") - antes["scraper_fetch_retries_total"],
+        "dormido_reintentos_s": total("scraper_sleep_seconds_total", motivo="reintento") - dormido,
+        "modulos_fallidos": total("scraper_modulo_errors_total") - antes["scraper_modulo_errors_total"],
+        "modulos_retenidos": len(scraper.modulo_flight),
+        "modulos_ahorrados": total("scraper_singleflight_saved_total", capa="modulo") - ahorradas,
+        "legacy": {a["id"]: a for a in scraper.to_legacy(ciclos)},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Crawl completo contra CATEDU simulado: rendimiento, reintentos y corrección.")
+    mock_catedu.add_arguments(ap)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--rate", type=float, default=1000.0,
+                    help="Peticiones/s por host en modo concurrente (alto: mide el crawler, no el limitador)")
+    ap.add_argument("--sleep", type=float, nargs=2, default=(0.0, 0.0), metavar=("ANTES", "DESPUES"),
+                    help="Pausas del modo secuencial (SLEEP del scraper)")
+    ap.add_argument("--frontier", action="store_true",
+                    help="Crawl de todas las familias con la frontier (crawl_familias) en lugar de scrape_ifc()")
+    ap.add_argument("--low-memory", action="store_true",
+                    help="Crawl en modo --low-memory del scraper; falla si el single-flight retiene módulos")
+    ap.add_argument("--json", default=None, metavar="PATH", help="Guarda los resultados en JSON")
+    args = ap.parse_args()
+
+    try:
+        mock, catalogo = mock_catedu.from_args(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    ref = esperado(catalogo)
+    unicas = paginas_unicas(catalogo)
+    scraper.SLEEP = tuple(args.sleep)
+    scraper.RATE = args.rate
+    scraper.low_memory = args.low_memory
+
+    resultados = []
+    with mock:
+        scraper.BASE = mock.base_url
+        n_mod = sum(len(c["modulos"]) for cs in catalogo.values() for c in cs)
+        print(f"🧪 {mock.base_url}{' (frontier)' if args.frontier else ''}: {len(catalogo)} familias, {n_mod} módulos, "
+              f"{unicas} páginas distintas, {len(ref)} asignaturas esperadas "
+              f"(latencia {args.latency:g}+{args.jitter:g} ms, 429 {args.p429:.0%}, 5xx {args.p5xx:.0%})\n")
+        print(f"{'conc':>4} {'s':>8} {'pág/s':>7} {'petic.':>7} {'429':>5} {'5xx':>5} {'reint.':>6} "
+              f"{'dormido':>8} {'fallos':>6} {'faltan':>6} {'distintas':>9} {'ahorrados':>9} {'repetidas':>9} {'retenidos':>9}")
+        for conc in args.concurrency:
+            r = run(mock, list(catalogo), conc, args.frontier)
+            r["repetidas"] = r["ok"] - unicas
+            legacy = r.pop("legacy")
+            r["faltan"] = sorted(set(ref) - set(legacy))
+            r["sobran"] = sorted(set(legacy) - set(ref))
+            r["distintas"] = sorted(k for k in set(ref) & set(legacy) if ref[k] != legacy[k])
+            resultados.append(r)
+            print(f"{conc:>4} {r['segundos']:>8.2f} {r['paginas_s']:>7.1f} {r['peticiones']:>7} {r['http_429']:>5} "
+                  f"{r['http_5xx']:>5} {r['reintentos']:>6.0f} {r['dormido_reintentos_s']:>7.1f}s "
+                  f"{r['modulos_fallidos']:>6.0f} {len(r['faltan']):>6} {len(r['distintas']):>9} "
+                  f"{r['modulos_ahorrados']:>9.0f} {r['repetidas']:>9} {r['modulos_retenidos']:>9}")
+
+    for r in resultados:
+        for k in ("faltan", "sobran", "distintas"):
+            if r[k]:
+                print(f"⚠️  concurrency={r['concurrency']} {k}: {', '.join(r[k][:10])}{' …' if len(r[k]) > 10 else ''}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"✅ Guardado {args.json}")
+    if not args.low_memory and any(r["repetidas"] > 0 for r in resultados):
+        print("❌ Hay páginas descargadas más de una vez en el mismo crawl")
+        sys.exit(1)
+    if args.low_memory and any(r["modulos_retenidos"] for r in resultados):
+        print("❌ --low-memory: el single-flight de módulos retiene Modulo parseados tras el crawl")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark de parse_ciclos_soup(): índice de nivel en una pasada vs. escaneo de ancestros.
+
+Genera páginas de familia sintéticas (4 secciones de nivel con N ciclos en total,
+dentro del layout típico de CATEDU) y compara el algoritmo anterior, que por cada
+enlace subía hasta <body> haciendo get_text() de cada section/div, con el actual.
+
+    python scripts/bench_parse_ciclos.py --sizes 25 100 400 1600
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from scrape_catedu_ifc import nivel_de, parse_ciclos_soup
+
+NIVELES = (("Ciclos de Grado Básico", "CFGB", 1), ("Ciclos de Grado Medio", "CFGM", 2),
+           ("Ciclos de Grado Superior", "CFGS", 3), ("Cursos de Especialización", "CES", 5))
+FAM_URL = "https://centrosdocentes.catedu.es/awc/public/pages/familias/ciclos.php?familia=IFC"
+
+
+def build_page(n: int):
+    esperado = {}
+    secciones = []
+    for i in range(n):
+        titulo, nivel, digito = NIVELES[i % len(NIVELES)]
+        codigo = f"IFC{digito}{i % 100:02d}"
+        esperado[f"{codigo}-{i}"] = nivel
+        secciones.append((titulo, codigo, i))
+    html = ["<html><body><div id='page'><div class='menu'>Inicio · Familias · Centros</div><div id='content'>"]
+    for titulo, _, _ in NIVELES:
+        html.append(f"<section><h3>{titulo}</h3><div class='lista'><ul>")
+        for t, codigo, i in secciones:
+            if t == titulo:
+                html.append(f"<li><a href='info_ciclo.php?codciclo={codigo}&n={i}'>{codigo} - Ciclo número {i}</a></li>")
+        html.append("</ul></div></section>")
+    html.append("</div></div></body></html>")
+    return "".join(html), esperado
+
+
+def parse_ciclos_ancestros(soup: BeautifulSoup):
+    """Algoritmo anterior: O(enlaces × tamaño de página), y el div más externo gana."""
+    out = []
+    for a in soup.find_all("a"):
+        nivel = "Desconocido"
+        h_section = a.find_parent()
+        while h_section and h_section.name not in ("body",):
+            if h_section.name in ("section", "div"):
+                nivel = nivel_de(h_section.get_text(" ", strip=True)) or nivel
+            h_section = h_section.parent
+        out.append((a.get("href"), nivel))
+    return out
+
+
+def aciertos(resultado, esperado) -> int:
+    ok = 0
+    for href, nivel in resultado:
+        codigo = href.split("codciclo=")[1].split("&")[0]
+        n = href.split("n=")[1]
+        ok += esperado[f"{codigo}-{n}"] == nivel
+    return ok
+
+
+def medir(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[25, 100, 400, 1600])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'ciclos':>7} {'ancestros (ms)':>15} {'una pasada (ms)':>16} {'x':>6} {'aciertos ant.':>14} {'aciertos nuevo':>15}")
+    for n in args.sizes:
+        html, esperado = build_page(n)
+        soup = BeautifulSoup(html, "html.parser")
+        t_old = medir(lambda: parse_ciclos_ancestros(soup), args.repeat)
+        t_new = medir(lambda: parse_ciclos_soup(soup, FAM_URL), args.repeat)
+        ok_old = aciertos(parse_ciclos_ancestros(soup), esperado)
+        ok_new = aciertos([(c["url"].split("?", 1)[1], c["nivel"]) for c in parse_ciclos_soup(soup, FAM_URL)], esperado)
+        print(f"{n:>7} {t_old * 1000:>15.1f} {t_new * 1000:>16.1f} {t_old / t_new:>6.1f} "
+              f"{ok_old:>9}/{n:<4} {ok_new:>10}/{n:<4}")
+
+
+if __name__ == "__main__":
+    main()
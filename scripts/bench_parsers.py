@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks del scraper sobre las páginas grabadas de scripts/fixtures/catedu
+(o, si todavía no hay, las sintéticas de scripts/fixtures/catedu/sintetico).
+
+Mide parse_modulo, parse_info_ciclo, parse_ciclos, clean_ra_desc, to_legacy y
+validate_asignatura sin tocar la red: páginas/s, tiempo por llamada y pico de
+memoria (tracemalloc). Guarda los resultados como baseline JSON y compara contra
+uno anterior para detectar regresiones.
+
+    python scripts/bench_parsers.py --save scripts/fixtures/bench_baseline.json
+    python scripts/bench_parsers.py --baseline scripts/fixtures/bench_baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import bs4
+
+import scrape_catedu_ifc as scraper
+from catedu_fixtures import load_index
+from validate_asignaturas_legacy import validate_asignatura
+
+IFC_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ifc_catedu.json")
+
+
+def build_cases(fixtures_dir: Optional[str] = None) -> Dict[str, tuple]:
+    """nombre -> (nº de elementos procesados, función sin argumentos)."""
+    index = load_index(fixtures_dir)
+    familias = [e for e in index if e["kind"] == "familia"]
+    ciclos = [e for e in index if e["kind"] == "ciclo"]
+    modulos = [e for e in index if e["kind"] == "modulo"]
+    soups = {e["file"]: scraper.make_soup(e["html"]) for e in familias + ciclos}
+    mod_soups = {e["file"]: scraper.make_soup(e["html"], scraper.MODULO_STRAINER) for e in modulos}
+
+    # Entradas reales de clean_ra_desc: el texto de cada bloque con cabecera RA
+    ra_texts: List[str] = []
+    for soup in mod_soups.values():
+        blocks, _ = scraper.block_texts(soup)
+        ra_texts += [scraper.strip_ra_headers(t).strip(" .-–—:") for _, t in blocks if scraper.find_ra_header(t) is not None]
+
+    ciclos_ifc = scraper.load_ciclos(IFC_JSON)
+    legacy = scraper.to_legacy(ciclos_ifc)
+
+    return {
+        "make_soup[modulo]": (len(modulos), lambda: [scraper.make_soup(e["html"], scraper.MODULO_STRAINER) for e in modulos]),
+        "parse_modulo": (len(modulos), lambda: [
+            scraper.parse_modulo_soup(mod_soups[e["file"]], e["ciclo_codigo"], e["ciclo_nombre"], e["curso"])
+            for e in modulos
+        ]),
+        "parse_info_ciclo": (len(ciclos), lambda: [scraper.parse_info_ciclo_soup(soups[e["file"]], e["url"]) for e in ciclos]),
+        "parse_ciclos": (len(familias), lambda: [scraper.parse_ciclos_soup(soups[e["file"]], e["url"]) for e in familias]),
+        "clean_ra_desc": (len(ra_texts), lambda: [scraper.clean_ra_desc(t) for t in ra_texts]),
+        "to_legacy": (sum(len(c.modulos) for c in ciclos_ifc), lambda: scraper.to_legacy(ciclos_ifc)),
+        "validate_asignatura": (len(legacy), lambda: [validate_asignatura(a) for a in legacy]),
+    }
+
+
+def run_case(items: int, fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    # el pico de memoria en una pasada aparte para no contaminar los tiempos
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "items": items,
+        "seconds": best,
+        "per_item_ms": best * 1000 / max(items, 1),
+        "items_per_sec": items / best if best else 0.0,
+        "peak_kb": peak / 1024,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regresiones = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        if r["per_item_ms"] > b["per_item_ms"] * (1 + threshold):
+            regresiones.append(name)
+    return regresiones
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark offline de los parsers de CATEDU.")
+    ap.add_argument("--fixtures", default=None,
+                    help="Directorio con index.json y las páginas HTML (por defecto las grabadas)")
+    ap.add_argument("--repeat", type=int, default=5, help="Repeticiones por caso (se queda la mejor)")
+    ap.add_argument("--only", nargs="*", default=None, help="Ejecuta sólo estos casos")
+    ap.add_argument("--save", default=None, help="Guarda los resultados como baseline JSON")
+    ap.add_argument("--baseline", default=None, help="Baseline JSON con el que comparar")
+    ap.add_argument("--threshold", type=float, default=0.15,
+                    help="Regresión si el tiempo por elemento empeora más de este porcentaje (0.15 = 15%%)")
+    args = ap.parse_args()
+
+    cases = build_cases(args.fixtures)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if k in args.only}
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'caso':<22} {'n':>5} {'total ms':>10} {'ms/elem':>9} {'elem/s':>10} {'pico KB':>9} {'vs base':>8}")
+    for name, (items, fn) in cases.items():
+        r = results[name] = run_case(items, fn, args.repeat)
+        delta = ""
+        if name in baseline:
+            delta = f"{(r['per_item_ms'] / baseline[name]['per_item_ms'] - 1) * 100:+.0f}%"
+        print(f"{name:<22} {items:>5} {r['seconds'] * 1000:>10.2f} {r['per_item_ms']:>9.3f} "
+              f"{r['items_per_sec']:>10.1f} {r['peak_kb']:>9.0f} {delta:>8}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "python": platform.python_version(),
+                    "bs4": bs4.__version__,
+                    "parser": scraper.PARSER_BACKEND,
+                    "parser_version": scraper.PARSER_VERSION,
+                    "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                },
+                "results": results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline guardado en {args.save}")
+
+    if baseline:
+        regresiones = compare(results, baseline, args.threshold)
+        if regresiones:
+            print(f"❌ Regresiones (> {args.threshold:.0%}): {', '.join(regresiones)}")
+            sys.exit(1)
+        print(f"✅ Sin regresiones respecto a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
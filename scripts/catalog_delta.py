@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""Parches delta entre dos versiones del catálogo legacy (asignaturas_FP.json).
+
+Cada versión se resume en un árbol de hashes (tipo Merkle): raíz -> cubos de
+módulos -> módulo -> RA -> CE. Para comparar dos versiones se baja sólo por las
+ramas cuyo hash cambia, así que el coste es proporcional a lo que ha cambiado, y
+del catálogo antiguo basta con su árbol (arbol.json), no hace falta el JSON.
+
+El parche lista módulos, RA y CE nuevos, borrados y cambiados, con el hash de
+origen y de destino para comprobar que se aplica sobre la versión correcta:
+
+    python scripts/catalog_delta.py diff viejo.json nuevo.json --out parche.json
+    python scripts/catalog_delta.py apply viejo.json parche.json --out nuevo.json
+    python scripts/catalog_delta.py apply-db parche.json --db data/db.sqlite
+    python scripts/catalog_delta.py publish public/asignaturas_FP.json --dir public/catalogo_delta
+
+`publish` mantiene un feed (feed.json + parches/N.json[.gz]) para que un cliente
+en la versión N descargue sólo los parches N+1..actual en lugar del catálogo entero.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from catalog_shards import compact
+from load_catalog_sqlite import BATCH, iter_catalog, load_catalog
+from validate_asignaturas_legacy import FormatoInvalido
+
+DELTA_VERSION = 1
+FORMATO = "asignaturas-delta"
+# Cubos del primer nivel del árbol: un cambio obliga a revisar ~n/FANOUT módulos
+FANOUT = 64
+DEFAULT_DIR = os.path.join("public", "catalogo_delta")
+
+Nodo = List[Any]   # [clave, hash, hash de los campos propios, hijos]
+
+
+class ParcheInvalido(ValueError):
+    pass
+
+
+# ================== Árbol de hashes ==================
+def h(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+                          .encode("utf-8")).hexdigest()[:16]
+
+
+def claves(items: List[Dict[str, Any]], campo: str = "codigo") -> List[str]:
+    """Clave única de cada elemento: su código, con "#n" en la n-ésima repetición."""
+    vistas: Counter = Counter()
+    out = []
+    for it in items:
+        c = str(it.get(campo) or "")
+        vistas[c] += 1
+        out.append(c if vistas[c] == 1 else f"{c}#{vistas[c]}")
+    return out
+
+
+def sin(d: Dict[str, Any], campo: str) -> Dict[str, Any]:
+    return {k: v for k, v in d.items() if k != campo}
+
+
+def orden_legacy(a: Dict[str, Any]) -> Tuple[int, str]:
+    # mismo criterio que LegacyBuilder (to_legacy)
+    aid = str(a.get("id") or "")
+    return (int(aid) if aid.isdigit() else 99999, a.get("nombre") or "")
+
+
+def ra_nodo(clave: str, ra: Dict[str, Any]) -> Nodo:
+    ces = ra.get("CE") or []
+    hijos = [[k, h(ce)] for k, ce in zip(claves(ces), ces)]
+    campos = h(sin(ra, "CE"))
+    return [clave, h([campos, hijos]), campos, hijos]
+
+
+def modulo_nodo(clave: str, a: Dict[str, Any]) -> Nodo:
+    ras = a.get("RA") or []
+    hijos = [ra_nodo(k, r) for k, r in zip(claves(ras), ras)]
+    campos = h(sin(a, "RA"))
+    return [clave, h([campos, [n[:2] for n in hijos]]), campos, hijos]
+
+
+def cubo(clave: str) -> str:
+    return f"{int(hashlib.sha256(clave.encode('utf-8')).hexdigest()[:4], 16) % FANOUT:02d}"
+
+
+def build_tree(asignaturas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Árbol de una versión del catálogo; `orden` sólo si no sigue el orden de to_legacy()."""
+    ks = claves(asignaturas, "id")
+    modulos = {k: modulo_nodo(k, a) for k, a in zip(ks, asignaturas)}
+    cubos: Dict[str, List[str]] = defaultdict(list)
+    for k in ks:
+        cubos[cubo(k)].append(k)
+    cubos_h = {c: {"h": h(sorted([k, modulos[k][1]] for k in ids)), "ids": ids} for c, ids in sorted(cubos.items())}
+    orden_k = [orden_legacy(a) for a in asignaturas]
+    canonico = all(x < y for x, y in zip(orden_k, orden_k[1:]))
+    orden = None if canonico else ks
+    return {
+        "version": DELTA_VERSION,
+        "raiz": h([[c, v["h"]] for c, v in cubos_h.items()] + [orden]),
+        "cubos": cubos_h,
+        "modulos": modulos,
+        "orden": orden,
+    }
+
+
+# ================== Diff ==================
+def diff_lista(viejos: List[Nodo], nuevos: List[Nodo], valores: Dict[str, Dict[str, Any]],
+               cambio: Callable[[Nodo, Nodo, Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    """Nuevos (con su posición), borrados y cambiados de una lista ordenada de nodos."""
+    vk = {n[0]: n for n in viejos}
+    nk = {n[0]: n for n in nuevos}
+    out: Dict[str, Any] = {}
+    nuevos_ = [{"pos": i, "clave": n[0], "valor": valores[n[0]]} for i, n in enumerate(nuevos) if n[0] not in vk]
+    borrados = [n[0] for n in viejos if n[0] not in nk]
+    cambiados = [cambio(vk[n[0]], n, valores[n[0]]) for n in nuevos if n[0] in vk and vk[n[0]][1] != n[1]]
+    if nuevos_:
+        out["nuevos"] = nuevos_
+    if borrados:
+        out["borrados"] = borrados
+    if cambiados:
+        out["cambiados"] = cambiados
+    # insertar por posición sólo reproduce la lista si los que se quedan no cambian de orden
+    if [n[0] for n in viejos if n[0] in nk] != [n[0] for n in nuevos if n[0] in vk]:
+        out["orden"] = [n[0] for n in nuevos]
+    return out
+
+
+def _cambio_ce(viejo: Nodo, nuevo: Nodo, ce: Dict[str, Any]) -> Dict[str, Any]:
+    return {"clave": nuevo[0], "valor": ce}
+
+
+def _cambio_ra(viejo: Nodo, nuevo: Nodo, ra: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"clave": nuevo[0]}
+    if viejo[2] != nuevo[2]:
+        out["campos"] = sin(ra, "CE")
+    ces = ra.get("CE") or []
+    d = diff_lista(viejo[3], nuevo[3], dict(zip(claves(ces), ces)), _cambio_ce)
+    if d:
+        out["CE"] = d
+    return out
+
+
+def _cambio_modulo(viejo: Nodo, nuevo: Nodo, a: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"clave": nuevo[0]}
+    if viejo[2] != nuevo[2]:
+        out["campos"] = sin(a, "RA")
+    ras = a.get("RA") or []
+    d = diff_lista(viejo[3], nuevo[3], dict(zip(claves(ras), ras)), _cambio_ra)
+    if d:
+        out["RA"] = d
+    return out
+
+
+def diff(viejo: Dict[str, Any], nuevo: Dict[str, Any], asignaturas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Parche del árbol `viejo` al `nuevo`; `asignaturas` es la versión nueva (de ahí salen los valores).
+
+    Sólo se visitan los cubos cuyo hash difiere y, dentro, los módulos/RA/CE cuyo hash difiere.
+    """
+    parche: Dict[str, Any] = {"formato": FORMATO, "version": DELTA_VERSION,
+                              "desde": viejo["raiz"], "hasta": nuevo["raiz"]}
+    if viejo["raiz"] == nuevo["raiz"]:
+        return parche
+    por_clave: Optional[Dict[str, Dict[str, Any]]] = None
+    nuevos, borrados, cambiados = [], [], []
+    for c in sorted(set(viejo["cubos"]) | set(nuevo["cubos"])):
+        vc, nc = viejo["cubos"].get(c), nuevo["cubos"].get(c)
+        if vc and nc and vc["h"] == nc["h"]:
+            continue
+        if por_clave is None:
+            por_clave = dict(zip(claves(asignaturas, "id"), asignaturas))
+        ids_v = set(vc["ids"]) if vc else set()
+        for k in (nc["ids"] if nc else []):
+            if k not in ids_v:
+                nuevos.append({"clave": k, "valor": por_clave[k]})
+            elif viejo["modulos"][k][1] != nuevo["modulos"][k][1]:
+                cambiados.append(_cambio_modulo(viejo["modulos"][k], nuevo["modulos"][k], por_clave[k]))
+        ids_n = set(nc["ids"]) if nc else set()
+        borrados.extend(k for k in (vc["ids"] if vc else []) if k not in ids_n)
+    if nuevos:
+        parche["nuevos"] = sorted(nuevos, key=lambda n: orden_legacy(n["valor"]))
+    if borrados:
+        parche["borrados"] = sorted(borrados)
+    if cambiados:
+        parche["cambiados"] = sorted(cambiados, key=lambda m: m["clave"])
+    if nuevo["orden"] is not None:
+        parche["orden"] = nuevo["orden"]
+    return parche
+
+
+# ================== Aplicación ==================
+def aplicar_lista(items: List[Dict[str, Any]], d: Dict[str, Any], cambio: Callable[..., Dict[str, Any]],
+                  campo: str = "codigo", faltan: Optional[Counter] = None) -> List[Dict[str, Any]]:
+    """Inversa de diff_lista(). Con `faltan` (Counter) las claves que no existen se cuentan en
+    lugar de dar error, para aplicar sobre datos que no son exactamente la versión de origen."""
+    ks = claves(items, campo)
+    actual = dict(zip(ks, items))
+
+    def falta(c: str) -> None:
+        if faltan is None:
+            raise ParcheInvalido(f"'{c}' no existe en la versión de origen")
+        faltan[c] += 1
+
+    for c in d.get("borrados", []):
+        if c in actual:
+            del actual[c]
+        else:
+            falta(c)
+    for ch in d.get("cambiados", []):
+        if ch["clave"] in actual:
+            actual[ch["clave"]] = cambio(actual[ch["clave"]], ch, faltan)
+        else:
+            falta(ch["clave"])
+    orden = [k for k in ks if k in actual]
+    for n in d.get("nuevos", []):
+        actual[n["clave"]] = n["valor"]
+        if "orden" not in d:
+            if "pos" in n:
+                orden.insert(min(n["pos"], len(orden)), n["clave"])
+            else:
+                orden.append(n["clave"])
+    if "orden" in d:
+        orden = [k for k in d["orden"] if k in actual]
+    return [actual[k] for k in orden]
+
+
+def _aplicar_ce(ce: Dict[str, Any], ch: Dict[str, Any], faltan: Optional[Counter]) -> Dict[str, Any]:
+    return ch["valor"]
+
+
+def _aplicar_ra(ra: Dict[str, Any], ch: Dict[str, Any], faltan: Optional[Counter]) -> Dict[str, Any]:
+    out = dict(ch["campos"]) if "campos" in ch else sin(ra, "CE")
+    ces = ra.get("CE") or []
+    out["CE"] = aplicar_lista(ces, ch["CE"], _aplicar_ce, faltan=faltan) if "CE" in ch else ces
+    return out
+
+
+def aplicar_modulo(a: Dict[str, Any], ch: Dict[str, Any], faltan: Optional[Counter] = None) -> Dict[str, Any]:
+    out = dict(ch["campos"]) if "campos" in ch else sin(a, "RA")
+    ras = a.get("RA") or []
+    out["RA"] = aplicar_lista(ras, ch["RA"], _aplicar_ra, faltan=faltan) if "RA" in ch else ras
+    return out
+
+
+def check_parche(parche: Dict[str, Any]) -> None:
+    if parche.get("formato") != FORMATO or parche.get("version") != DELTA_VERSION:
+        raise ParcheInvalido(f"Formato de parche no soportado: {parche.get('formato')} v{parche.get('version')}")
+
+
+def apply_patch(asignaturas: List[Dict[str, Any]], parche: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Versión nueva del catálogo; comprueba el hash de origen y el de destino."""
+    check_parche(parche)
+    raiz = build_tree(asignaturas)["raiz"]
+    if raiz != parche["desde"]:
+        raise ParcheInvalido(f"El parche es para la versión {parche['desde']} y el catálogo está en {raiz}")
+    out = aplicar_lista(asignaturas, parche, aplicar_modulo, campo="id")
+    if "orden" not in parche:
+        out.sort(key=orden_legacy)
+    raiz = build_tree(out)["raiz"]
+    if raiz != parche["hasta"]:
+        raise ParcheInvalido(f"El resultado ({raiz}) no coincide con la versión de destino {parche['hasta']}")
+    return out
+
+
+def apply_patch_db(conn: sqlite3.Connection, parche: Dict[str, Any], batch: int = BATCH,
+                   dry_run: bool = False) -> Tuple[Counter, Counter]:
+    """Aplica el parche a asignaturas/ra/ce leyendo y escribiendo sólo los módulos afectados.
+
+    Las asignaturas se reconstruyen desde su columna RA, se les aplica el cambio y
+    pasan por load_catalog(), así que RA/CE conservan su id y se siguen las mismas
+    reglas que en una carga completa: los módulos borrados del catálogo se quedan en
+    la base de datos (pueden tener cursos y notas), igual que con load_catalog_sqlite.py.
+    """
+    check_parche(parche)
+    cambiados = {ch["clave"].split("#")[0]: ch for ch in parche.get("cambiados", [])}
+    registros = [n["valor"] for n in parche.get("nuevos", [])]
+    ids = {str(a.get("id") or "").strip() for a in registros} | set(cambiados)
+    faltan: Counter = Counter()
+    extra = Counter()
+    rows = conn.execute("SELECT id, nombre, creditos, RA FROM asignaturas WHERE id IN (SELECT value FROM json_each(?))",
+                        (json.dumps(sorted(cambiados)),)).fetchall()
+    for aid, nombre, creditos, ra in rows:
+        actual = {"id": aid, "nombre": nombre, "creditos": creditos or None, "RA": json.loads(ra or "[]")}
+        registros.append(aplicar_modulo(actual, cambiados.pop(aid), faltan))
+    # cambiados que no están en la base de datos: sin el módulo entero no se pueden crear
+    extra["modulos_sin_base"] = len(cambiados)
+    extra["claves_sin_base"] = sum(faltan.values())
+    extra["borrados_conservados"] = len(parche.get("borrados", []))
+    counts, stats = load_catalog(conn, registros, batch, dry_run, ids=ids)
+    return counts, stats + extra
+
+
+# ================== Feed ==================
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def publish(asignaturas: List[Dict[str, Any]], out_dir: str, conservar: int = 100) -> Dict[str, Any]:
+    """Añade la versión al feed (si ha cambiado) con el parche desde la anterior."""
+    feed_path = os.path.join(out_dir, "feed.json")
+    arbol_path = os.path.join(out_dir, "arbol.json.gz")
+    feed = {"formato": FORMATO, "version": DELTA_VERSION, "versiones": []}
+    if os.path.exists(feed_path):
+        with open(feed_path, "r", encoding="utf-8") as f:
+            feed = json.load(f)
+        if feed.get("version") != DELTA_VERSION:
+            raise ParcheInvalido(f"'{feed_path}' es de otra versión del formato ({feed.get('version')})")
+    nuevo = build_tree(asignaturas)
+    versiones = feed["versiones"]
+    if versiones and versiones[-1]["raiz"] == nuevo["raiz"]:
+        return feed
+
+    entrada: Dict[str, Any] = {"n": versiones[-1]["n"] + 1 if versiones else 1, "raiz": nuevo["raiz"],
+                               "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "modulos": len(nuevo["modulos"])}
+    if versiones and os.path.exists(arbol_path):
+        with gzip.open(arbol_path, "rt", encoding="utf-8") as f:
+            viejo = json.load(f)
+        if viejo["raiz"] == versiones[-1]["raiz"]:
+            data = compact(diff(viejo, nuevo, asignaturas))
+            rel = f"parches/{entrada['n']}.json"
+            _write(os.path.join(out_dir, rel), data)
+            _write(os.path.join(out_dir, rel + ".gz"), gzip.compress(data, 9, mtime=0))
+            entrada.update(parche=rel, bytes=len(data))
+    versiones.append(entrada)
+    # los clientes más atrasados que el parche más antiguo descargan el catálogo completo
+    for v in versiones[:-conservar]:
+        for suf in ("", ".gz"):
+            if v.get("parche") and os.path.exists(os.path.join(out_dir, v["parche"] + suf)):
+                os.remove(os.path.join(out_dir, v["parche"] + suf))
+    feed["versiones"] = versiones[-conservar:]
+    _write(arbol_path, gzip.compress(compact(nuevo), 9, mtime=0))
+    _write(feed_path, json.dumps(feed, ensure_ascii=False, indent=2).encode("utf-8"))
+    return feed
+
+
+# ================== CLI ==================
+def load_tree_or_catalog(path: str) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+    """Un árbol ya calculado (arbol.json[.gz]) o cualquier catálogo que entienda iter_catalog()."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        head = f.read(64).lstrip()
+    if head.startswith("{") and '"version"' in head:
+        with opener(path, "rt", encoding="utf-8") as f:
+            return json.load(f), None
+    asignaturas = list(iter_catalog(path))
+    return build_tree(asignaturas), asignaturas
+
+
+def resumen(parche: Dict[str, Any]) -> str:
+    ra = Counter()
+    for m in parche.get("cambiados", []):
+        for k in ("nuevos", "borrados", "cambiados"):
+            ra[k] += len(m.get("RA", {}).get(k, []))
+            for r in m.get("RA", {}).get("cambiados", []):
+                ra["ce_" + k] += len(r.get("CE", {}).get(k, []))
+    return (f"módulos +{len(parche.get('nuevos', []))} -{len(parche.get('borrados', []))} "
+            f"~{len(parche.get('cambiados', []))} · RA +{ra['nuevos']} -{ra['borrados']} ~{ra['cambiados']} "
+            f"· CE +{ra['ce_nuevos']} -{ra['ce_borrados']} ~{ra['ce_cambiados']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parches delta entre versiones del catálogo (árbol de hashes).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("diff", help="Parche entre dos versiones")
+    d.add_argument("viejo", help="Catálogo o árbol (arbol.json.gz) de la versión de origen")
+    d.add_argument("nuevo", help="Catálogo de la versión de destino")
+    d.add_argument("--out", default=None, help="Fichero del parche (por defecto, a la salida estándar)")
+    a = sub.add_parser("apply", help="Aplica un parche a un catálogo JSON")
+    a.add_argument("catalogo")
+    a.add_argument("parche")
+    a.add_argument("--out", required=True)
+    b = sub.add_parser("apply-db", help="Aplica un parche a las tablas asignaturas/ra/ce")
+    b.add_argument("parche")
+    b.add_argument("--db", default="data/db.sqlite")
+    b.add_argument("--batch", type=int, default=BATCH)
+    b.add_argument("--dry-run", action="store_true")
+    p = sub.add_parser("publish", help="Añade una versión al feed de parches")
+    p.add_argument("catalogo", nargs="?", default=os.path.join("public", "asignaturas_FP.json"))
+    p.add_argument("--dir", default=DEFAULT_DIR)
+    p.add_argument("--conservar", type=int, default=100, help="Parches que se mantienen en el feed")
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "diff":
+            t0 = time.perf_counter()
+            viejo, _ = load_tree_or_catalog(args.viejo)
+            asignaturas = list(iter_catalog(args.nuevo))
+            parche = diff(viejo, build_tree(asignaturas), asignaturas)
+            data = compact(parche)
+            if args.out:
+                _write(args.out, data)
+                print(f"🩹 {resumen(parche)} -> {args.out} ({len(data) / 1024:.1f} KB, "
+                      f"{(time.perf_counter() - t0) * 1000:.0f} ms)")
+            else:
+                sys.stdout.write(json.dumps(parche, ensure_ascii=False, indent=2) + "\n")
+        elif args.cmd == "apply":
+            with open(args.parche, "r", encoding="utf-8") as f:
+                parche = json.load(f)
+            out = apply_patch(list(iter_catalog(args.catalogo)), parche)
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(out, f, ensure_ascii=False, indent=2)
+            print(f"✅ {resumen(parche)} · guardado {args.out} ({parche['hasta']})")
+        elif args.cmd == "apply-db":
+            with open(args.parche, "r", encoding="utf-8") as f:
+                parche = json.load(f)
+            conn = sqlite3.connect(args.db, timeout=30)
+            try:
+                counts, stats = apply_patch_db(conn, parche, max(1, args.batch), args.dry_run)
+            finally:
+                conn.close()
+            print(f"{'🧪 (dry-run) ' if args.dry_run else ''}🩹 {resumen(parche)} -> '{args.db}'")
+            for kind, n in sorted(counts.items()):
+                print(f"   • {kind}: {n}")
+            for k in ("modulos_sin_base", "claves_sin_base", "borrados_conservados"):
+                if stats[k]:
+                    print(f"⚠️  {k}: {stats[k]}")
+        else:
+            feed = publish(list(iter_catalog(args.catalogo)), args.dir, max(1, args.conservar))
+            v = feed["versiones"][-1]
+            extra = f", parche {v['parche']} ({v['bytes'] / 1024:.1f} KB)" if v.get("parche") else ""
+            print(f"📰 Feed {args.dir}: versión {v['n']} ({v['raiz']}){extra}")
+    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+        kind = "inválido" if isinstance(e, (ParcheInvalido, FormatoInvalido)) else "error"
+        print(f"❌ ({kind}) {e}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Catálogo internado: cada texto de RA/CE se guarda una sola vez.
+
+Los módulos compartidos entre ciclos (FOL, EIE, programación...) repiten los
+mismos RA y CE en ifc_catedu.json. Aquí cada descripción va a una tabla de
+textos y cada lista de RA a una tabla de bloques, direccionadas por contenido
+(misma cadena -> mismo id), y los módulos sólo guardan referencias. Al cargarlo,
+los módulos que comparten bloque comparten también los mismos objetos RA/Criterio.
+
+La expansión es exacta: se reconstruye ifc_catedu.json byte a byte y, desde él,
+el mismo asignaturas_FP.json que daría to_legacy(). Además se buscan casi-duplicados
+(MinHash sobre bigramas de palabras normalizadas) para revisar variantes de espacios,
+puntuación o acentos que _norm() no unifica; sólo se informan, no se fusionan.
+
+    python scripts/catalog_intern.py build ifc_catedu.json --out public/catalogo_interned.json
+    python scripts/catalog_intern.py expand public/catalogo_interned.json --ifc-out ifc.json --legacy-out legacy.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from scrape_catedu_ifc import RA, Ciclo, Criterio, Modulo, load_ciclos, to_legacy
+
+INTERN_VERSION = 1
+
+
+# ================== Internado ==================
+class Interner:
+    """Tabla valor -> id; el id es la posición en la tabla final."""
+
+    def __init__(self):
+        self.ids: Dict[Any, int] = {}
+        self.items: List[Any] = []
+        self.refs = 0
+
+    def __call__(self, key: Any, value: Any = None) -> int:
+        self.refs += 1
+        i = self.ids.get(key)
+        if i is None:
+            i = self.ids[key] = len(self.items)
+            self.items.append(key if value is None else value)
+        return i
+
+
+def intern_catalog(ciclos: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """ifc_catedu.json (ya cargado) -> representación internada + contadores."""
+    textos, bloques = Interner(), Interner()
+    out_ciclos = []
+    for c in ciclos:
+        mods = []
+        for m in c["modulos"]:
+            bloque = [
+                [ra["codigo"], textos(ra["descripcion"]),
+                 [[ce["codigo"], textos(ce["descripcion"])] for ce in ra["CE"]]]
+                for ra in m["RA"]
+            ]
+            key = json.dumps(bloque, separators=(",", ":"))
+            # mismo orden de claves que el original; "RA" pasa a ser el id del bloque
+            mods.append({k: (bloques(key, bloque) if k == "RA" else v) for k, v in m.items()})
+        out_ciclos.append({k: (mods if k == "modulos" else v) for k, v in c.items()})
+
+    data = {
+        "version": INTERN_VERSION,
+        "textos": textos.items,
+        "bloques": bloques.items,
+        "ciclos": out_ciclos,
+    }
+    stats = {"textos": len(textos.items), "textos_refs": textos.refs,
+             "bloques": len(bloques.items), "bloques_refs": bloques.refs}
+    return data, stats
+
+
+def expand(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Inversa de intern_catalog(): las mismas estructuras que json.load(ifc_catedu.json)."""
+    textos = data["textos"]
+
+    def bloque(i: int) -> List[Dict[str, Any]]:
+        return [
+            {"codigo": cod, "descripcion": textos[t],
+             "CE": [{"codigo": cc, "descripcion": textos[ct]} for cc, ct in ces]}
+            for cod, t, ces in data["bloques"][i]
+        ]
+
+    return [
+        {k: ([{mk: (bloque(mv) if mk == "RA" else mv) for mk, mv in m.items()} for m in v]
+             if k == "modulos" else v) for k, v in c.items()}
+        for c in data["ciclos"]
+    ]
+
+
+def ciclos_from_interned(data: Dict[str, Any]) -> List[Ciclo]:
+    """Ciclos para to_legacy() & co. Los módulos con el mismo bloque comparten la lista de RA
+    (no se modifica en ningún punto del pipeline, así que compartirla es seguro)."""
+    textos = data["textos"]
+    bloques = [
+        [RA(codigo=cod, descripcion=textos[t], CE=[Criterio(codigo=cc, descripcion=textos[ct]) for cc, ct in ces])
+         for cod, t, ces in b]
+        for b in data["bloques"]
+    ]
+    return [
+        Ciclo(codigo=c["codigo"], nombre=c["ciclo"], nivel=c["nivel"], modulos=[
+            Modulo(codigo=m["codigo"], nombre=m["nombre"], ciclo_codigo=m["ciclo_codigo"],
+                   ciclo_nombre=m["ciclo_nombre"], curso=m.get("curso"), horas_totales=m.get("horas_totales"),
+                   horas_semanales=m.get("horas_semanales"), creditos=m.get("creditos"), RA=bloques[m["RA"]])
+            for m in c.get("modulos", [])
+        ])
+        for c in data["ciclos"]
+    ]
+
+
+# ================== Casi-duplicados (MinHash + LSH) ==================
+MINHASH_PERMS = 24
+LSH_BANDS = 6          # 6 bandas x 4 filas: candidatos a partir de Jaccard ~0.6
+_PRIME = (1 << 61) - 1
+
+
+def normalize(t: str) -> str:
+    """Sin acentos, en minúsculas, sin puntuación y con los espacios colapsados."""
+    t = unicodedata.normalize("NFKD", t)
+    t = "".join(ch for ch in t if not unicodedata.combining(ch)).casefold()
+    return " ".join(re.sub(r"[^\w]+", " ", t).split())
+
+
+def shingles(t: str, k: int = 2) -> set:
+    words = normalize(t).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(sh: set, perms: List[Tuple[int, int]]) -> List[int]:
+    hs = [_hash64(s) for s in sh]
+    return [min((a * h + b) % _PRIME for h in hs) for a, b in perms]
+
+
+def near_duplicates(textos: List[str], threshold: float = 0.8) -> List[List[int]]:
+    """Grupos de ids de textos distintos con Jaccard de bigramas >= threshold."""
+    rng = random.Random(1)
+    perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(MINHASH_PERMS)]
+    rows = MINHASH_PERMS // LSH_BANDS
+    sets = [shingles(t) for t in textos]
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, sh in enumerate(sets):
+        if not sh:
+            continue
+        sig = minhash(sh, perms)
+        for b in range(LSH_BANDS):
+            buckets[(b, *sig[b * rows:(b + 1) * rows])].append(i)
+
+    parent = list(range(len(textos)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    vistos = set()
+    for ids in buckets.values():
+        for a_i, a in enumerate(ids):
+            for b in ids[a_i + 1:]:
+                if (a, b) in vistos:
+                    continue
+                vistos.add((a, b))
+                # confirmación con el Jaccard exacto (MinHash sólo propone candidatos)
+                inter = len(sets[a] & sets[b])
+                if inter / (len(sets[a]) + len(sets[b]) - inter) >= threshold:
+                    parent[find(a)] = find(b)
+
+    grupos: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(textos)):
+        grupos[find(i)].append(i)
+    return sorted((g for g in grupos.values() if len(g) > 1), key=lambda g: g[0])
+
+
+# ================== CLI ==================
+def dump_ifc(ciclos: List[Dict[str, Any]]) -> str:
+    # igual que el scraper: json.dump(..., ensure_ascii=False, indent=2)
+    return json.dumps(ciclos, ensure_ascii=False, indent=2)
+
+
+def medir_carga(fn) -> Tuple[float, float]:
+    """(ms, KB retenidos) de construir los ciclos en memoria."""
+    t0 = time.perf_counter()
+    tracemalloc.start()
+    obj = fn()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ms = (time.perf_counter() - t0) * 1000
+    del obj
+    return ms, actual / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Interna los textos de RA/CE del catálogo y lo expande de vuelta.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="ifc_catedu.json -> catálogo internado")
+    b.add_argument("ifc_json", nargs="?", default="ifc_catedu.json")
+    b.add_argument("--out", default=os.path.join("public", "catalogo_interned.json"))
+    b.add_argument("--umbral", type=float, default=0.8, help="Jaccard mínimo para avisar de casi-duplicados")
+    e = sub.add_parser("expand", help="Catálogo internado -> ifc_catedu.json / asignaturas_FP.json")
+    e.add_argument("interned")
+    e.add_argument("--ifc-out", default=None)
+    e.add_argument("--legacy-out", default=None)
+    args = ap.parse_args()
+
+    if args.cmd == "expand":
+        with open(args.interned, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INTERN_VERSION:
+            print(f"❌ '{args.interned}' es de otra versión ({data.get('version')})")
+            sys.exit(2)
+        if args.ifc_out:
+            with open(args.ifc_out, "w", encoding="utf-8") as f:
+                f.write(dump_ifc(expand(data)))
+            print(f"✅ Guardado {args.ifc_out}")
+        if args.legacy_out:
+            with open(args.legacy_out, "w", encoding="utf-8") as f:
+                json.dump(to_legacy(ciclos_from_interned(data)), f, ensure_ascii=False, indent=2)
+            print(f"✅ Guardado {args.legacy_out}")
+        return
+
+    with open(args.ifc_json, "r", encoding="utf-8") as f:
+        raw = f.read()
+    original = json.loads(raw)
+    data, st = intern_catalog(original)
+
+    # la expansión tiene que devolver exactamente lo mismo, o no se escribe nada
+    if dump_ifc(expand(data)) != dump_ifc(original):
+        print("❌ La expansión no reproduce el catálogo original; no se guarda.")
+        sys.exit(1)
+    if to_legacy(ciclos_from_interned(data)) != to_legacy(load_ciclos(args.ifc_json)):
+        print("❌ to_legacy() sobre el catálogo internado no coincide con el original; no se guarda.")
+        sys.exit(1)
+
+    grupos = near_duplicates(data["textos"], args.umbral)
+    data["casi_duplicados"] = grupos
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write(body)
+
+    ms_o, kb_o = medir_carga(lambda: load_ciclos(args.ifc_json))
+    ms_i, kb_i = medir_carga(lambda: ciclos_from_interned(json.loads(body)))
+    print(f"🧵 Textos: {st['textos']} únicos de {st['textos_refs']} · bloques de RA: {st['bloques']} de {st['bloques_refs']}")
+    print(f"📦 {len(raw.encode('utf-8')) / 1024:.0f} KB -> {len(body.encode('utf-8')) / 1024:.0f} KB ({args.out})")
+    print(f"⏱️  Carga: {ms_o:.1f} ms / {kb_o:.0f} KB en memoria -> {ms_i:.1f} ms / {kb_i:.0f} KB")
+    if grupos:
+        print(f"⚠️  {len(grupos)} grupos de casi-duplicados (Jaccard >= {args.umbral}):")
+        for g in grupos[:10]:
+            for i in g:
+                print(f"   • [{i}] {data['textos'][i][:110]}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Índice de búsqueda (SQLite FTS5) sobre las descripciones de RA y CE.
+
+Una fila por RA y por CE de cada módulo, con el mismo criterio de duplicados que
+to_legacy(): los módulos van por legacy_key() ("<código>::<nombre en minúsculas>"),
+así que un código con dos nombres son dos módulos, cada uno con sus RA/CE y ciclos. El tokenizador unicode61 con remove_diacritics pliega acentos y
+mayúsculas ("evaluacion" encuentra "Evaluación") y todos los términos de la
+consulta se buscan como prefijo ("riesg labor" -> riesgos laborales).
+
+    python scripts/catalog_search.py build ifc_catedu.json --db public/catalogo_busqueda.sqlite
+    python scripts/catalog_search.py query "prevención riesgos" --ciclo IFC201 --limit 10
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional
+
+from scrape_catedu_ifc import Ciclo, LegacyBuilder, legacy_key
+
+# 2: módulos por legacy_key() (columna clave) en lugar de por código
+INDEX_VERSION = 2
+DEFAULT_DB = os.path.join("public", "catalogo_busqueda.sqlite")
+
+SCHEMA = """
+CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE modulos (clave TEXT PRIMARY KEY, codigo TEXT NOT NULL, nombre TEXT NOT NULL, ciclos TEXT NOT NULL);
+CREATE INDEX modulos_codigo ON modulos (codigo);
+CREATE TABLE modulo_ciclo (ciclo TEXT NOT NULL, modulo TEXT NOT NULL, PRIMARY KEY (ciclo, modulo)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE textos USING fts5(
+    texto,
+    modulo UNINDEXED,
+    ra UNINDEXED,
+    ce UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+
+@dataclass
+class Hit:
+    modulo: str
+    nombre: str
+    clave: str
+    ra: str
+    ce: Optional[str]
+    texto: str
+    fragmento: str
+    score: float
+
+
+# ================== Construcción ==================
+def build_index(ciclos: Iterable[Ciclo], db_path: str) -> Dict[str, int]:
+    """Construye el índice en un fichero temporal y lo sustituye de golpe."""
+    builder = LegacyBuilder()
+    # legacy_key -> ciclos que enlazan esa variante del módulo
+    ciclos_de: Dict[str, List[str]] = {}
+    for c in ciclos:
+        for m in c.modulos:
+            builder.add(m)
+            cod, nombre = (m.codigo or "").strip(), (m.nombre or "").strip()
+            if not (cod and nombre):
+                continue  # to_legacy() tampoco los incluye
+            k = legacy_key({"id": cod, "nombre": nombre})
+            if c.codigo not in ciclos_de.setdefault(k, []):
+                ciclos_de[k].append(c.codigo)
+
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    stats = {"modulos": 0, "ra": 0, "ce": 0}
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            filas = []
+            for a in builder.result():
+                k = legacy_key(a)
+                cs = ciclos_de.get(k, [])
+                conn.execute("INSERT INTO modulos VALUES (?, ?, ?, ?)", (k, a["id"], a["nombre"], json.dumps(cs)))
+                conn.executemany("INSERT INTO modulo_ciclo VALUES (?, ?)", [(c, k) for c in cs])
+                stats["modulos"] += 1
+                for ra in a["RA"]:
+                    filas.append((ra["descripcion"], k, ra["codigo"], None))
+                    stats["ra"] += 1
+                    for ce in ra["CE"]:
+                        filas.append((ce["descripcion"], k, ra["codigo"], ce["codigo"]))
+                        stats["ce"] += 1
+            conn.executemany("INSERT INTO textos (texto, modulo, ra, ce) VALUES (?, ?, ?, ?)", filas)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(INDEX_VERSION)), ("generado", time.strftime("%Y-%m-%dT%H:%M:%S")),
+            ])
+        # segmentos del FTS fusionados: consultas más rápidas y fichero más pequeño
+        conn.execute("INSERT INTO textos (textos) VALUES ('optimize')")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, db_path)
+    return stats
+
+
+# ================== Consulta ==================
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(q: str) -> str:
+    """Texto libre -> consulta FTS5: cada palabra como prefijo, todas obligatorias."""
+    return " AND ".join(f'"{t}"*' for t in TERM_RE.findall(q))
+
+
+def search(conn: sqlite3.Connection, q: str, limit: int = 20, ciclo: Optional[str] = None,
+           modulo: Optional[str] = None, tipo: Optional[str] = None) -> List[Hit]:
+    """Resultados ordenados por bm25; tipo = "ra" | "ce" filtra por nivel.
+
+    `modulo` es un código (todas sus variantes) o una clave "<código>::<nombre>".
+    """
+    match = fts_query(q)
+    if not match:
+        return []
+    sql = ("SELECT m.codigo, m.nombre, m.clave, t.ra, t.ce, t.texto, "
+           "snippet(textos, 0, '[', ']', '…', 12), bm25(textos) AS score "
+           "FROM textos t JOIN modulos m ON m.clave = t.modulo WHERE textos MATCH ?")
+    params: list = [match]
+    if ciclo:
+        sql += " AND t.modulo IN (SELECT modulo FROM modulo_ciclo WHERE ciclo = ?)"
+        params.append(ciclo)
+    if modulo and "::" in modulo:
+        sql += " AND t.modulo = ?"
+        params.append(modulo.lower())
+    elif modulo:
+        sql += " AND m.codigo = ?"
+        params.append(modulo)
+    if tipo == "ra":
+        sql += " AND t.ce IS NULL"
+    elif tipo == "ce":
+        sql += " AND t.ce IS NOT NULL"
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+    return [Hit(*row) for row in conn.execute(sql, params)]
+
+
+def open_index(db_path: str = DEFAULT_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    row = conn.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+    if not row or int(row[0]) != INDEX_VERSION:
+        conn.close()
+        raise ValueError(f"Índice '{db_path}' de otra versión: reconstrúyelo con 'build'")
+    return conn
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índice FTS5 de RA/CE: construcción y consultas.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Construye el índice desde ifc_catedu.json")
+    b.add_argument("ifc_json", nargs="?", default="ifc_catedu.json")
+    b.add_argument("--db", default=DEFAULT_DB)
+    q = sub.add_parser("query", help="Busca en RA y CE")
+    q.add_argument("texto")
+    q.add_argument("--db", default=DEFAULT_DB)
+    q.add_argument("--limit", type=int, default=20)
+    q.add_argument("--ciclo", default=None, help="Sólo módulos de este ciclo (p. ej. IFC303)")
+    q.add_argument("--modulo", default=None,
+                   help="Sólo este módulo: código (p. ej. 0485) o \"<código>::<nombre>\" si hay varios")
+    q.add_argument("--tipo", choices=("ra", "ce"), default=None)
+    q.add_argument("--json", action="store_true", help="Salida JSON")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        from catalog_shards import iter_ciclos_json
+        t0 = time.perf_counter()
+        st = build_index(iter_ciclos_json(args.ifc_json), args.db)
+        print(f"🔎 Índice {args.db}: {st['modulos']} módulos, {st['ra']} RA, {st['ce']} CE "
+              f"en {(time.perf_counter() - t0) * 1000:.0f} ms")
+        return
+
+    try:
+        conn = open_index(args.db)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"❌ No se pudo abrir el índice '{args.db}': {e}")
+        sys.exit(2)
+    t0 = time.perf_counter()
+    hits = search(conn, args.texto, args.limit, args.ciclo, args.modulo, args.tipo)
+    ms = (time.perf_counter() - t0) * 1000
+    conn.close()
+
+    if args.json:
+        print(json.dumps([asdict(h) for h in hits], ensure_ascii=False, indent=2))
+        return
+    print(f"🔎 {len(hits)} resultados para '{args.texto}' en {ms:.1f} ms\n")
+    for h in hits:
+        print(f"  {h.modulo} – {h.nombre} · {h.ce or h.ra}")
+        print(f"     {h.fragmento}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Catálogo troceado por ciclo y por módulo, con manifest de índices.
+
+En lugar de descargar y recorrer asignaturas_FP.json entero, el cliente lee
+manifest.json (módulo -> shard, ciclo -> módulos, nivel -> ciclos) y pide sólo
+el shard que necesita. Los módulos van por la misma clave que desambigua
+to_legacy(), "<código>::<nombre en minúsculas>": hay códigos con dos nombres. Cada shard es JSON compacto con el hash del contenido en
+el nombre (se puede cachear para siempre) y variantes .gz y, si está instalado
+el paquete brotli, .br.
+
+    python scripts/catalog_shards.py ifc_catedu.json --out public/catalogo
+    python scripts/catalog_shards.py ifc_catedu.json --out /tmp/catalogo --check
+
+    public/catalogo/manifest.json
+    public/catalogo/ciclos/IFC201-<sha12>.json[.gz|.br]
+    public/catalogo/modulos/0223-<sha12>.json[.gz|.br]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from scrape_catedu_ifc import Ciclo, LegacyBuilder, legacy_key, legacy_record, modulo_from_dict
+from validate_asignaturas_legacy import iter_json_array
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli sólo se generan las variantes .gz
+    brotli = None
+
+# 2: "modulos" por legacy_key() en lugar de por código
+MANIFEST_VERSION = 2
+
+
+def compact(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def iter_ciclos_json(path: str) -> Iterator[Ciclo]:
+    """ifc_catedu.json ciclo a ciclo, sin cargarlo entero."""
+    with open(path, "r", encoding="utf-8") as f:
+        for c in iter_json_array(f):
+            yield Ciclo(codigo=c["codigo"], nombre=c["ciclo"], nivel=c["nivel"],
+                        modulos=[modulo_from_dict(m) for m in c.get("modulos", [])])
+
+
+class ShardWriter:
+    """Escribe shards direccionados por contenido (si ya existe, no lo reescribe)."""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.encodings = ["gz"] + (["br"] if brotli is not None else [])
+        self.written = 0
+
+    def _write(self, rel: str, data: bytes) -> None:
+        path = os.path.join(self.out_dir, rel)
+        if os.path.exists(path):
+            return  # mismo nombre = mismo contenido
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.written += 1
+
+    def put(self, kind: str, name: str, obj: Any) -> Dict[str, Any]:
+        data = compact(obj)
+        sha = hashlib.sha256(data).hexdigest()
+        rel = f"{kind}/{name}-{sha[:12]}.json"
+        self._write(rel, data)
+        # mtime=0 para que el .gz sea reproducible
+        self._write(rel + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            self._write(rel + ".br", brotli.compress(data, quality=11))
+        return {"shard": rel, "sha256": sha, "bytes": len(data)}
+
+    def prune(self, keep: set) -> int:
+        """Borra los shards (y sus variantes) que el manifest ya no referencia."""
+        n = 0
+        for kind in ("ciclos", "modulos"):
+            d = os.path.join(self.out_dir, kind)
+            if not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                base = name[:-3] if name.endswith((".gz", ".br")) else name
+                if f"{kind}/{base}" not in keep:
+                    os.remove(os.path.join(d, name))
+                    n += 1
+        return n
+
+
+def build_shards(ciclos: Iterable[Ciclo], out_dir: str) -> Dict[str, Any]:
+    """Shards + manifest.json; los ciclos se procesan de uno en uno."""
+    writer = ShardWriter(out_dir)
+    manifest_ciclos: Dict[str, Dict[str, Any]] = {}
+    niveles: Dict[str, List[str]] = {}
+    # legacy_key -> (puntuación, entrada, clave de orden): mismo criterio que to_legacy()
+    modulos: Dict[str, Tuple[int, Dict[str, Any], Tuple[int, str]]] = {}
+
+    for c in ciclos:
+        registros = []
+        for m in c.modulos:
+            a = legacy_record(m)
+            if a is None:
+                continue
+            registros.append(a)
+            k = legacy_key(a)
+            sc = LegacyBuilder.score(a)
+            prev = modulos.get(k)
+            if prev is None or sc > prev[0]:
+                # el sha del contenido distingue los shards de un mismo código
+                entry = {"id": a["id"], "nombre": a["nombre"], **writer.put("modulos", a["id"], a)}
+                entry["ciclos"] = prev[1]["ciclos"] if prev else []
+                sort_key = (int(a["id"]) if a["id"].isdigit() else 99999, a["nombre"])
+                modulos[k] = (sc, entry, sort_key)
+            if c.codigo not in modulos[k][1]["ciclos"]:
+                modulos[k][1]["ciclos"].append(c.codigo)
+
+        shard = {"codigo": c.codigo, "ciclo": c.nombre, "nivel": c.nivel, "asignaturas": registros}
+        manifest_ciclos[c.codigo] = {
+            "nombre": c.nombre,
+            "nivel": c.nivel,
+            "modulos": [legacy_key(a) for a in registros],
+            **writer.put("ciclos", c.codigo, shard),
+        }
+        niveles.setdefault(c.nivel, []).append(c.codigo)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "encodings": writer.encodings,
+        "niveles": niveles,
+        "ciclos": manifest_ciclos,
+        "modulos": {k: v[1] for k, v in sorted(modulos.items(), key=lambda kv: kv[1][2])},
+    }
+    data = compact(manifest)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, body in (("manifest.json", data), ("manifest.json.gz", gzip.compress(data, 9, mtime=0))):
+        tmp = os.path.join(out_dir, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, os.path.join(out_dir, name))
+    keep = {e["shard"] for e in manifest_ciclos.values()} | {v[1]["shard"] for v in modulos.values()}
+    manifest["_stats"] = {"escritos": writer.written, "borrados": writer.prune(keep), "manifest_bytes": len(data)}
+    return manifest
+
+
+def check_manifest(manifest: Dict[str, Any], out_dir: str, ciclos: Iterable[Ciclo]) -> List[str]:
+    """Diferencias entre los módulos del manifest y to_legacy() de los mismos ciclos."""
+    builder = LegacyBuilder()
+    for c in ciclos:
+        for m in c.modulos:
+            builder.add(m)
+    legacy = builder.result()
+    errores = []
+    if len(manifest["modulos"]) != len(legacy):
+        errores.append(f"{len(manifest['modulos'])} módulos en el manifest y {len(legacy)} asignaturas en to_legacy()")
+    for (k, entry), a in zip(manifest["modulos"].items(), legacy):
+        if k != legacy_key(a):
+            errores.append(f"orden distinto: {k} en el manifest, {legacy_key(a)} en to_legacy()")
+            break
+        with open(os.path.join(out_dir, entry["shard"]), "rb") as f:
+            if json.loads(f.read()) != a:
+                errores.append(f"el shard {entry['shard']} no es la asignatura {k} de to_legacy()")
+    return errores
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Trocea el catálogo por ciclo y módulo con un manifest de índices.")
+    ap.add_argument("ifc_json", nargs="?", default="ifc_catedu.json", help="Salida por ciclos del scraper")
+    ap.add_argument("--out", default=os.path.join("public", "catalogo"), help="Directorio de salida")
+    ap.add_argument("--check", action="store_true",
+                    help="Comprueba que los módulos del manifest son exactamente las asignaturas de to_legacy()")
+    args = ap.parse_args()
+
+    m = build_shards(iter_ciclos_json(args.ifc_json), args.out)
+    st = m["_stats"]
+    print(f"🧩 {len(m['ciclos'])} ciclos y {len(m['modulos'])} módulos en {args.out} "
+          f"(manifest {st['manifest_bytes'] / 1024:.1f} KB, {st['escritos']} ficheros nuevos, {st['borrados']} obsoletos borrados)")
+    if brotli is None:
+        print("ℹ️  Sin paquete brotli: sólo variantes .gz")
+    if args.check:
+        errores = check_manifest(m, args.out, iter_ciclos_json(args.ifc_json))
+        for e in errores:
+            print(f"❌ {e}")
+        if errores:
+            sys.exit(1)
+        print(f"✅ Los {len(m['modulos'])} módulos coinciden con to_legacy(), en el mismo orden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Índice vectorial local de las descripciones de CE para comparar actividades sin llamar a la API.
+
+Cada CE (los mismos que to_legacy(), sin duplicados) se convierte en un vector
+TF-IDF de n-gramas hasheados: palabras y trigramas/tetragramas/pentagramas de
+caracteres de cada palabra, sin acentos ni mayúsculas, repartidos en --dim
+posiciones con signo (hashing trick) y normalizados a norma 1. La matriz se guarda
+como .npy (float32, filas de un mismo módulo contiguas) que se abre con mmap, y al
+lado un .json con la IDF, el mapa fila -> (módulo, RA, CE) y el rango de filas de
+cada módulo (por la clave de to_legacy(), "<código>::<nombre en minúsculas>").
+
+Puntuar una actividad contra los CE de un módulo es un único producto matriz-vector
+con las filas de ese módulo (con NumPy si está instalado; si no, en Python puro
+sólo con las columnas que tiene la actividad). Es local, determinista y no necesita
+red. La puntuación es el coseno, entre -1 y 1: con el hashing con signo dos textos
+sin nada en común pueden dar un valor algo negativo por colisiones, que se lee como
+0 (match descarta lo que queda por debajo de --umbral, 0 por defecto). No está en la
+misma escala que los embeddings de lib/comparadorCE.ts, así que el umbral hay que
+calibrarlo aparte.
+
+    python scripts/catalog_vectors.py build ifc_catedu.json --out public/ce_vectores
+    python scripts/catalog_vectors.py match "Montaje de un equipo y prueba de la fuente" --modulo 0221 --top 5
+    python scripts/catalog_vectors.py match --desde actividades.txt --modulo 0221 --umbral 0.2 --json
+"""
+import argparse
+import contextlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scrape_catedu_ifc import Ciclo, LegacyBuilder, legacy_key
+
+try:
+    import numpy as np
+except ImportError:  # opcional: sin NumPy se puntúa en Python puro (más lento, mismo resultado)
+    np = None
+
+# 2: "modulos" por legacy_key() en lugar de por código
+INDEX_VERSION = 2
+DEFAULT_DIR = os.path.join("public", "ce_vectores")
+DEFAULT_DIM = 2048
+NGRAMAS = (3, 5)
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class Match:
+    modulo: str
+    ra: str
+    ce: str
+    texto: str
+    score: float
+
+
+# ================== Vectorización ==================
+def normaliza(texto: str) -> str:
+    """Minúsculas y sin diacríticos ("Evaluación" -> "evaluacion")."""
+    s = unicodedata.normalize("NFKD", (texto or "").lower())
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+
+def features(texto: str, ngramas: Tuple[int, int] = NGRAMAS) -> Counter:
+    """Palabras ("w:montaje") y n-gramas de caracteres de cada palabra con bordes ("<mon", "aje>")."""
+    out: Counter = Counter()
+    lo, hi = ngramas
+    for w in WORD_RE.findall(normaliza(texto)):
+        out["w:" + w] += 1
+        p = f"<{w}>"
+        for n in range(lo, hi + 1):
+            for i in range(len(p) - n + 1):
+                out[p[i:i + n]] += 1
+    return out
+
+
+def hashed(texto: str, dim: int, ngramas: Tuple[int, int] = NGRAMAS) -> Dict[int, float]:
+    """Columna -> 1 + log(tf) con signo. crc32 y no hash(): tiene que dar lo mismo en cada proceso."""
+    v: Dict[int, float] = {}
+    for f, tf in features(texto, ngramas).items():
+        h = zlib.crc32(f.encode("utf-8"))
+        col = h % dim
+        v[col] = v.get(col, 0.0) + (1.0 + math.log(tf)) * (1.0 if h & 0x80000000 else -1.0)
+    return {c: x for c, x in v.items() if x}
+
+
+def tfidf(v: Dict[int, float], idf: Sequence[float]) -> Dict[int, float]:
+    """Pondera por IDF y normaliza a norma 1."""
+    w = {c: x * idf[c] for c, x in v.items()}
+    norma = math.sqrt(sum(x * x for x in w.values()))
+    return {c: x / norma for c, x in w.items()} if norma else {}
+
+
+def compute_idf(docs: List[Dict[int, float]], dim: int) -> List[float]:
+    """IDF suavizada por columna: ln((1 + N) / (1 + df)) + 1."""
+    df = [0] * dim
+    for v in docs:
+        for c in v:
+            df[c] += 1
+    n = len(docs)
+    return [math.log((1 + n) / (1 + d)) + 1.0 for d in df]
+
+
+# ================== Fichero .npy ==================
+# Formato 1.0 de NumPy escrito a mano: así el índice se construye igual con o sin NumPy
+# y np.load(..., mmap_mode="r") lo abre sin copiarlo.
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def write_npy(path: str, rows: Iterable[Dict[int, float]], n: int, dim: int) -> None:
+    header = f"{{'descr': '<f4', 'fortran_order': False, 'shape': ({n}, {dim}), }}"
+    # cabecera rellena con espacios hasta múltiplo de 64, terminada en \n
+    pad = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + " " * pad + "\n").encode("latin1")
+    with open(path, "wb") as f:
+        f.write(NPY_MAGIC + struct.pack("<H", len(header)) + header)
+        for v in rows:
+            fila = array("f", bytes(4 * dim))
+            for c, x in v.items():
+                fila[c] = x
+            if sys.byteorder != "little":
+                fila.byteswap()
+            f.write(fila.tobytes())
+
+
+def npy_offset(buf) -> int:
+    if bytes(buf[:8]) != NPY_MAGIC:
+        raise ValueError("No es un .npy versión 1.0")
+    return 10 + struct.unpack("<H", bytes(buf[8:10]))[0]
+
+
+# ================== Construcción ==================
+def build_index(ciclos: Iterable[Ciclo], out_dir: str, dim: int = DEFAULT_DIM) -> Dict[str, int]:
+    """Escribe ce_vectores.npy y ce_vectores.json en out_dir (ficheros temporales y os.replace)."""
+    builder = LegacyBuilder()
+    for c in ciclos:
+        for m in c.modulos:
+            builder.add(m)
+
+    filas: List[List[str]] = []
+    modulos: Dict[str, List[int]] = {}
+    # por código: las variantes de un mismo código (otro nombre) quedan contiguas
+    for a in sorted(builder.result(), key=lambda a: a["id"]):
+        ini = len(filas)
+        filas += [[a["id"], ra["codigo"], ce["codigo"], ce["descripcion"]] for ra in a["RA"] for ce in ra["CE"]]
+        if len(filas) > ini:
+            modulos[legacy_key(a)] = [ini, len(filas)]
+
+    docs = [hashed(f[3], dim) for f in filas]
+    # redondeada como queda en el .json, para que build y match ponderen igual
+    idf = [round(x, 6) for x in compute_idf(docs, dim)]
+
+    os.makedirs(out_dir, exist_ok=True)
+    npy = os.path.join(out_dir, "ce_vectores.npy")
+    meta = os.path.join(out_dir, "ce_vectores.json")
+    write_npy(npy + ".tmp", (tfidf(v, idf) for v in docs), len(filas), dim)
+    with open(meta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "version": INDEX_VERSION,
+            "dim": dim,
+            "ngramas": list(NGRAMAS),
+            "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "idf": idf,
+            "modulos": modulos,
+            "filas": filas,
+        }, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(npy + ".tmp", npy)
+    os.replace(meta + ".tmp", meta)
+    return {"modulos": len(modulos), "ce": len(filas), "dim": dim, "bytes": os.path.getsize(npy)}
+
+
+# ================== Consulta ==================
+class CEIndex:
+    """Índice abierto: la matriz en mmap (sólo se leen las filas del módulo consultado)."""
+
+    def __init__(self, out_dir: str = DEFAULT_DIR):
+        with open(os.path.join(out_dir, "ce_vectores.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Índice '{out_dir}' de otra versión: reconstrúyelo con 'build'")
+        self.dim: int = meta["dim"]
+        self.ngramas = tuple(meta["ngramas"])
+        self.idf: List[float] = meta["idf"]
+        self.modulos: Dict[str, List[int]] = meta["modulos"]
+        self.filas: List[List[str]] = meta["filas"]
+        # código -> filas de todas sus variantes (contiguas: build ordena por código)
+        self.por_codigo: Dict[str, List[int]] = {}
+        for k, (ini, fin) in self.modulos.items():
+            r = self.por_codigo.setdefault(k.split("::", 1)[0], [ini, fin])
+            r[0], r[1] = min(r[0], ini), max(r[1], fin)
+        path = os.path.join(out_dir, "ce_vectores.npy")
+        if np is not None:
+            self.matriz = np.load(path, mmap_mode="r")
+        else:
+            with open(path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            datos = memoryview(self._mm)[npy_offset(self._mm):]
+            if sys.byteorder == "little":
+                self.matriz = datos.cast("f")
+            else:
+                self.matriz = array("f", datos)
+                self.matriz.byteswap()
+        n = self.matriz.shape[0] if np is not None else len(self.matriz) // self.dim
+        if n != len(self.filas):
+            raise ValueError(f"'{path}' no corresponde a su ce_vectores.json")
+
+    def vector(self, texto: str) -> Dict[int, float]:
+        return tfidf(hashed(texto, self.dim, self.ngramas), self.idf)
+
+    def rango(self, modulo: Optional[str]) -> Tuple[int, int]:
+        """Filas de un módulo: por código (todas sus variantes) o por clave "<código>::<nombre>"."""
+        if modulo is None:
+            return 0, len(self.filas)
+        r = self.modulos.get(modulo.lower()) if "::" in modulo else self.por_codigo.get(modulo)
+        if r is None:
+            raise KeyError(f"Módulo {modulo} sin CE en el índice")
+        ini, fin = r
+        return ini, fin
+
+    def scores(self, textos: Sequence[str], modulo: Optional[str] = None) -> List[List[float]]:
+        """Coseno (-1..1) de cada texto con cada CE del módulo (o de todo el índice), en orden de fila."""
+        ini, fin = self.rango(modulo)
+        vs = [self.vector(t) for t in textos]
+        if np is not None:
+            q = np.zeros((self.dim, len(vs)), dtype=np.float32)
+            for j, v in enumerate(vs):
+                if v:
+                    q[list(v), j] = list(v.values())
+            return (self.matriz[ini:fin] @ q).T.tolist()
+        # sin NumPy: sólo las columnas no nulas de cada actividad
+        m, dim = self.matriz, self.dim
+        return [[sum(m[i * dim + c] * x for c, x in v.items()) for i in range(ini, fin)] for v in vs]
+
+    def match(self, textos: Sequence[str], modulo: Optional[str] = None, top: Optional[int] = None,
+              umbral: float = 0.0) -> List[List[Match]]:
+        """Por cada texto, los CE con score >= umbral de mayor a menor (los `top` primeros)."""
+        ini, _ = self.rango(modulo)
+        out = []
+        for fila in self.scores(textos, modulo):
+            hits = sorted(((s, ini + k) for k, s in enumerate(fila) if s >= umbral), key=lambda x: (-x[0], x[1]))
+            out.append([Match(*self.filas[i], score=round(s, 4)) for s, i in hits[:top]])
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índice vectorial local de CE: construcción y comparación de actividades.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Construye el índice desde ifc_catedu.json")
+    b.add_argument("ifc_json", nargs="?", default="ifc_catedu.json")
+    b.add_argument("--out", default=DEFAULT_DIR)
+    b.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Columnas del hashing trick")
+    q = sub.add_parser("match", help="Ordena los CE de un módulo por parecido con una o varias actividades")
+    q.add_argument("texto", nargs="?", default=None)
+    q.add_argument("--desde", default=None, metavar="FICHERO", help="Una actividad por línea ('-' = stdin)")
+    q.add_argument("--dir", default=DEFAULT_DIR)
+    q.add_argument("--modulo", default=None,
+                   help="Sólo los CE de este módulo: código (p. ej. 0221) o \"<código>::<nombre>\" si hay varios")
+    q.add_argument("--top", type=int, default=10)
+    q.add_argument("--umbral", type=float, default=0.0)
+    q.add_argument("--json", action="store_true", help="Salida JSON")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        from catalog_shards import iter_ciclos_json
+        t0 = time.perf_counter()
+        st = build_index(iter_ciclos_json(args.ifc_json), args.out, args.dim)
+        print(f"🧮 Índice {args.out}: {st['modulos']} módulos, {st['ce']} CE x {st['dim']} "
+              f"({st['bytes'] / 1e6:.1f} MB) en {(time.perf_counter() - t0) * 1000:.0f} ms")
+        return
+
+    if args.desde:
+        # '-': stdin no es nuestro, no se cierra al salir del with
+        fuente = contextlib.nullcontext(sys.stdin) if args.desde == "-" else open(args.desde, "r", encoding="utf-8")
+        with fuente as f:
+            textos = [l.strip() for l in f if l.strip()]
+    elif args.texto:
+        textos = [args.texto]
+    else:
+        ap.error("match necesita un texto o --desde")
+    try:
+        idx = CEIndex(args.dir)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo abrir el índice '{args.dir}': {e}")
+        sys.exit(2)
+    t0 = time.perf_counter()
+    try:
+        res = idx.match(textos, args.modulo, args.top, args.umbral)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(2)
+    ms = (time.perf_counter() - t0) * 1000
+
+    if args.json:
+        print(json.dumps([{"actividad": t, "ce": [asdict(m) for m in hits]} for t, hits in zip(textos, res)],
+                         ensure_ascii=False, indent=2))
+        return
+    motor = "NumPy" if np is not None else "Python"
+    print(f"🧮 {len(textos)} actividades en {ms:.2f} ms ({ms / len(textos):.3f} ms/actividad, {motor})\n")
+    for t, hits in zip(textos, res):
+        print(f"  {t[:90]}")
+        for m in hits:
+            print(f"     {m.score:.3f}  {m.modulo} · {m.ce}  {m.texto[:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Páginas HTML de CATEDU para benchmarks y pruebas offline.
+
+    python scripts/catedu_fixtures.py record           # graba en scripts/fixtures/catedu las páginas reales
+    python scripts/catedu_fixtures.py build            # regenera las sintéticas de scripts/fixtures/catedu/sintetico
+
+El juego por defecto son las páginas reales: `record` copia desde .cache/catedu (la
+caché de `scrape_catedu_ifc.py --cache`) las URLs del juego sintético que ya se hayan
+descargado alguna vez, con "origen": "grabada" en index.json.
+
+`build` renderiza familia/ciclo/módulo desde ifc_catedu.json con la estructura que
+espera el scraper (mismas URLs, cabecera "Resultados de aprendizaje y criterios de
+evaluación", viñetas a)/b)/...), marcadas con "origen": "sintetico". Sólo sirven para
+los casos límite (módulo sin código, compartido entre ciclos, el más largo...) y como
+sustituto, con aviso, mientras no haya páginas grabadas.
+"""
+import argparse
+import html
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+# páginas reales grabadas (juego por defecto) y renderizadas desde ifc_catedu.json
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "catedu")
+SINTETICO_DIR = os.path.join(FIXTURES_DIR, "sintetico")
+# la misma que CACHE_DIR de scrape_catedu_ifc
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "catedu")
+BASE = "https://centrosdocentes.catedu.es"
+
+# Casos límite del juego sintético: el módulo más largo y el más corto, uno sin código,
+# módulos compartidos entre ciclos y uno de cada ciclo IFC (también son las URLs que graba `record`)
+SAMPLE_MODULOS = (
+    "0223", "1664", "0156", "A997", "0221", "0485", "0488",
+    "0373", "0375", "0369", "0613", "0612", "1709", "0490",
+)
+
+NIVEL_TITULOS = {"1": "Ciclos Formativos de Grado Básico", "2": "Ciclos Formativos de Grado Medio",
+                 "3": "Ciclos Formativos de Grado Superior", "5": "Cursos de Especialización"}
+
+
+def familia_path(familia: str) -> str:
+    return f"/awc/public/pages/familias/ciclos.php?familia={familia}"
+
+
+def ciclo_path(codigo: str) -> str:
+    return f"/awc/public/pages/familias/info_ciclo.php?codciclo={codigo}"
+
+
+def modulo_cod(m: Dict[str, Any]) -> str:
+    # Tutorías y optativas no traen código numérico en el título de la página
+    return m["codigo"] or "".join(ch for ch in m["nombre"].split(".")[0] if ch.isdigit()) or "999"
+
+
+def modulo_path(m: Dict[str, Any], ciclo_codigo: str) -> str:
+    return f"/awc/modulo.php?cod={modulo_cod(m)}&ciclo={ciclo_codigo}"
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!DOCTYPE html><html lang='es'><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)} - CATEDU</title>"
+        "<link rel='stylesheet' href='/awc/css/estilo.css'><script>window.dataLayer=[];</script></head>"
+        "<body><div id='cabecera'><ul class='menu'><li><a href='/'>Inicio</a></li>"
+        "<li><a href='/awc/public/pages/familias/'>Familias profesionales</a></li>"
+        "<li><a href='/awc/centros.php'>Centros</a></li></ul></div>"
+        f"<div id='contenido'>{body}</div>"
+        "<div id='pie'><p>Gobierno de Aragón · Departamento de Educación</p></div></body></html>"
+    )
+
+
+def render_familia(familia: str, ciclos: List[Dict[str, Any]]) -> str:
+    out = [f"<h1>Familia profesional {html.escape(familia)}</h1>"]
+    por_nivel: Dict[str, List[Dict[str, Any]]] = {}
+    for c in ciclos:
+        por_nivel.setdefault(c["codigo"][3:4], []).append(c)
+    for digito in sorted(por_nivel):
+        out.append(f"<section class='nivel'><h3>{NIVEL_TITULOS.get(digito, 'Otros')}</h3><ul>")
+        for c in por_nivel[digito]:
+            out.append(f"<li><a href='info_ciclo.php?codciclo={c['codigo']}'>"
+                       f"{c['codigo']} - {html.escape(c['ciclo'])}</a></li>")
+        out.append("</ul></section>")
+    return _page(f"Familia {familia}", "".join(out))
+
+
+def render_ciclo(ciclo: Dict[str, Any]) -> str:
+    out = [f"<h2>{html.escape(ciclo['ciclo'])}</h2>"]
+    curso = None
+    for m in ciclo["modulos"]:
+        if m.get("curso") != curso:
+            if curso is not None:
+                out.append("</ul>")
+            curso = m.get("curso")
+            out.append(f"<h3>{curso} Curso</h3><ul class='modulos'>")
+        href = html.escape(modulo_path(m, ciclo["codigo"]))
+        out.append(f"<li><a href='{href}'>{html.escape(m['nombre'])}</a> "
+                   f"<span>{m.get('horas_semanales') or 0}</span> <span>{m.get('horas_totales') or 0}</span></li>")
+    out.append("</ul>")
+    return _page(ciclo["ciclo"], "".join(out))
+
+
+def _etiqueta(i: int) -> str:
+    letras = "abcdefghijklmnñopqrstuvwxyz"
+    return letras[i] if i < len(letras) else str(i + 1)
+
+
+def render_modulo(m: Dict[str, Any]) -> str:
+    # sin código numérico el título es el nombre tal cual ("A997. Tutoría I")
+    titulo = f"{m['codigo']}. {m['nombre']}" if m["codigo"] else m["nombre"]
+    out = [f"<h1>{html.escape(titulo)}</h1><div class='datos'>"]
+    if m.get("horas_totales") is not None:
+        out.append(f"<p>Duración Total: {m['horas_totales']} horas</p>")
+    if m.get("horas_semanales") is not None:
+        out.append(f"<p>{m['horas_semanales']} hora/semana en {m.get('curso') or ''}</p>")
+    if m.get("creditos"):
+        out.append(f"<p>{m['creditos']} Créditos ECTS</p>")
+    out.append("</div><div class='ra-ce'><h3>Resultados de aprendizaje y criterios de evaluación</h3>")
+    for r in m.get("RA", []):
+        out.append(f"<div class='ra'><p><strong>{r['codigo']}.</strong> {html.escape(r['descripcion'])}</p><ul>")
+        for i, ce in enumerate(r.get("CE", [])):
+            out.append(f"<li>{_etiqueta(i)}) {html.escape(ce['descripcion'])}</li>")
+        out.append("</ul></div>")
+    out.append("</div>")
+    return _page(titulo, "".join(out))
+
+
+def build(ifc_json: str, out_dir: str = SINTETICO_DIR, sample=SAMPLE_MODULOS) -> List[Dict[str, Any]]:
+    with open(ifc_json, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    os.makedirs(out_dir, exist_ok=True)
+    index: List[Dict[str, Any]] = []
+
+    def write(name: str, body: str, entry: Dict[str, Any]) -> None:
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            f.write(body)
+        index.append(dict(entry, file=name, origen="sintetico"))
+
+    write("familia_IFC.html", render_familia("IFC", data),
+          {"kind": "familia", "url": BASE + familia_path("IFC")})
+    vistos = set()
+    for c in data:
+        write(f"ciclo_{c['codigo']}.html", render_ciclo(c), {"kind": "ciclo", "url": BASE + ciclo_path(c["codigo"])})
+        for m in c["modulos"]:
+            cod = m["codigo"] or m["nombre"].split(".")[0]
+            if cod not in sample or cod in vistos:
+                continue
+            vistos.add(cod)
+            write(f"modulo_{cod}.html", render_modulo(m), {
+                "kind": "modulo", "url": BASE + modulo_path(m, c["codigo"]),
+                "ciclo_codigo": c["codigo"], "ciclo_nombre": c["ciclo"], "curso": m.get("curso"),
+            })
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return index
+
+
+def default_fixtures_dir() -> str:
+    """Las páginas grabadas si las hay; si no, las sintéticas (avisando por stderr)."""
+    if os.path.exists(os.path.join(FIXTURES_DIR, "index.json")):
+        return FIXTURES_DIR
+    print(f"⚠️  Sin páginas grabadas en {FIXTURES_DIR} (catedu_fixtures.py record): "
+          f"se usan las sintéticas de {SINTETICO_DIR}", file=sys.stderr)
+    return SINTETICO_DIR
+
+
+def load_index(fixtures_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Entradas de index.json con el HTML ya leído en la clave "html" (None = default_fixtures_dir())."""
+    fixtures_dir = fixtures_dir or default_fixtures_dir()
+    with open(os.path.join(fixtures_dir, "index.json"), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    for e in index:
+        with open(os.path.join(fixtures_dir, e["file"]), "r", encoding="utf-8") as f:
+            e["html"] = f.read()
+    return index
+
+
+def record(cache_dir: str, fixtures_dir: str = FIXTURES_DIR, urls_dir: str = SINTETICO_DIR) -> int:
+    """Graba en `fixtures_dir` las URLs del juego de `urls_dir` que estén en la caché HTTP.
+
+    Las que no se han descargado nunca se quedan fuera: no se rellenan con las sintéticas.
+    """
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    from http_cache import DiskCache
+
+    cache = DiskCache(cache_dir)
+    index: List[Dict[str, Any]] = []
+    for e in load_index(urls_dir):
+        meta: Optional[Dict[str, Any]] = cache.get(e["url"])
+        if meta is None:
+            continue
+        encoding = get_encoding_from_headers(CaseInsensitiveDict(meta.get("headers") or {})) or "utf-8"
+        os.makedirs(fixtures_dir, exist_ok=True)
+        with open(os.path.join(fixtures_dir, e["file"]), "w", encoding="utf-8") as f:
+            f.write(cache.body(meta).decode(encoding, errors="replace"))
+        index.append({k: v for k, v in e.items() if k != "html"} | {"origen": "grabada"})
+    if index:
+        with open(os.path.join(fixtures_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+    return len(index)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Genera o graba las páginas HTML de prueba de CATEDU.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Reconstruye las páginas sintéticas desde ifc_catedu.json")
+    b.add_argument("ifc_json", nargs="?", default="ifc_catedu.json")
+    b.add_argument("--out", default=SINTETICO_DIR)
+    r = sub.add_parser("record", help="Copia las páginas reales desde la caché HTTP en disco")
+    r.add_argument("--cache-dir", default=CACHE_DIR)
+    r.add_argument("--out", default=FIXTURES_DIR)
+    r.add_argument("--urls", default=SINTETICO_DIR, help="Juego del que se toman las URLs a grabar")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        index = build(args.ifc_json, args.out)
+        print(f"✅ {len(index)} páginas en {args.out}")
+    else:
+        n = record(args.cache_dir, args.out, args.urls)
+        if not n:
+            print(f"❌ Ninguna página de {args.urls} está en la caché {args.cache_dir} "
+                  f"(descárgalas antes con scrape_catedu_ifc.py --cache)")
+            raise SystemExit(1)
+        print(f"✅ {n} páginas grabadas desde {args.cache_dir} en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Comprueba que las salidas del modo --ndjson son idénticas a las del modo en memoria.
+
+Sirve con mock_catedu.py el catálogo de ifc_catedu.json más un ciclo sin módulos y
+lo recorre con cada modo de crawl (secuencial, concurrente y frontier de familias),
+una vez acumulando los Ciclo en memoria y otra escribiendo el NDJSON con NdjsonSink.
+ifc_catedu.json, asignaturas_FP.json y la salida parcial de --shard tienen que salir
+byte a byte iguales, y el ciclo vacío tiene que estar en las dos.
+
+    python scripts/check_ndjson_ciclos.py
+    python scripts/check_ndjson_ciclos.py --concurrency 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import mock_catedu
+import scrape_catedu_ifc as scraper
+from crawl_frontier import Frontier
+
+IFC_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ifc_catedu.json")
+VACIO = "IFC399"
+
+
+def catalogo_con_vacio(ifc_json: str) -> Dict[str, List[Dict[str, Any]]]:
+    """El catálogo IFC con un ciclo sin módulos en medio (no el primero ni el último)."""
+    catalogo = mock_catedu.catalogo_ifc(ifc_json)
+    ciclos = catalogo["IFC"]
+    vacio = dict(ciclos[0], ciclo="Ciclo sin módulos publicados", codigo=VACIO, modulos=[])
+    ciclos.insert(len(ciclos) // 2 or 1, vacio)
+    return catalogo
+
+
+def salidas_memoria(ciclos: List[scraper.Ciclo]) -> Tuple[str, str, str]:
+    ifc = json.dumps(scraper.ciclos_to_json(ciclos), ensure_ascii=False, indent=2)
+    legacy = json.dumps(scraper.to_legacy(ciclos), ensure_ascii=False, indent=2)
+    shard = json.dumps(list(scraper.ciclos_shard_json(ciclos)), ensure_ascii=False)
+    return ifc, legacy, shard
+
+
+def salidas_ndjson(sink: scraper.NdjsonSink, tmp: str) -> Tuple[str, str, str]:
+    ifc_path, legacy_path = os.path.join(tmp, "ifc.json"), os.path.join(tmp, "legacy.json")
+    scraper.write_ifc_from_ndjson(sink.path, ifc_path)
+    scraper.write_legacy_from_ndjson(sink.path, sink.legacy, legacy_path)
+    with open(ifc_path, encoding="utf-8") as a, open(legacy_path, encoding="utf-8") as b:
+        ifc, legacy = a.read(), b.read()
+    shard = json.dumps(list(scraper.ciclos_shard_ndjson(sink.path)), ensure_ascii=False)
+    return ifc, legacy, shard
+
+
+def modos(concurrency: int, tmp: str) -> List[Tuple[str, Callable[[Optional[scraper.ModuloSink]], List[scraper.Ciclo]]]]:
+    def frontier(conc: int):
+        def crawl(sink):
+            f = Frontier(os.path.join(tmp, f"frontier-{conc}-{sink is not None}.sqlite"))
+            try:
+                return scraper.crawl_familias(f, ["IFC"], concurrency=conc, sink=sink)
+            finally:
+                f.close()
+        return crawl
+
+    return [
+        ("secuencial", lambda sink: scraper.scrape_ifc(sink=sink)),
+        (f"concurrente x{concurrency}", lambda sink: scraper.scrape_ifc(concurrency=concurrency, sink=sink)),
+        ("frontier", frontier(1)),
+        (f"frontier x{concurrency}", frontier(concurrency)),
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Salidas de --ndjson frente al modo en memoria, con un ciclo vacío.")
+    ap.add_argument("--ifc-json", default=IFC_JSON)
+    ap.add_argument("--concurrency", type=int, default=4)
+    args = ap.parse_args()
+
+    catalogo = catalogo_con_vacio(args.ifc_json)
+    scraper.SLEEP = (0.0, 0.0)
+    scraper.RATE = 1000.0
+    fallos: List[str] = []
+    with mock_catedu.MockCatedu(mock_catedu.render_paginas(catalogo)) as mock, \
+            tempfile.TemporaryDirectory() as tmp:
+        scraper.BASE = mock.base_url
+        scraper.FAMILIA_URL = scraper.familia_url("IFC")
+        for nombre, crawl in modos(args.concurrency, tmp):
+            # el log por módulo del scraper sólo estorbaría
+            with contextlib.redirect_stdout(io.StringIO()):
+                memoria = salidas_memoria(crawl(None))
+                sink = scraper.NdjsonSink(os.path.join(tmp, "modulos.ndjson"))
+                crawl(sink)
+                sink.close()
+                ndjson = salidas_ndjson(sink, tmp)
+            distintas = [s for s, a, b in zip(("ifc_catedu.json", "asignaturas_FP.json", "shard"), memoria, ndjson)
+                         if a != b]
+            con_vacio = all(f'"codigo": "{VACIO}"' in ifc for ifc in (memoria[0], ndjson[0]))
+            ok = not distintas and con_vacio
+            print(f"{'✅' if ok else '❌'} {nombre}: "
+                  f"{'idénticas' if not distintas else 'distintas: ' + ', '.join(distintas)}"
+                  f"{'' if con_vacio else f' (falta el ciclo vacío {VACIO})'}")
+            if not ok:
+                fallos.append(nombre)
+
+    if fallos:
+        print(f"\n❌ El modo --ndjson no reproduce la salida en memoria: {', '.join(fallos)}")
+        sys.exit(1)
+    print("\n✅ --ndjson y el modo en memoria dan los mismos bytes, ciclos vacíos incluidos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Comprueba el extractor lineal de RA/CE de scrape_catedu_ifc contra los patrones regex anteriores.
+
+Tres pruebas, todas sin red:
+
+  corpus    cada bloque de texto de las páginas de módulo grabadas (scripts/fixtures/catedu,
+            o las sintéticas de sintetico/ si no hay grabadas)
+            y cada descripción de RA/CE de ifc_catedu.json, tal cual y montada como cabecera
+            «RA1. … a) … b) …»: ra_headers/match_ce/clean_ra_desc tienen que dar exactamente
+            lo mismo que RE_RA.finditer/RE_CE.match/clean_ra_desc con regex.
+  fuzz      textos aleatorios (con semilla) hechos de las piezas que deciden los casos
+            límite: etiquetas, paréntesis, espacios raros, ı/İ/ſ, dígitos no ASCII, «0488.»,
+            «créditos ECTS»…
+  peor caso entradas que hacen cuadráticos a los patrones antiguos; el extractor nuevo tiene
+            que crecer linealmente (exponente entre n/16 y n por debajo de --max-exp) y
+            quedar por debajo de --max-ms en la entrada más grande.
+
+    python scripts/check_ra_ce_extractor.py
+    python scripts/check_ra_ce_extractor.py --fuzz 20000 --seed 7 --size 200000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import scrape_catedu_ifc as scraper
+from catedu_fixtures import load_index
+
+IFC_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ifc_catedu.json")
+
+
+# ================== Referencia: los patrones anteriores ==================
+RE_RA = re.compile(r"\(?\bRA\s*0*([1-9]\d*)\b\)?(?:\s*[:.\-–])?", re.I)
+RE_CE = re.compile(
+    r"^[\-•]?\s*((?:[a-zñ]|\d+))\)\s*(.+?)(?=\s(?:[a-zñ]|\d+)\)\s+|$)",
+    re.I | re.S
+)
+
+def clean_ra_desc_regex(desc: str) -> str:
+    s = re.sub(r"\s+", " ", (desc or "").strip())
+    s = re.sub(r".*?resultados\s+de\s+aprendizaje.*?criterios\s+de\s+evaluación\s*", "", s, flags=re.I)
+    s = re.split(r"\s(?:[a-zñ]|\d+)\)\s+", s, maxsplit=1, flags=re.I)[0]
+    s = re.sub(r"\b(0488\.)?\s*desarrollo de interfaces\b.*?créditos?\s*ects\b", "", s, flags=re.I)
+    return s.strip(" .-–—:")
+
+
+# (nombre, nuevo, referencia): las dos funciones reciben el mismo texto
+CHECKS: List[Tuple[str, Callable[[str], Any], Callable[[str], Any]]] = [
+    ("ra_headers", lambda t: list(scraper.ra_headers(t)),
+     lambda t: [(m.start(), m.end(), int(m.group(1))) for m in RE_RA.finditer(t)]),
+    ("strip_ra_headers", scraper.strip_ra_headers, lambda t: RE_RA.sub("", t)),
+    ("match_ce", scraper.match_ce, lambda t: (lambda m: m.groups() if m else None)(RE_CE.match(t))),
+    ("clean_ra_desc", scraper.clean_ra_desc, clean_ra_desc_regex),
+]
+
+
+def compare(textos: Iterator[str]) -> Tuple[int, List[Tuple[str, str, Any, Any]]]:
+    n, fallos = 0, []
+    for t in textos:
+        n += 1
+        for name, nuevo, ref in CHECKS:
+            a, b = nuevo(t), ref(t)
+            if a != b:
+                fallos.append((name, t, a, b))
+    return n, fallos
+
+
+# ================== Corpus ==================
+def corpus_fixtures(fixtures_dir: Optional[str] = None) -> Iterator[str]:
+    for e in load_index(fixtures_dir):
+        if e["kind"] != "modulo":
+            continue
+        soup = scraper.make_soup(e["html"], scraper.MODULO_STRAINER)
+        blocks, strings = scraper.block_texts(soup)
+        yield from (t for _, t in blocks)
+        yield from strings
+        yield "\n".join(strings)
+
+
+LETRAS = "abcdefghijklmnñopqrstuvwxyz"
+
+def corpus_ifc(ifc_json: str) -> Iterator[str]:
+    with open(ifc_json, "r", encoding="utf-8") as f:
+        ciclos = json.load(f)
+    for c in ciclos:
+        for m in c["modulos"]:
+            for ra in m.get("RA") or []:
+                yield ra["descripcion"]
+                ces = [f"{LETRAS[i % len(LETRAS)] if i < 2 * len(LETRAS) else i + 1}) {ce['descripcion']}"
+                       for i, ce in enumerate(ra.get("CE") or [])]
+                yield from ces
+                yield f"{ra['codigo']}. {ra['descripcion']} " + " ".join(ces)
+                yield (f"{m['codigo']}. Desarrollo de interfaces 6 créditos ECTS Resultados de aprendizaje y "
+                       f"criterios de evaluación ({ra['codigo']}): {ra['descripcion']}\n" + "\n".join(ces))
+
+
+# ================== Fuzz ==================
+PIEZAS = [
+    "RA", "ra", "Ra", "RA ", "(", ")", "(RA", "RA0", "0", "00", "1", "7", "12", "٣", "²", "_",
+    " ", "  ", "\n", "\t", " ", " ", "\x1c",
+    "a", "b", "z", "ñ", "Ñ", "K", "K", "İ", "ı", "ſ", "x", "é",
+    "a)", "ñ)", "12)", " a) ", " 3) ", "-", "•", ":", ".", "–", "—",
+    "resultados", "Resultados de aprendizaje", "resultados  de\naprendizaje", "reſultados de aprendizaje",
+    "criterios de evaluación", "Criterios de Evaluación ", "CRITERIOS DE EVALUACIÓN",
+    "0488.", "0488", "desarrollo de interfaces", "Desarrollo de Interfaces", "interfaces",
+    "créditos", "crédito", "CRÉDITOS", "ects", "ECTS", "ectsx",
+]
+
+def fuzz_textos(n: int, seed: int, max_piezas: int = 24) -> Iterator[str]:
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield "".join(rng.choice(PIEZAS) for _ in range(rng.randint(0, max_piezas)))
+
+
+# ================== Peor caso ==================
+def adversarios(size: int) -> List[Tuple[str, str]]:
+    """(nombre, texto de unos `size` caracteres) que hacen retroceder a los patrones antiguos."""
+    def rep(s: str) -> str:
+        return (s * (size // len(s) + 1))[:size]
+    return [
+        ("resultados sin criterios", rep("resultados de aprendizaje ")),
+        ("interfaces sin ECTS", rep("desarrollo de interfaces ")),
+        ("créditos sin ects", "desarrollo de interfaces " + rep("créditos ")),
+        ("viñetas sin espacio", "a) " + rep("1)x ")),
+        ("dígitos y paréntesis", "a) " + rep(" 1111111111x)")),
+        ("RA sin número", rep("RA 0000 ")),
+        ("espacios", "a) x" + " " * size),
+    ]
+
+# Los patrones antiguos llegan a ser cúbicos («resultados sin criterios»: ~20 s con 4000
+# caracteres), así que con --regex se miden sólo con entradas de este tamaño
+REGEX_SIZE = 2000
+
+def tiempo(fn: Callable[[], Any], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def peor_caso(size: int, max_exp: float, max_ms: float, con_regex: bool) -> List[str]:
+    """Mide cada función con entradas de size/16 y size caracteres.
+
+    El exponente log(t_grande / t_pequeño) / log(16) vale ~1 si el coste es lineal y
+    ~2 si es cuadrático; con un salto de 16x el ruido de una medida suelta pesa poco.
+    """
+    fallos = []
+    print(f"{'entrada':<26} {'función':<16} {'n/16 ms':>9} {'n ms':>9} {'exp.':>5}" + (f" {f'regex {REGEX_SIZE} ms':>14}" if con_regex else ""))
+    for (name, corto), (_, largo), (_, mini) in zip(adversarios(size // 16), adversarios(size), adversarios(REGEX_SIZE)):
+        for fname, nuevo, ref in CHECKS:
+            a = tiempo(lambda: nuevo(corto)) * 1000
+            b = tiempo(lambda: nuevo(largo)) * 1000
+            exp = math.log(b / a, 16) if a and b else 0.0
+            extra = ""
+            if con_regex:
+                extra = f" {tiempo(lambda: ref(mini), 1) * 1000:>14.1f}"
+            print(f"{name:<26} {fname:<16} {a:>9.2f} {b:>9.2f} {exp:>5.2f}{extra}")
+            # por debajo de 1 ms el ruido domina la proporción
+            if b > 1.0 and exp > max_exp:
+                fallos.append(f"{fname} no es lineal en «{name}» (exponente {exp:.2f})")
+            if b > max_ms:
+                fallos.append(f"{fname} tarda {b:.0f} ms en «{name}» ({size} caracteres)")
+    return fallos
+
+
+def muestra(t: str, limite: int = 160) -> str:
+    return repr(t if len(t) <= limite else t[:limite] + "…")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Equivalencia y coste lineal del extractor de RA/CE.")
+    ap.add_argument("--fixtures", default=None, help="Por defecto las páginas grabadas")
+    ap.add_argument("--ifc-json", default=IFC_JSON)
+    ap.add_argument("--fuzz", type=int, default=5000, help="Textos aleatorios a comparar")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--size", type=int, default=100_000, help="Caracteres de la entrada adversaria más grande")
+    ap.add_argument("--max-exp", type=float, default=1.5,
+                    help="Máximo exponente de crecimiento admitido (lineal ~1, algo más por caché; cuadrático ~2)")
+    ap.add_argument("--max-ms", type=float, default=500.0, help="Máximo por llamada en la entrada más grande")
+    ap.add_argument("--regex", action="store_true", help=f"Mide también los patrones antiguos con {REGEX_SIZE} caracteres (tarda: no son lineales)")
+    args = ap.parse_args()
+
+    errores: List[str] = []
+    for name, textos in (("corpus fixtures", corpus_fixtures(args.fixtures)),
+                         ("corpus ifc_catedu.json", corpus_ifc(args.ifc_json)),
+                         (f"fuzz (seed={args.seed})", fuzz_textos(args.fuzz, args.seed))):
+        n, fallos = compare(textos)
+        print(f"{'✅' if not fallos else '❌'} {name}: {n} textos, {len(fallos)} diferencias")
+        for fname, t, a, b in fallos[:5]:
+            print(f"   {fname}({muestra(t)})\n      nuevo: {a!r}\n      regex: {b!r}")
+        errores += [f"{name}: {len(fallos)} diferencias"] if fallos else []
+
+    print()
+    errores += peor_caso(args.size, args.max_exp, args.max_ms, args.regex)
+
+    if errores:
+        print("\n❌ " + "\n❌ ".join(errores))
+        sys.exit(1)
+    print("\n✅ El extractor coincide con los patrones anteriores y crece linealmente")
+
+
+if __name__ == "__main__":
+    main()
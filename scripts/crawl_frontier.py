@@ -0,0 +1,101 @@
+"""Cola de trabajo persistente (SQLite) para el crawl de todas las familias.
+
+Cada URL descubierta (familia -> ciclo -> módulo) es una fila con su estado.
+Marcar una fila como hecha, guardar su resultado y encolar sus hijos ocurre en
+la misma transacción, así que un proceso matado a mitad se reanuda justo donde
+se quedó y los módulos terminados nunca se vuelven a descargar.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,     -- orden de descubrimiento
+    kind TEXT NOT NULL,                       -- familia | ciclo | modulo
+    url TEXT NOT NULL,
+    parent INTEGER NOT NULL DEFAULT 0,        -- 0 = raíz (familias)
+    meta TEXT NOT NULL DEFAULT '{}',          -- datos del enlace (nombre, nivel, curso...)
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending | done | error
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,                              -- JSON del resultado ya parseado
+    error TEXT,
+    updated_at TEXT,
+    UNIQUE (kind, url, parent)
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier (status, id);
+CREATE INDEX IF NOT EXISTS idx_frontier_parent ON frontier (parent, id);
+"""
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class Frontier:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def reset(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM frontier")
+
+    def seed(self, kind: str, url: str, meta: Dict[str, Any]) -> None:
+        with self.conn:
+            self._add(kind, url, 0, meta)
+
+    def _add(self, kind: str, url: str, parent: int, meta: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT OR IGNORE INTO frontier (kind, url, parent, meta, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, url, parent, json.dumps(meta, ensure_ascii=False), _now()),
+        )
+
+    def pending(self, limit: int = 100) -> List[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT * FROM frontier WHERE status = 'pending' OR (status = 'error' AND attempts < ?) "
+            "ORDER BY id LIMIT ?",
+            (MAX_ATTEMPTS, limit),
+        ).fetchall()
+
+    def complete(self, row_id: int, result: Any, children: Iterable[tuple] = ()) -> None:
+        """Checkpoint: resultado + hijos (kind, url, meta) en una sola transacción."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET status = 'done', result = ?, error = NULL, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), _now(), row_id),
+            )
+            for kind, url, meta in children:
+                self._add(kind, url, row_id, meta)
+
+    def fail(self, row_id: int, error: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET status = 'error', error = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (error, _now(), row_id),
+            )
+
+    def children(self, parent: int, kind: Optional[str] = None) -> List[sqlite3.Row]:
+        sql = "SELECT * FROM frontier WHERE parent = ?"
+        params: list = [parent]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        return self.conn.execute(sql + " ORDER BY id", params).fetchall()
+
+    def stats(self) -> Dict[str, int]:
+        rows = self.conn.execute("SELECT kind, status, COUNT(*) FROM frontier GROUP BY kind, status")
+        return {f"{kind}:{status}": n for kind, status, n in rows}
@@ -0,0 +1,137 @@
+"""Caché HTTP en disco para los scrapers de CATEDU.
+
+Los cuerpos se guardan direccionados por contenido (sha256, comprimidos con gzip)
+y cada URL apunta a su cuerpo junto con ETag / Last-Modified. CachingAdapter se
+monta bajo la requests.Session compartida: revalida con If-None-Match /
+If-Modified-Since y, en modo offline, sirve sólo desde caché sin tocar la red.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Cabeceras de la respuesta que merece la pena conservar
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CacheMiss(requests.ConnectionError):
+    """La URL no está en caché y estamos en modo offline."""
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class DiskCache:
+    """objects/<hh>/<sha256>.gz guarda cuerpos; urls/<sha1(url)>.json los metadatos por URL."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "urls"), exist_ok=True)
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.root, "urls", hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest + ".gz")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(self._object_path(meta["sha256"])) else None
+
+    def body(self, meta: Dict[str, Any]) -> bytes:
+        with gzip.open(self._object_path(meta["sha256"]), "rb") as f:
+            return f.read()
+
+    def put(self, url: str, body: bytes, headers) -> Dict[str, Any]:
+        digest = hashlib.sha256(body).hexdigest()
+        obj = self._object_path(digest)
+        if not os.path.exists(obj):
+            _write_atomic(obj, gzip.compress(body))
+        meta = {
+            "url": url,
+            "sha256": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "headers": {k: headers[k] for k in KEEP_HEADERS if k in headers},
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        _write_atomic(self._meta_path(url), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        return meta
+
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter que responde desde DiskCache y revalida con peticiones condicionales."""
+
+    def __init__(self, cache: DiskCache, offline: bool = False, stats: Optional[Counter] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.offline = offline
+        # hit_offline / revalidated / stored / miss; se puede compartir entre adaptadores
+        self.stats: Counter = stats if stats is not None else Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _from_cache(self, request, meta: Dict[str, Any]) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = self.cache.body(meta)
+        resp._content_consumed = True
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        return resp
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        meta = self.cache.get(request.url)
+        if self.offline:
+            if meta is None:
+                self._count("miss")
+                raise CacheMiss(f"Sin copia en caché (modo offline): {request.url}", request=request)
+            self._count("hit_offline")
+            return self._from_cache(request, meta)
+
+        if meta:
+            if meta.get("etag"):
+                request.headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request.headers["If-Modified-Since"] = meta["last_modified"]
+
+        resp = super().send(request, **kwargs)
+        if resp.status_code == 304 and meta:
+            resp.close()
+            self._count("revalidated")
+            return self._from_cache(request, meta)
+        if resp.status_code == 200:
+            # .content ya viene descomprimido (gzip/deflate) por urllib3
+            self.cache.put(request.url, resp.content, resp.headers)
+            self._count("stored")
+        return resp
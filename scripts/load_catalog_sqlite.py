@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Carga el catálogo scrapeado en las tablas asignaturas / ra / ce de la app.
+
+Acepta el JSON legacy (public/asignaturas_FP.json), ifc_catedu.json o el NDJSON
+de módulos del scraper. Compara con lo que ya hay en la base de datos y sólo
+escribe lo que cambia: los RA/CE se emparejan por (asignatura, código), así que
+conservan su id y las notas/actividades que cuelgan de ellos no se tocan. Todo
+va en una sola transacción con executemany por lotes.
+
+    python scripts/load_catalog_sqlite.py public/asignaturas_FP.json --db data/db.sqlite
+    python scripts/load_catalog_sqlite.py ifc_catedu.json --dry-run
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from validate_asignaturas_legacy import iter_json_array, norm
+
+BATCH = 500
+DEFAULT_COLOR = "#4B5563"
+
+# Mismo esquema que crea la app (schema_dump.sql), para poder sembrar una base vacía
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS asignaturas (
+    id TEXT PRIMARY KEY,
+    nombre TEXT,
+    creditos TEXT,
+    descripcion TEXT,
+    RA TEXT,
+    color TEXT DEFAULT '#4B5563'
+);
+CREATE TABLE IF NOT EXISTS ra (
+    id TEXT PRIMARY KEY,
+    codigo TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    asignatura_id TEXT NOT NULL,
+    FOREIGN KEY (asignatura_id) REFERENCES asignaturas(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS ce (
+    id TEXT PRIMARY KEY,
+    codigo TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    ra_id TEXT NOT NULL,
+    FOREIGN KEY (ra_id) REFERENCES ra(id) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ra_asig_codigo ON ra(asignatura_id, codigo);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ce_ra_codigo ON ce(ra_id, codigo);
+"""
+
+
+# ================== Entrada ==================
+def iter_catalog(path: str) -> Iterator[Dict[str, Any]]:
+    """Asignaturas en esquema legacy, venga el catálogo en el formato que venga."""
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(4096).lstrip()[:1]
+        f.seek(0)
+        if first == "[":
+            it = iter_json_array(f)
+            head = next(it, None)
+            if head is None:
+                return
+            if "modulos" not in head:
+                yield head
+                yield from it
+                return
+    # ifc_catedu.json o NDJSON de módulos: misma desambiguación que to_legacy()
+    import scrape_catedu_ifc as scraper
+    if first == "[":
+        yield from scraper.to_legacy(scraper.load_ciclos(path))
+    else:
+        with open(path, "rb") as src:
+            for offset in scraper.legacy_from_ndjson(path).result():
+                src.seek(offset)
+                yield scraper.legacy_record(scraper.modulo_from_dict(json.loads(src.readline())))
+
+
+def ra_json(ras: List[Dict[str, Any]]) -> str:
+    # la copia JSON que guarda la app (JSON.stringify)
+    return json.dumps([
+        {"codigo": r["codigo"], "descripcion": r["descripcion"],
+         "CE": [{"codigo": c["codigo"], "descripcion": c["descripcion"]} for c in r["CE"]]}
+        for r in ras
+    ], ensure_ascii=False, separators=(",", ":"))
+
+
+def clean_ra(a: Dict[str, Any], stats: Counter) -> List[Dict[str, Any]]:
+    """RA/CE normalizados; sin código o repetidos se descartan (romperían los índices únicos)."""
+    ras, vistos = [], set()
+    for r in a.get("RA") or []:
+        cod = norm(r.get("codigo"))
+        if not cod or cod in vistos:
+            stats["ra_descartados"] += 1
+            continue
+        vistos.add(cod)
+        ces, ce_vistos = [], set()
+        for c in r.get("CE") or []:
+            cc = norm(c.get("codigo"))
+            if not cc or cc in ce_vistos:
+                stats["ce_descartados"] += 1
+                continue
+            ce_vistos.add(cc)
+            ces.append({"codigo": cc, "descripcion": norm(c.get("descripcion"))})
+        ras.append({"codigo": cod, "descripcion": norm(r.get("descripcion")), "CE": ces})
+    return ras
+
+
+# ================== Diff ==================
+class Plan:
+    """Sentencias pendientes agrupadas por tipo, para lanzarlas con executemany."""
+
+    ORDER = ("del_ce", "del_ra", "ins_asig", "upd_asig", "ins_ra", "upd_ra", "ins_ce", "upd_ce")
+    SQL = {
+        "del_ce": "DELETE FROM ce WHERE id = ?",
+        "del_ra": "DELETE FROM ra WHERE id = ?",
+        "ins_asig": "INSERT INTO asignaturas (id, nombre, creditos, descripcion, RA, color) VALUES (?, ?, ?, ?, ?, ?)",
+        "upd_asig": "UPDATE asignaturas SET nombre = ?, creditos = COALESCE(?, creditos), RA = ? WHERE id = ?",
+        "ins_ra": "INSERT INTO ra (id, codigo, descripcion, asignatura_id) VALUES (?, ?, ?, ?)",
+        "upd_ra": "UPDATE ra SET descripcion = ? WHERE id = ?",
+        "ins_ce": "INSERT INTO ce (id, codigo, descripcion, ra_id) VALUES (?, ?, ?, ?)",
+        "upd_ce": "UPDATE ce SET descripcion = ? WHERE id = ?",
+    }
+
+    def __init__(self):
+        self.rows: Dict[str, List[tuple]] = defaultdict(list)
+
+    def add(self, kind: str, row: tuple) -> None:
+        self.rows[kind].append(row)
+
+    def counts(self) -> Counter:
+        return Counter({k: len(v) for k, v in self.rows.items() if v})
+
+    def apply(self, conn: sqlite3.Connection, batch: int = BATCH) -> None:
+        for kind in self.ORDER:
+            rows = self.rows.get(kind, [])
+            for i in range(0, len(rows), batch):
+                conn.executemany(self.SQL[kind], rows[i:i + batch])
+
+
+def snapshot(conn: sqlite3.Connection, ids: Optional[Iterable[str]] = None
+             ) -> Tuple[Dict[str, tuple], Dict[str, Dict[str, tuple]], Dict[str, Dict[str, tuple]]]:
+    """Estado actual de las tablas; con `ids`, sólo el de esas asignaturas."""
+    where, params = "", ()
+    if ids is not None:
+        where, params = " WHERE {} IN (SELECT value FROM json_each(?))", (json.dumps(sorted(ids)),)
+    asig = {r[0]: r[1:] for r in conn.execute("SELECT id, nombre, creditos, RA FROM asignaturas"
+                                              + where.format("id"), params)}
+    ras: Dict[str, Dict[str, tuple]] = defaultdict(dict)   # asignatura_id -> codigo -> (id, descripcion)
+    for rid, aid, cod, desc in conn.execute("SELECT id, asignatura_id, codigo, descripcion FROM ra"
+                                            + where.format("asignatura_id"), params):
+        ras[aid][cod] = (rid, desc)
+    ces: Dict[str, Dict[str, tuple]] = defaultdict(dict)   # ra_id -> codigo -> (id, descripcion)
+    sql = "SELECT id, ra_id, codigo, descripcion FROM ce"
+    if ids is not None:
+        sql += " WHERE ra_id IN (SELECT id FROM ra" + where.format("asignatura_id") + ")"
+    for cid, rid, cod, desc in conn.execute(sql, params):
+        ces[rid][cod] = (cid, desc)
+    return asig, ras, ces
+
+
+def diff_catalog(conn: sqlite3.Connection, asignaturas: Iterable[Dict[str, Any]],
+                 ids: Optional[Iterable[str]] = None) -> Tuple[Plan, Counter]:
+    asig_db, ras_db, ces_db = snapshot(conn, ids)
+    plan, stats = Plan(), Counter()
+    vistas = set()
+
+    for a in asignaturas:
+        aid, nombre = norm(a.get("id")), norm(a.get("nombre"))
+        if not aid or not nombre or aid in vistas:
+            stats["asignaturas_descartadas"] += 1
+            continue
+        vistas.add(aid)
+        stats["asignaturas"] += 1
+        ras = clean_ra(a, stats)
+        raw = ra_json(ras)
+        creditos = str(a["creditos"]) if a.get("creditos") is not None else None
+
+        prev = asig_db.get(aid)
+        if prev is None:
+            descripcion = json.dumps(a.get("descripcion") or {}, ensure_ascii=False, separators=(",", ":"))
+            plan.add("ins_asig", (aid, nombre, creditos or "", descripcion, raw, DEFAULT_COLOR))
+        elif prev[0] != nombre or prev[2] != raw or (creditos is not None and prev[1] != creditos):
+            # color y descripción (centro/empresa) son del usuario: no se pisan
+            plan.add("upd_asig", (nombre, creditos, raw, aid))
+
+        ra_prev = ras_db.get(aid, {})
+        for r in ras:
+            old = ra_prev.pop(r["codigo"], None)
+            if old is None:
+                rid = str(uuid.uuid4())
+                plan.add("ins_ra", (rid, r["codigo"], r["descripcion"], aid))
+                ce_prev: Dict[str, tuple] = {}
+            else:
+                rid = old[0]
+                if old[1] != r["descripcion"]:
+                    plan.add("upd_ra", (r["descripcion"], rid))
+                ce_prev = ces_db.get(rid, {})
+            for c in r["CE"]:
+                old_ce = ce_prev.pop(c["codigo"], None)
+                if old_ce is None:
+                    plan.add("ins_ce", (str(uuid.uuid4()), c["codigo"], c["descripcion"], rid))
+                elif old_ce[1] != c["descripcion"]:
+                    plan.add("upd_ce", (c["descripcion"], old_ce[0]))
+            for cid, _ in ce_prev.values():
+                plan.add("del_ce", (cid,))
+        # RA que ya no están en el catálogo, con sus CE
+        for rid, _ in ra_prev.values():
+            for cid, _ in ces_db.get(rid, {}).values():
+                plan.add("del_ce", (cid,))
+            plan.add("del_ra", (rid,))
+
+    return plan, stats
+
+
+def load_catalog(conn: sqlite3.Connection, asignaturas: Iterable[Dict[str, Any]],
+                 batch: int = BATCH, dry_run: bool = False, ids: Optional[Iterable[str]] = None) -> Tuple[Counter, Counter]:
+    """Diff + escritura en una transacción (BEGIN IMMEDIATE: los lectores en WAL siguen leyendo).
+
+    Con `ids` sólo se lee de la base de datos el estado de esas asignaturas (las
+    que trae `asignaturas`), para aplicar parches sin recorrer las tablas enteras.
+    """
+    conn.isolation_level = None
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # executescript() haría COMMIT antes: las sentencias del esquema van una a una
+        for stmt in SCHEMA.split(";"):
+            if stmt.strip():
+                conn.execute(stmt)
+        plan, stats = diff_catalog(conn, asignaturas, ids)
+        plan.apply(conn, batch)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("ROLLBACK" if dry_run else "COMMIT")
+    return plan.counts(), stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Carga el catálogo (legacy, ifc_catedu.json o NDJSON) en asignaturas/ra/ce.")
+    ap.add_argument("path", nargs="?", default="public/asignaturas_FP.json", help="Catálogo a cargar")
+    ap.add_argument("--db", default="data/db.sqlite", help="Base de datos SQLite de la app")
+    ap.add_argument("--batch", type=int, default=BATCH, help="Filas por executemany")
+    ap.add_argument("--dry-run", action="store_true", help="Calcula los cambios sin escribirlos")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(args.db, timeout=30)
+    try:
+        counts, stats = load_catalog(conn, iter_catalog(args.path), max(1, args.batch), args.dry_run)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ No se pudo cargar '{args.path}' en '{args.db}': {e}")
+        sys.exit(2)
+    finally:
+        conn.close()
+    ms = (time.perf_counter() - t0) * 1000
+
+    print(f"{'🧪 (dry-run) ' if args.dry_run else ''}📚 {stats['asignaturas']} asignaturas de '{args.path}' -> '{args.db}' en {ms:.0f} ms")
+    for kind in Plan.ORDER:
+        if counts[kind]:
+            print(f"   • {kind}: {counts[kind]}")
+    if not counts:
+        print("   • sin cambios")
+    for k in ("asignaturas_descartadas", "ra_descartados", "ce_descartados"):
+        if stats[k]:
+            print(f"⚠️  {k}: {stats[k]}")
+
+
+if __name__ == "__main__":
+    main()
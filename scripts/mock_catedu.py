@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Servidor HTTP local que imita centrosdocentes.catedu.es para pruebas de carga del crawler.
+
+Sirve las páginas de familia, ciclo y módulo en las mismas rutas que la web real
+(renderizadas con catedu_fixtures desde ifc_catedu.json, y encima las reales
+grabadas en scripts/fixtures/catedu con --fixtures), y permite simular la red:
+
+    --latency/--jitter   retardo por petición en ms (base + uniforme [0, jitter])
+    --p429/--p5xx        probabilidad de responder 429 (con Retry-After) o 500/502/503
+    --familias/--modulos catálogo sintético: N familias x M módulos cada una
+
+Los fallos se deciden con una semilla a partir de (ruta, número de intento), así que
+dos ejecuciones con la misma configuración ven exactamente los mismos errores,
+haya las descargas en paralelo que haya.
+
+    python scripts/mock_catedu.py --port 8765 --latency 80 --jitter 40 --p429 0.02
+    python scripts/scrape_catedu_ifc.py --base-url http://127.0.0.1:8765 --no-cache
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from catedu_fixtures import (FIXTURES_DIR, ciclo_path, familia_path, load_index, modulo_path,
+                             render_ciclo, render_familia, render_modulo)
+from scrape_catedu_ifc import FAMILIAS
+
+# Códigos de módulo sintéticos: 4 dígitos, como los reales (el parser espera \d{3,4})
+PRIMER_CODIGO = 1000
+MAX_MODULOS = 9999 - PRIMER_CODIGO + 1
+
+
+@dataclass
+class Fallos:
+    latency: float = 0.0      # segundos
+    jitter: float = 0.0       # segundos
+    p429: float = 0.0
+    p5xx: float = 0.0
+    retry_after: int = 1      # cabecera Retry-After de los 429
+    seed: int = 0
+
+
+# ================== Catálogo ==================
+def catalogo_ifc(ifc_json: str) -> Dict[str, List[Dict[str, Any]]]:
+    """familia -> ciclos (formato ifc_catedu.json) con el catálogo IFC real."""
+    with open(ifc_json, "r", encoding="utf-8") as f:
+        return {"IFC": json.load(f)}
+
+
+def catalogo_sintetico(base: List[Dict[str, Any]], familias: int, modulos: int) -> Dict[str, List[Dict[str, Any]]]:
+    """N familias con los mismos ciclos que IFC y M módulos cada una, copiados de los reales.
+
+    Cada módulo recibe un código único en todo el catálogo, de modo que to_legacy()
+    tiene que devolver exactamente familias x modulos asignaturas.
+    """
+    if not 1 <= familias <= len(FAMILIAS):
+        raise ValueError(f"--familias tiene que estar entre 1 y {len(FAMILIAS)}")
+    if familias * modulos > MAX_MODULOS:
+        raise ValueError(f"Como mucho {MAX_MODULOS} módulos en total (códigos de 4 dígitos)")
+    pool = [m for c in base for m in c["modulos"] if m["codigo"] and m.get("RA")]
+    codigos = iter(range(PRIMER_CODIGO, PRIMER_CODIGO + familias * modulos))
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for fam in FAMILIAS[:familias]:
+        ciclos = [dict(c, codigo=fam + c["codigo"][3:], ciclo=f"{c['ciclo']} ({fam})", modulos=[]) for c in base]
+        for k in range(modulos):
+            c = ciclos[k % len(ciclos)]
+            c["modulos"].append(dict(pool[k % len(pool)], codigo=f"{next(codigos):04d}",
+                                     ciclo_codigo=c["codigo"], ciclo_nombre=c["ciclo"]))
+        out[fam] = ciclos
+    return out
+
+
+def render_paginas(catalogo: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+    """Ruta (con query, como la pide el scraper) -> HTML."""
+    paginas: Dict[str, str] = {}
+    for fam, ciclos in catalogo.items():
+        paginas[familia_path(fam)] = render_familia(fam, ciclos)
+        for c in ciclos:
+            paginas[ciclo_path(c["codigo"])] = render_ciclo(c)
+            for m in c["modulos"]:
+                paginas.setdefault(modulo_path(m, c["codigo"]), render_modulo(m))
+    return paginas
+
+
+def ruta(path: str) -> str:
+    """Clave de página: ruta + query con los parámetros ordenados."""
+    p = urlsplit(path)
+    return p.path + ("?" + "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(p.query))) if p.query else "")
+
+
+# ================== Servidor ==================
+class MockCatedu:
+    """Servidor en un hilo aparte; `stats` cuenta respuestas por estado y bytes servidos."""
+
+    def __init__(self, paginas: Dict[str, str], fallos: Optional[Fallos] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.paginas = {ruta(p): html.encode("utf-8") for p, html in paginas.items()}
+        self.etags = {p: '"' + hashlib.sha1(b).hexdigest()[:16] + '"' for p, b in self.paginas.items()}
+        self.fallos = fallos or Fallos()
+        self.stats: Counter = Counter()
+        self._intentos: Counter = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_fixtures(self, fixtures_dir: str = FIXTURES_DIR) -> int:
+        """Sustituye las páginas renderizadas por las grabadas (index.json) en las mismas rutas."""
+        n = 0
+        for e in load_index(fixtures_dir):
+            p = urlsplit(e["url"])
+            key = ruta(p.path + ("?" + p.query if p.query else ""))
+            self.paginas[key] = e["html"].encode("utf-8")
+            self.etags[key] = '"' + hashlib.sha1(self.paginas[key]).hexdigest()[:16] + '"'
+            n += 1
+        return n
+
+    def reset(self) -> None:
+        """Pone a cero contadores e intentos: la siguiente ejecución ve los mismos fallos."""
+        with self._lock:
+            self.stats.clear()
+            self._intentos.clear()
+
+    def decide(self, key: str) -> Tuple[float, Optional[int]]:
+        """(retardo, estado de error o None) para este intento de esta ruta."""
+        with self._lock:
+            self._intentos[key] += 1
+            intento = self._intentos[key]
+        f = self.fallos
+        rng = random.Random(f"{f.seed}:{key}:{intento}")
+        delay = f.latency + (rng.uniform(0, f.jitter) if f.jitter else 0.0)
+        r = rng.random()
+        if r < f.p429:
+            return delay, 429
+        if r < f.p429 + f.p5xx:
+            return delay, rng.choice((500, 502, 503))
+        return delay, None
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body and self.command != "HEAD":
+                    self.wfile.write(body)
+                with mock._lock:
+                    mock.stats[status] += 1
+                    mock.stats["bytes"] += len(body)
+
+            def do_GET(self):
+                key = ruta(self.path)
+                delay, error = mock.decide(key)
+                if delay:
+                    time.sleep(delay)
+                if error == 429:
+                    return self._send(429, b"Too Many Requests", {"Retry-After": str(mock.fallos.retry_after)})
+                if error:
+                    return self._send(error, b"Error interno simulado")
+                body = mock.paginas.get(key)
+                if body is None:
+                    return self._send(404, b"No encontrado")
+                etag = mock.etags[key]
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, b"", {"ETag": etag})
+                self._send(200, body, {"Content-Type": "text/html; charset=utf-8", "ETag": etag})
+
+            do_HEAD = do_GET
+
+        return Handler
+
+    def start(self) -> "MockCatedu":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockCatedu":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    """Opciones del servidor, compartidas con bench_crawl_e2e.py."""
+    ap.add_argument("--ifc-json", default="ifc_catedu.json", help="Catálogo del que se renderizan las páginas")
+    ap.add_argument("--fixtures", nargs="?", const=FIXTURES_DIR, default=None, metavar="DIR",
+                    help="Sirve las páginas grabadas de este directorio en lugar de las renderizadas")
+    ap.add_argument("--familias", type=int, default=None, help="Catálogo sintético: número de familias")
+    ap.add_argument("--modulos", type=int, default=60, help="Catálogo sintético: módulos por familia")
+    ap.add_argument("--latency", type=float, default=0.0, metavar="MS", help="Retardo base por petición")
+    ap.add_argument("--jitter", type=float, default=0.0, metavar="MS", help="Retardo extra aleatorio [0, MS]")
+    ap.add_argument("--p429", type=float, default=0.0, help="Probabilidad de 429 Too Many Requests")
+    ap.add_argument("--p5xx", type=float, default=0.0, help="Probabilidad de 500/502/503")
+    ap.add_argument("--retry-after", type=int, default=1, help="Segundos de Retry-After en los 429")
+    ap.add_argument("--seed", type=int, default=0)
+
+
+def from_args(args: argparse.Namespace, port: int = 0) -> Tuple[MockCatedu, Dict[str, List[Dict[str, Any]]]]:
+    catalogo = catalogo_ifc(args.ifc_json)
+    if args.familias:
+        catalogo = catalogo_sintetico(catalogo["IFC"], args.familias, args.modulos)
+    fallos = Fallos(latency=args.latency / 1000, jitter=args.jitter / 1000, p429=args.p429, p5xx=args.p5xx,
+                    retry_after=args.retry_after, seed=args.seed)
+    mock = MockCatedu(render_paginas(catalogo), fallos, port=port)
+    if args.fixtures:
+        mock.add_fixtures(args.fixtures)
+    return mock, catalogo
+
+
+def main():
+    ap = argparse.ArgumentParser(description="CATEDU simulado en local: latencia, errores y catálogo escalable.")
+    ap.add_argument("--port", type=int, default=8765)
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    try:
+        mock, catalogo = from_args(args, args.port)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(2)
+    n_mod = sum(len(c["modulos"]) for cs in catalogo.values() for c in cs)
+    print(f"🧪 CATEDU simulado en {mock.base_url}: {len(catalogo)} familias, {n_mod} módulos, "
+          f"{len(mock.paginas)} páginas (latencia {args.latency:g}+{args.jitter:g} ms, "
+          f"429 {args.p429:.0%}, 5xx {args.p5xx:.0%})")
+    for fam in catalogo:
+        print(f"   • {mock.base_url}{familia_path(fam)}")
+    mock.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.stop()
+        print(f"📊 {dict(mock.stats)}")
+
+
+if __name__ == "__main__":
+    main()
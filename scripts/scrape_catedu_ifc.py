@@ -1,35 +1,78 @@
+import argparse
+import atexit
+import cProfile
+import hashlib
+import heapq
+import io
 import json
 import re
+import resource
+import sys
+import pstats
+import threading
 import time
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Any, Optional
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, replace
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, TextIO, Tuple
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, CData, NavigableString, SoupStrainer
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunsplit
 import os
 
+from crawl_frontier import Frontier
+from http_cache import CacheMiss, CachingAdapter, DiskCache
+from scrape_metrics import metrics
+
 # ================== Config ==================
 BASE = "https://centrosdocentes.catedu.es"
 FAMILIA_URL = f"{BASE}/awc/public/pages/familias/ciclos.php?familia=IFC"
+# Las 26 familias profesionales de FP
+FAMILIAS = (
+    "ADG", "AFD", "AGA", "ARA", "ART", "COM", "ELE", "ENA", "EOC", "FME", "HOT", "IEX", "IFC",
+    "IMA", "IMP", "IMS", "INA", "MAM", "MAP", "QUI", "SAN", "SEA", "SSC", "TCP", "TMV", "VIC",
+)
 HEADERS = {
     "User-Agent": "SkillForgeScraper/1.0 (+https://skillforge.local) Python-requests",
     "Accept-Language": "es-ES,es;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
 }
 SLEEP = (0.5, 1.2)
+# Caché HTTP, frontier, manifest... en <repo>/.cache/catedu (ignorado por git), sea cual sea
+# el directorio desde el que se lanza; la caché HTTP sólo se usa con --cache
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "catedu")
+# Modo concurrente: peticiones/segundo por host (sustituye a las pausas fijas de SLEEP)
+RATE = 2.0
+# Súbelo cada vez que cambie lo que extrae parse_modulo_soup(): invalida el manifest incremental
+PARSER_VERSION = 1
+# "html.parser" (stdlib) o "lxml" (más rápido, opcional: pip install lxml)
+PARSER_BACKEND = "html.parser"
+# Modo --low-memory: árboles destruidos tras extraer, descargas por delante del parseo acotadas
+low_memory = False
+# Techo de RSS en MB (--max-rss); None = sin límite
+MAX_RSS_MB: Optional[float] = None
+# --profile-modulo: código del módulo a perfilar, perfilador ("cprofile" | "pyinstrument") y salida
+PROFILE_MODULO: Optional[str] = None
+PROFILER = "cprofile"
+PROFILE_OUT: Optional[str] = None
+# --shard i/N: este proceso sólo scrapea los ciclos con shard_of(código, N) == i (None = todos)
+SHARD: Optional[Tuple[int, int]] = None
 
 # ================== Modelos internos ==================
-@dataclass
+@dataclass(slots=True)
 class Criterio:
     codigo: str
     descripcion: str
 
-@dataclass
+@dataclass(slots=True)
 class RA:
     codigo: str
     descripcion: str
     CE: List[Criterio]
 
-@dataclass
+@dataclass(slots=True)
 class Modulo:
     codigo: str
     nombre: str
@@ -41,79 +84,353 @@ class Modulo:
     creditos: Optional[str]  # <- intentamos extraer "10" de "10.0 Créditos ECTS"
     RA: List[RA]
 
-@dataclass
+@dataclass(slots=True)
 class Ciclo:
     codigo: str
     nombre: str
     nivel: str
     modulos: List[Modulo]
+    # (familia, ciclo) en el orden del crawl completo: lo que usa la fusión de shards
+    orden: Tuple[int, int] = (0, 0)
+
+def modulo_from_dict(d: Dict[str, Any]) -> Modulo:
+    return Modulo(
+        codigo=d["codigo"],
+        nombre=d["nombre"],
+        ciclo_codigo=d["ciclo_codigo"],
+        ciclo_nombre=d["ciclo_nombre"],
+        curso=d.get("curso"),
+        horas_totales=d.get("horas_totales"),
+        horas_semanales=d.get("horas_semanales"),
+        creditos=d.get("creditos"),
+        RA=[
+            RA(codigo=r["codigo"], descripcion=r["descripcion"], CE=[Criterio(**ce) for ce in r.get("CE", [])])
+            for r in d.get("RA", [])
+        ]
+    )
+
+# ifc_catedu.json: [{ciclo, codigo, nivel, modulos: [...]}, ...]
+def ciclos_to_json(ciclos: List[Ciclo]) -> List[Dict[str, Any]]:
+    return [
+        {"ciclo": c.nombre, "codigo": c.codigo, "nivel": c.nivel, "modulos": [asdict(m) for m in c.modulos]}
+        for c in ciclos
+    ]
+
+def load_ciclos(path: str) -> List[Ciclo]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        Ciclo(codigo=c["codigo"], nombre=c["ciclo"], nivel=c["nivel"],
+              modulos=[modulo_from_dict(m) for m in c.get("modulos", [])])
+        for c in data
+    ]
+
+def _mismo_modulo(m: Modulo, codigo: str, nombre: str) -> bool:
+    return (bool(codigo) and m.codigo == codigo) or m.nombre.strip().lower() == nombre.strip().lower()
+
+def merge_ciclos(anteriores: List[Ciclo], nuevos: List[Ciclo],
+                 fallidos: Optional[Dict[str, List[Tuple[int, str, str]]]] = None) -> List[Ciclo]:
+    """Sustituye por código los ciclos recién scrapeados y conserva el resto en su sitio.
+
+    Un módulo que esta vez no se pudo parsear (ver modulos_fallidos) no se pierde:
+    vuelve la versión anterior, en la posición que tiene en el ciclo.
+    """
+    previos = {c.codigo: c for c in anteriores}
+    for c in nuevos:
+        viejo = previos.get(c.codigo)
+        for pos, codigo, nombre in (fallidos or {}).get(c.codigo, []) if viejo else []:
+            m = next((m for m in viejo.modulos if _mismo_modulo(m, codigo, nombre)), None)
+            if m is not None:
+                c.modulos.insert(min(pos, len(c.modulos)), m)
+    por_codigo = {c.codigo: c for c in nuevos}
+    merged = [por_codigo.pop(c.codigo, c) for c in anteriores]
+    return merged + [c for c in nuevos if c.codigo in por_codigo]
 
 # ================== Sesión HTTP ==================
 session = requests.Session()
 session.headers.update(HEADERS)
 
-def get_soup(url: str) -> BeautifulSoup:
+class TokenBucket:
+    """Limitador de peticiones por host: `rate` tokens/segundo y ráfagas de hasta `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # host -> (tokens, instante)
+
+    def acquire(self, host: str) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (float(self.burst), now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            metrics.inc("scraper_sleep_seconds_total", wait, motivo="rate_limit")
+            time.sleep(wait)
+
+# Sólo se activa en modo concurrente (ver scrape_ifc)
+rate_limiter: Optional[TokenBucket] = None
+# Caché en disco (ver enable_http_cache); en modo offline no se toca la red
+http_cache: Optional[DiskCache] = None
+offline = False
+# Aciertos/fallos de caché acumulados aunque se vuelvan a montar los adaptadores
+cache_stats: Counter = Counter()
+
+def mount_adapters(pool_maxsize: int = 10) -> None:
+    if http_cache:
+        adapter = CachingAdapter(http_cache, offline=offline, stats=cache_stats, pool_maxsize=pool_maxsize)
+    else:
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+def enable_http_cache(cache_dir: str = CACHE_DIR, offline_mode: bool = False) -> None:
+    global http_cache, offline
+    http_cache = DiskCache(cache_dir)
+    offline = offline_mode
+    mount_adapters()
+
+def pause(i: int) -> None:
+    if not offline:
+        metrics.inc("scraper_sleep_seconds_total", SLEEP[i], motivo="pausa")
+        time.sleep(SLEEP[i])
+
+def page_kind(url: str) -> str:
+    if "modulo.php" in url:
+        return "modulo"
+    if "info_ciclo.php" in url:
+        return "ciclo"
+    if "ciclos.php" in url:
+        return "familia"
+    return "otra"
+
+def normalize_url(url: str, sin: Tuple[str, ...] = ()) -> str:
+    """Misma página -> misma cadena: esquema/host en minúsculas, sin puerto por defecto ni
+    fragmento, parámetros ordenados; `sin` descarta parámetros que no cambian el contenido."""
+    p = urlsplit(url)
+    scheme = p.scheme.lower()
+    netloc = p.netloc.lower()
+    if (scheme, netloc.rpartition(":")[2]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rpartition(":")[0]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if k not in sin))
+    return urlunsplit((scheme, netloc, p.path or "/", query, ""))
+
+class SingleFlight:
+    """Cada clave se calcula una sola vez por ejecución: quien pide una clave que ya está
+    en marcha espera a ese mismo resultado en lugar de repetir la descarga o el parseo.
+
+    Con keep=False sólo se comparten las llamadas en curso (no retiene nada al terminar).
+    Los errores no se guardan: la siguiente petición de esa clave lo vuelve a intentar.
+    """
+
+    def __init__(self, capa: str, keep: bool = True):
+        self.capa = capa
+        self.keep = keep
+        self.saved = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Future] = {}
+
+    def claim(self, key: Any) -> Tuple[Future, bool]:
+        """(futuro, True) si quien llama debe calcular la clave; (futuro, False) si ya hay otro."""
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is None:
+                fut = self._calls[key] = Future()
+                return fut, True
+        return fut, False
+
+    def share(self, fut: Future) -> Future:
+        """Cuenta la petición ahorrada y devuelve el futuro compartido."""
+        with self._lock:
+            self.saved += 1
+        metrics.inc("scraper_singleflight_saved_total", capa=self.capa)
+        return fut
+
+    def known(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def __len__(self) -> int:
+        """Claves retenidas (en curso o, con keep=True, ya resueltas)."""
+        with self._lock:
+            return len(self._calls)
+
+    def resolve(self, key: Any, fut: Future, result: Any = None, exc: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if exc is not None or not self.keep:
+                self._calls.pop(key, None)
+        if exc is not None:
+            fut.set_exception(exc)
+        else:
+            fut.set_result(result)
+
+    def do(self, key: Any, fn: Callable[[], Any], wait: bool = True) -> Any:
+        """fn() una sola vez por clave. Con wait=False, si otro la está calculando todavía,
+        se calcula aparte en vez de esperar (para el hilo de parseo, que no puede esperar
+        a trabajo encolado detrás de sí mismo)."""
+        fut, owner = self.claim(key)
+        if not owner:
+            if wait or fut.done():
+                return self.share(fut).result()
+            return fn()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.resolve(key, fut, exc=e)
+            raise
+        self.resolve(key, fut, result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._calls.clear()
+            self.saved = 0
+
+# Descargas simultáneas de la misma URL (sólo mientras están en curso: no retiene HTML)
+fetch_flight = SingleFlight("descarga", keep=False)
+
+def fetch_html(url: str) -> str:
+    return fetch_flight.do(normalize_url(url), lambda: _fetch_html(url))
+
+def _fetch_html(url: str) -> str:
+    pagina = page_kind(url)
     last_exc = None
     for i in range(3):
+        if i:
+            metrics.inc("scraper_fetch_retries_total", pagina=pagina)
         try:
+            if rate_limiter and not offline:
+                rate_limiter.acquire(urlparse(url).netloc)
+            t0 = time.perf_counter()
             resp = session.get(url, timeout=25)
+            metrics.observe("scraper_fetch_seconds", time.perf_counter() - t0, pagina=pagina)
+            metrics.inc("scraper_http_responses_total", status=resp.status_code)
             if resp.ok:
-                return BeautifulSoup(resp.text, "html.parser")
+                # tamaño ya descomprimido (gzip/deflate)
+                metrics.observe("scraper_page_bytes", len(resp.content), pagina=pagina)
+                metrics.inc("scraper_fetch_bytes_total", len(resp.content), pagina=pagina)
+                return resp.text
             last_exc = requests.HTTPError(f"{resp.status_code} for {url}")
+        except CacheMiss:
+            metrics.inc("scraper_fetch_errors_total", pagina=pagina, error="CacheMiss")
+            raise
         except requests.RequestException as e:
+            metrics.inc("scraper_fetch_errors_total", pagina=pagina, error=type(e).__name__)
             last_exc = e
+        metrics.inc("scraper_sleep_seconds_total", 0.6 + i * 0.6, motivo="reintento")
         time.sleep(0.6 + i * 0.6)
     if last_exc:
         raise last_exc
     raise RuntimeError(f"No se pudo descargar: {url}")
 
+# Páginas de módulo: descarta <head> (title, meta, script, style...) antes de construir el árbol.
+# SoupStrainer sólo filtra en el nivel superior: <html> y <head> se rechazan, <body> entra entero.
+MODULO_STRAINER = SoupStrainer(re.compile(r"^(?!(?:html|head|title|meta|link|script|style|noscript)$)"))
+
+def make_soup(html: str, strainer: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    return BeautifulSoup(html, PARSER_BACKEND, parse_only=strainer)
+
+def get_soup(url: str) -> BeautifulSoup:
+    return make_soup(fetch_html(url))
+
+# Etiqueta "pagina" de las métricas de parseo
+PARSE_PAGES = {"parse_ciclos_soup": "familia", "parse_info_ciclo_soup": "ciclo", "parse_modulo_soup": "modulo"}
+
+def parse_html(html: str, parse: Callable[..., Any], *args, strainer: Optional[SoupStrainer] = None) -> Any:
+    """parse(soup, *args) sobre el árbol de `html`; en --low-memory el árbol se destruye al terminar.
+
+    Los nodos de BeautifulSoup se apuntan entre sí (parent/next_element), así que
+    sin decompose() el árbol sólo se libera cuando pasa el recolector de ciclos.
+    """
+    pagina = PARSE_PAGES.get(parse.__name__, parse.__name__)
+    with metrics.timer("scraper_soup_seconds", pagina=pagina):
+        soup = make_soup(html, strainer)
+    try:
+        with metrics.timer("scraper_extract_seconds", pagina=pagina):
+            return parse(soup, *args)
+    finally:
+        if low_memory:
+            soup.decompose()
+
+# ================== Memoria ==================
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def check_memory() -> None:
+    if MAX_RSS_MB is not None and peak_rss_mb() > MAX_RSS_MB:
+        raise SystemExit(f"❌ Pico de RSS {peak_rss_mb():.0f} MB por encima de --max-rss {MAX_RSS_MB:.0f} MB; "
+                         "crawl abortado (con --frontier se reanuda donde se quedó)")
+
+def familia_url(familia: str) -> str:
+    return f"{BASE}/awc/public/pages/familias/ciclos.php?familia={familia}"
+
 # ================== Scrape: índice de ciclos ==================
 def parse_ciclos_ifc() -> List[Dict[str, str]]:
-    soup = get_soup(FAMILIA_URL)
-    links = soup.find_all("a", href=re.compile(r"info_ciclo\.php\?codciclo=IFC\d+"))
+    return parse_ciclos(FAMILIA_URL)
+
+def parse_ciclos(fam_url: str) -> List[Dict[str, str]]:
+    return parse_html(fetch_html(fam_url), parse_ciclos_soup, fam_url)
+
+# Cabeceras que abren una sección de nivel en la página de familia
+NIVEL_HEADINGS = ("h1", "h2", "h3", "h4", "h5", "h6", "caption", "legend", "th", "strong", "b")
+
+def nivel_de(texto: str) -> Optional[str]:
+    t = texto.lower()
+    if "básico" in t:
+        return "CFGB"
+    if "grado medio" in t:
+        return "CFGM"
+    if "grado superior" in t:
+        return "CFGS"
+    if "especialización" in t:
+        return "CES"
+    return None
+
+def parse_ciclos_soup(soup: BeautifulSoup, fam_url: str) -> List[Dict[str, str]]:
+    # Un único recorrido en orden de documento: cada enlace hereda el nivel de la
+    # cabecera de sección más cercana que lo precede (Básico/Medio/Superior/Especialización).
+    re_href = re.compile(r"info_ciclo\.php\?codciclo=[A-Z]{3}\d+")
     ciclos = []
-    for a in links:
-        href = (a.get("href") or "").strip()
-        if not href:
+    nivel_actual = None
+    for node in soup.find_all(NIVEL_HEADINGS + ("a",)):
+        if node.name != "a":
+            nivel_actual = nivel_de(node.get_text(" ", strip=True)) or nivel_actual
+            continue
+        href = (node.get("href") or "").strip()
+        if not href or not re_href.search(href):
             continue
-        url = href if href.startswith("http") else urljoin(FAMILIA_URL, href)
-        text = a.get_text(" ", strip=True)
-        m = re.search(r"(IFC\d{3})", text)
+        url = href if href.startswith("http") else urljoin(fam_url, href)
+        text = node.get_text(" ", strip=True)
+        m = re.search(r"([A-Z]{3}\d{3})", text)
         codigo = m.group(1) if m else ""
         nombre = text.replace(codigo, "").strip(" -—·\u00A0")
-        nivel = "Desconocido"
-
-        # Inferir nivel por contexto
-        h_section = a.find_parent()
-        while h_section and h_section.name not in ("body",):
-            if h_section.name in ("section", "div"):
-                hdr = h_section.get_text(" ", strip=True).lower()
-                if "básico" in hdr:
-                    nivel = "CFGB"
-                elif "grado medio" in hdr:
-                    nivel = "CFGM"
-                elif "grado superior" in hdr:
-                    nivel = "CFGS"
-                elif "especialización" in hdr:
-                    nivel = "CES"
-            h_section = h_section.parent
-
-        ciclos.append({"nombre": nombre, "codigo": codigo, "nivel": nivel, "url": url})
+        ciclos.append({"nombre": nombre, "codigo": codigo, "nivel": nivel_actual or "Desconocido", "url": url})
 
     for c in ciclos:
         if c["nivel"] == "Desconocido":
-            if c["codigo"].startswith("IFC2"):
+            metrics.inc("scraper_extract_fallbacks_total", regla="nivel_por_codigo")
+            # XXX2nn = grado medio, XXX3nn = grado superior
+            if c["codigo"][3:4] == "2":
                 c["nivel"] = "CFGM"
-            elif c["codigo"].startswith("IFC3"):
+            elif c["codigo"][3:4] == "3":
                 c["nivel"] = "CFGS"
     return ciclos
 
 # ================== Scrape: detalle de ciclo ==================
 def parse_info_ciclo(ciclo_url: str) -> Dict[str, Any]:
-    soup = get_soup(ciclo_url)
+    return parse_html(fetch_html(ciclo_url), parse_info_ciclo_soup, ciclo_url)
+
+def parse_info_ciclo_soup(soup: BeautifulSoup, ciclo_url: str) -> Dict[str, Any]:
     h2 = soup.find(["h2", "h1"])
     ciclo_nombre = h2.get_text(strip=True) if h2 else ""
-    m = re.search(r"codciclo=(IFC\d{3})", ciclo_url)
+    m = re.search(r"codciclo=([A-Z]{3}\d{3})", ciclo_url)
     ciclo_codigo = m.group(1) if m else ""
 
     modulos = []
@@ -135,15 +452,10 @@ def parse_info_ciclo(ciclo_url: str) -> Dict[str, Any]:
 
                 # fallback: si viene vacío, intenta leer el h1 del módulo
                 if not nombre:
+                    metrics.inc("scraper_extract_fallbacks_total", regla="nombre_desde_h1")
                     try:
-                        mod_soup = get_soup(url)
-                        h1m = mod_soup.find(["h1", "h2"])
-                        titulo_m = h1m.get_text(" ", strip=True) if h1m else ""
-                        m2 = re.match(r"^\s*([0-9]{3,4})\.\s*(.+)$", titulo_m)
-                        if m2:
-                            nombre = m2.group(2).strip()
-                        elif titulo_m:
-                            nombre = titulo_m.strip()
+                        # el módulo queda parseado: parse_modulo() no vuelve a descargarlo
+                        nombre = modulo_pagina(url, wait=False).nombre.strip()
                     except Exception:
                         pass
                 if not nombre:
@@ -176,9 +488,232 @@ def parse_info_ciclo(ciclo_url: str) -> Dict[str, Any]:
 
 
 # ================== Scrape: módulo (RA/CE) ==================
+# Los mismos tipos de texto que get_text() considera por defecto (ni comentarios ni <script>)
+_TEXT_TYPES = (NavigableString, CData)
+
+# Extracción de RA/CE sin regex con backtracking: cada función recorre el texto hacia
+# delante con str.find() y sólo mira hacia atrás dentro de la etiqueta que acaba de
+# encontrar, así que el coste es lineal en la longitud del bloque, también en los div
+# contenedores que llevan la página entera. Reproducen exactamente lo que hacían los
+# patrones anteriores (ver scripts/check_ra_ce_extractor.py).
+
+# re.I compara carácter a carácter con lower(), salvo tres letras que iguala a i/s
+# y lower() no; así el texto plegado tiene la misma longitud y los mismos índices
+CE_LETRAS = frozenset("abcdefghijklmnopqrstuvwxyzñ")
+RA_SEPARADORES = ":.-\u2013"
+
+def fold(s: str) -> str:
+    # replace() casi no cuesta cuando no aparecen, que es siempre; translate() sí
+    return s.replace("\u0130", "i").replace("\u0131", "i").replace("\u017f", "s").lower()
+
+def _es_palabra(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+def _fin_espacios(t: str, i: int) -> int:
+    n = len(t)
+    while i < n and t[i].isspace():
+        i += 1
+    return i
+
+def _fin_digitos(t: str, i: int) -> int:
+    n = len(t)
+    while i < n and t[i].isdecimal():
+        i += 1
+    return i
+
+def ra_headers(t: str) -> Iterator[Tuple[int, int, int]]:
+    """(inicio, fin, número) de cada cabecera «RA3», «(RA 03):», «RA3 –»… de t, sin solaparse.
+
+    Cabecera: «RA» como inicio de palabra (opcionalmente tras «(»), espacios, ceros,
+    el número y fin de palabra; se comen además «)» y un separador «: . - –».
+    """
+    f = fold(t)
+    n = len(t)
+    pos = 0
+    p = f.find("ra")
+    while p >= 0:
+        if p == 0 or not _es_palabra(t[p - 1]):
+            z = _fin_espacios(t, p + 2)
+            while z < n and t[z] == "0":
+                z += 1
+            if z < n and "1" <= t[z] <= "9":
+                e = _fin_digitos(t, z + 1)
+                if e == n or not _es_palabra(t[e]):
+                    ini = p - 1 if p > pos and t[p - 1] == "(" else p
+                    fin = e + 1 if e < n and t[e] == ")" else e
+                    k = _fin_espacios(t, fin)
+                    if k < n and t[k] in RA_SEPARADORES:
+                        fin = k + 1
+                    yield ini, fin, int(t[z:e])
+                    pos = fin
+                    p = f.find("ra", fin)
+                    continue
+        p = f.find("ra", p + 1)
+
+def find_ra_header(t: str) -> Optional[int]:
+    """Número de la primera cabecera RA de t, o None."""
+    for _, _, num in ra_headers(t):
+        return num
+    return None
+
+def strip_ra_headers(t: str) -> str:
+    """t sin ninguna de sus cabeceras RA."""
+    partes, pos = [], 0
+    for ini, fin, _ in ra_headers(t):
+        partes.append(t[pos:ini])
+        pos = fin
+    partes.append(t[pos:])
+    return "".join(partes)
+
+def _siguiente_vineta(t: str, f: str, i: int) -> int:
+    """Posición del primer « a) » / « 12) » (espacio, etiqueta, «)», espacio) en t[i:], o len(t).
+
+    Se salta de «)» en «)» y se mira hacia atrás sólo la etiqueta, que es única para
+    cada paréntesis: una letra o el tramo entero de dígitos.
+    """
+    n = len(t)
+    k = t.find(")", i)
+    while k >= 0:
+        if k + 1 < n and t[k + 1].isspace() and k >= 2:
+            if f[k - 1] in CE_LETRAS:
+                e = k - 2
+            else:
+                e = k - 1
+                while e >= 0 and t[e].isdecimal():
+                    e -= 1
+                if e == k - 1:
+                    e = -1
+            if e >= i and t[e].isspace():
+                return e
+        k = t.find(")", k + 1)
+    return n
+
+def match_ce(t: str) -> Optional[Tuple[str, str]]:
+    """(etiqueta, descripción) si t empieza por una viñeta de CE («a) …», «- 3) …», «• ñ) …»).
+
+    La descripción llega hasta la siguiente viñeta del mismo texto o hasta el final
+    (sin el salto de línea final); la etiqueta se devuelve tal cual, sin pasar a minúsculas.
+    """
+    n = len(t)
+    f = fold(t)
+    i = _fin_espacios(t, 1 if t[:1] in ("-", "\u2022") else 0)
+    if i >= n:
+        return None
+    if f[i] in CE_LETRAS:
+        k = i + 1
+    else:
+        k = _fin_digitos(t, i)
+        if k == i:
+            return None
+    if k >= n or t[k] != ")":
+        return None
+    w = _fin_espacios(t, k + 1)
+    if w == n:
+        # viñeta sin texto: la descripción se queda con el último espacio
+        return (t[i:k], t[n - 1]) if w > k + 1 else None
+    fin = _siguiente_vineta(t, f, w + 1)
+    if t.endswith("\n"):
+        fin = min(fin, n - 1)
+    return t[i:k], t[w:fin]
+
+def _recorta_resultados(s: str, f: str) -> int:
+    """Fin del último «resultados de aprendizaje … criterios de evaluación» encadenado desde el principio."""
+    i = 0
+    while True:
+        r = f.find("resultados de aprendizaje", i)
+        if r < 0:
+            return i
+        c = f.find("criterios de evaluación", r + len("resultados de aprendizaje"))
+        if c < 0:
+            return i
+        i = c + len("criterios de evaluación")
+        if i < len(s) and s[i] == " ":
+            i += 1
+
+def _quita_cabecera_modulo(s: str, f: str) -> str:
+    """Quita cada «[0488.] Desarrollo de interfaces … créditos ECTS» (restos de la cabecera del módulo)."""
+    n = len(s)
+    partes, pos = [], 0
+    d = f.find("desarrollo de interfaces")
+    while d >= 0:
+        e = d + len("desarrollo de interfaces")
+        if e < n and _es_palabra(s[e]):
+            d = f.find("desarrollo de interfaces", d + 1)
+            continue
+        # inicio: «0488.» y espacios, o los espacios, o la propia palabra (el que antes encaje en un límite de palabra)
+        w0 = d
+        while w0 > pos and s[w0 - 1].isspace():
+            w0 -= 1
+        q = w0 - 5
+        if not (q >= pos and f[q:w0] == "0488." and (q == 0 or not _es_palabra(s[q - 1]))):
+            if w0 < d and w0 > 0 and _es_palabra(s[w0 - 1]):
+                q = w0
+            elif d == 0 or not _es_palabra(s[d - 1]):
+                q = d
+            else:
+                d = f.find("desarrollo de interfaces", e)
+                continue
+        # fin: el primer «crédito(s) ECTS» que venga detrás
+        c = f.find("crédito", e)
+        fin = -1
+        while c >= 0 and fin < 0:
+            for j in ((c + 8, c + 7) if f.startswith("s", c + 7) else (c + 7,)):
+                j = _fin_espacios(s, j)
+                if f.startswith("ects", j) and (j + 4 == n or not _es_palabra(s[j + 4])):
+                    fin = j + 4
+                    break
+            c = f.find("crédito", c + 1)
+        if fin < 0:
+            break
+        partes.append(s[pos:q])
+        pos = fin
+        d = f.find("desarrollo de interfaces", fin)
+    partes.append(s[pos:])
+    return "".join(partes)
+
+def clean_ra_desc(desc: str) -> str:
+    s = " ".join((desc or "").split())
+    f = fold(s)
+    # recorta todo lo anterior a “Resultados de Aprendizaje… Criterios de evaluación”
+    i = _recorta_resultados(s, f)
+    # corta si aparece la primera viñeta (a) o 1))
+    fin = _siguiente_vineta(s, f, i)
+    s = s[i:fin]
+    # limpia restos comunes
+    s = _quita_cabecera_modulo(s, f[i:fin])
+    return s.strip(" .-–—:")
+
+def block_texts(root, names=("p", "li", "div")) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Recorre el árbol una sola vez y devuelve ([(tag, texto)], textos_sueltos).
+
+    Equivale a [(b.name, b.get_text(" ", strip=True)) for b in root.find_all(names)]
+    pero sin volver a recorrer los descendientes de cada bloque: se recogen todos
+    los textos en orden de documento y cada bloque se queda con su rango [ini, fin).
+    """
+    strings: List[str] = []
+    spans: List[list] = []
+    stack = [(root, False)]
+    while stack:
+        node, closing = stack.pop()
+        if closing:
+            spans[node][2] = len(strings)
+            continue
+        if isinstance(node, NavigableString):
+            if type(node) in _TEXT_TYPES:
+                st = node.strip()
+                if st:
+                    strings.append(st)
+            continue
+        if node is not root and node.name in names:
+            stack.append((len(spans), True))
+            spans.append([node.name, len(strings), None])
+        stack.extend((c, False) for c in reversed(node.contents))
+    return [(name, " ".join(strings[a:b])) for name, a, b in spans], strings
+
 def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint: Optional[str]) -> Modulo:
-    soup = get_soup(mod_url)
+    return para_ciclo(modulo_pagina(mod_url), ciclo_codigo, ciclo_nombre, curso_hint)
 
+def parse_modulo_soup(soup: BeautifulSoup, ciclo_codigo: str, ciclo_nombre: str, curso_hint: Optional[str]) -> Modulo:
     # Cabecera
     h1 = soup.find(["h1", "h2"])
     titulo = h1.get_text(" ", strip=True) if h1 else ""
@@ -186,7 +721,8 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
     modulo_codigo = m.group(1) if m else ""
     modulo_nombre = m.group(2) if m else titulo
 
-    text_all = soup.get_text("\n", strip=True)
+    blocks, strings = block_texts(soup)
+    text_all = "\n".join(strings)
     horas_totales = None
     horas_semanales = None
     creditos = None
@@ -209,30 +745,13 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
             f = float(num)
             creditos = str(int(f)) if abs(f - int(f)) < 1e-6 else str(f)
         except:
+            metrics.inc("scraper_extract_fallbacks_total", regla="creditos_ilegibles")
             creditos = None
 
     # RA y CE
-    re_ra = re.compile(r"\(?\bRA\s*0*([1-9]\d*)\b\)?(?:\s*[:.\-\u2013])?", re.I)
-    re_ce = re.compile(
-        r"^[\-\u2022]?\s*((?:[a-zñ]|\d+))\)\s*(.+?)(?=\s(?:[a-zñ]|\d+)\)\s+|$)",
-        re.I | re.S
-    )
-
-    blocks = list(soup.find_all(['p', 'li', 'div'], recursive=True))
-
     ralist: List[RA] = []
     ra_current: Optional[RA] = None
 
-    def clean_ra_desc(desc: str) -> str:
-        s = re.sub(r"\s+", " ", (desc or "").strip())
-        # recorta todo lo anterior a “Resultados de Aprendizaje…”
-        s = re.sub(r".*?resultados\s+de\s+aprendizaje.*?criterios\s+de\s+evaluación\s*", "", s, flags=re.I)
-        # corta si aparece la primera viñeta (a) o 1))
-        s = re.split(r"\s(?:[a-zñ]|\d+)\)\s+", s, maxsplit=1, flags=re.I)[0]
-        # limpia restos comunes
-        s = re.sub(r"\b(0488\.)?\s*desarrollo de interfaces\b.*?créditos?\s*ects\b", "", s, flags=re.I)
-        return s.strip(" .-–—:")
-
     def finalize_ra():
         nonlocal ra_current
         if ra_current:
@@ -242,6 +761,7 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
             for ce in ra_current.CE:
                 key = (ce.codigo, re.sub(r"\s+", " ", ce.descripcion.strip()))
                 if key in seen:
+                    metrics.inc("scraper_extract_fallbacks_total", regla="ce_duplicado")
                     continue
                 seen.add(key)
                 uniq.append(ce)
@@ -253,36 +773,36 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
 
     i = 0
     while i < len(blocks):
-        t = blocks[i].get_text(" ", strip=True)
+        t = blocks[i][1]
         if not t:
             i += 1
             continue
 
-        mra = re_ra.search(t)
-        if mra:
+        ra_num = find_ra_header(t)
+        if ra_num is not None:
             finalize_ra()
-            ra_num = int(mra.group(1))
-            raw_desc = re_ra.sub("", t).strip(" .-–—:")
+            raw_desc = strip_ra_headers(t).strip(" .-–—:")
             desc = clean_ra_desc(raw_desc)
             ra_current = RA(codigo=f"RA{ra_num}", descripcion=desc, CE=[])
             i += 1
             while i < len(blocks):
-                t2 = blocks[i].get_text(" ", strip=True)
+                t2 = blocks[i][1]
                 if not t2:
                     i += 1
                     continue
-                if re_ra.search(t2):
+                if find_ra_header(t2) is not None:
                     break
-                mce = re_ce.match(t2)
+                mce = match_ce(t2)
                 if mce:
-                    etiqueta = mce.group(1).lower()
+                    etiqueta = mce[0].lower()
                     idx = int(etiqueta) if etiqueta.isdigit() else (ord(etiqueta) - ord('a') + 1)
                     ra_num_local = int(ra_current.codigo[2:])
                     ce_code = f"CE{ra_num_local}.{idx}"
-                    ce_desc = mce.group(2).strip()
+                    ce_desc = mce[1].strip()
                     ra_current.CE.append(Criterio(codigo=ce_code, descripcion=ce_desc))
                 else:
-                    if blocks[i].name == "li" and len(t2.split()) > 3 and not t2.lower().startswith("total:"):
+                    if blocks[i][0] == "li" and len(t2.split()) > 3 and not t2.lower().startswith("total:"):
+                        metrics.inc("scraper_extract_fallbacks_total", regla="li_sin_etiqueta")
                         next_idx = len(ra_current.CE) + 1
                         ra_num_local = int(ra_current.codigo[2:])
                         ce_code = f"CE{ra_num_local}.{next_idx}"
@@ -304,6 +824,7 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
         if key not in merged:
             merged[key] = RA(codigo=key, descripcion=_norm(ra.descripcion), CE=[])
         else:
+            metrics.inc("scraper_extract_fallbacks_total", regla="ra_duplicado_fusionado")
             # elegir mejor descripción: prioriza no vacía y más corta (suele ser la limpia)
             cand_a = merged[key].descripcion
             cand_b = _norm(ra.descripcion)
@@ -321,7 +842,7 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
     # si hay RA con y sin CEs, nos quedamos con el resultante (que ya tiene todos los CEs fusionados)
     ralist = list(merged.values())
     # ordenar por número
-    ralist.sort(key=lambda r: int(re.search(r"RA(\d+)", r.codigo).group(1)) if re.search(r"RA(\d+)", r.codigo) else 999)
+    ralist.sort(key=lambda r: int(r.codigo[2:]))
 
 
     return Modulo(
@@ -336,80 +857,921 @@ def parse_modulo(mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint:
         RA=ralist
     )
 
+# ================== Manifest incremental ==================
+class ModuloManifest:
+    """(URL del módulo, hash del HTML, PARSER_VERSION) -> Modulo ya parseado.
+
+    Permite saltarse parse_modulo_soup() (y hasta construir el árbol) cuando la
+    página no ha cambiado desde la última ejecución.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.used: set = set()
+        self.reused = 0
+        self.parsed = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("parser_version") == PARSER_VERSION:
+                self.entries = data.get("modulos", {})
+
+    @staticmethod
+    def key(url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint: Optional[str]) -> str:
+        return "|".join([url, ciclo_codigo, ciclo_nombre, curso_hint or ""])
+
+    def get(self, key: str, sha: str) -> Optional[Modulo]:
+        with self._lock:
+            e = self.entries.get(key)
+            if not e or e["sha256"] != sha:
+                return None
+            self.used.add(key)
+            self.reused += 1
+        return modulo_from_dict(e["modulo"])
+
+    def put(self, key: str, sha: str, mod: Modulo) -> None:
+        with self._lock:
+            self.entries[key] = {"sha256": sha, "modulo": asdict(mod)}
+            self.used.add(key)
+            self.parsed += 1
+
+    def save(self) -> None:
+        # sólo se conservan los módulos vistos en esta ejecución
+        data = {
+            "parser_version": PARSER_VERSION,
+            "modulos": {k: v for k, v in self.entries.items() if k in self.used},
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+# Sólo en modo --incremental
+manifest: Optional[ModuloManifest] = None
+
+_profile_lock = threading.Lock()
+_profiled = False
+
+def _profile_parse(mod_url: str, parse: Callable[[], Modulo]) -> Modulo:
+    """Ejecuta parse() bajo el perfilador si es el módulo de --profile-modulo (sólo la primera vez)."""
+    global _profiled
+    if PROFILE_MODULO is None or not re.search(rf"[?&]cod={re.escape(PROFILE_MODULO)}(?:&|$)", mod_url):
+        return parse()
+    with _profile_lock:
+        if _profiled:
+            return parse()
+        _profiled = True
+    out = PROFILE_OUT or f"perfil_{PROFILE_MODULO}.{'html' if PROFILER == 'pyinstrument' else 'prof'}"
+    if PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+        prof = Profiler()
+        prof.start()
+        try:
+            return parse()
+        finally:
+            prof.stop()
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(prof.output_html())
+            print(f"🔬 Perfil de {mod_url} en {out}")
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        return parse()
+    finally:
+        prof.disable()
+        prof.dump_stats(out)
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(15)
+        print(f"🔬 Perfil de {mod_url} en {out} (snakeviz / python -m pstats)\n{buf.getvalue()}")
+
+def parse_modulo_html(html: str, mod_url: str, ciclo_codigo: str, ciclo_nombre: str, curso_hint: Optional[str]) -> Modulo:
+    def parse() -> Modulo:
+        mod = _profile_parse(mod_url, lambda: parse_html(html, parse_modulo_soup, ciclo_codigo, ciclo_nombre,
+                                                         curso_hint, strainer=MODULO_STRAINER))
+        metrics.observe("scraper_modulo_ra", len(mod.RA))
+        metrics.observe("scraper_modulo_ce", sum(len(ra.CE) for ra in mod.RA))
+        return mod
+
+    if manifest is None:
+        return parse()
+    key = ModuloManifest.key(mod_url, ciclo_codigo, ciclo_nombre, curso_hint)
+    sha = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    mod = manifest.get(key, sha)
+    if mod is None:
+        mod = parse()
+        manifest.put(key, sha, mod)
+        metrics.inc("scraper_manifest_total", resultado="parseado")
+    else:
+        metrics.inc("scraper_manifest_total", resultado="reutilizado")
+    return mod
+
+# ================== Single-flight de módulos ==================
+# Un módulo compartido por varios ciclos (FOL, EIE...) se descarga y parsea una vez por ejecución.
+# En --low-memory no se retiene cada Modulo hasta el final (ver reset_flights)
+modulo_flight = SingleFlight("modulo")
+
+def modulo_key(mod_url: str) -> str:
+    # la página (y el código ?cod=) es la misma venga del ciclo que venga: sólo cambia ?ciclo=
+    return normalize_url(mod_url, sin=("ciclo",))
+
+def parse_modulo_pagina(html: str, mod_url: str) -> Modulo:
+    """El módulo tal como sale de su página, sin los datos del ciclo que lo enlaza (ver para_ciclo)."""
+    return parse_modulo_html(html, mod_url, "", "", None)
+
+def para_ciclo(base: Modulo, ciclo_codigo: str, ciclo_nombre: str, curso_hint: Optional[str]) -> Modulo:
+    # las copias comparten la lista de RA: nada la modifica después del parseo
+    return replace(base, ciclo_codigo=ciclo_codigo, ciclo_nombre=ciclo_nombre, curso=curso_hint or base.curso)
+
+def modulo_pagina(mod_url: str, wait: bool = True) -> Modulo:
+    return modulo_flight.do(modulo_key(mod_url), lambda: parse_modulo_pagina(fetch_html(mod_url), mod_url), wait=wait)
+
+def reset_flights() -> None:
+    """Vacía los single-flight (y modulos_fallidos) al empezar un crawl.
+
+    En --low-memory modulo_flight sólo comparte los parseos en curso: con keep=True
+    guardaría todos los Modulo del crawl, justo lo que el modo quiere evitar. A cambio,
+    un módulo común a varios ciclos puede descargarse (o salir de la caché) más de una vez.
+    """
+    modulo_flight.clear()
+    modulo_flight.keep = not low_memory
+    fetch_flight.clear()
+    modulos_fallidos.clear()
+
+def single_flight_report() -> None:
+    saved = modulo_flight.saved + fetch_flight.saved
+    if saved:
+        print(f"🔁 Single-flight: {saved} peticiones ahorradas ({modulo_flight.saved} módulos ya parseados, "
+              f"{fetch_flight.saved} descargas en curso compartidas)")
+
 # ================== Scrape: todo IFC ==================
-def scrape_ifc() -> List[Ciclo]:
-    ciclos_info = parse_ciclos_ifc()
+# sink(modulo, nivel): recibe cada módulo en cuanto se parsea, en lugar de acumularlo en su Ciclo.
+# Si además tiene un método ciclo(Ciclo), se le avisa al cerrar cada ciclo (también si no tiene módulos)
+ModuloSink = Callable[[Modulo, str], None]
+
+# ciclo -> [(posición en el ciclo, código, nombre)] de los módulos que fallaron en el último crawl;
+# --incremental conserva para ellos la versión anterior (ver merge_ciclos)
+modulos_fallidos: Dict[str, List[Tuple[int, str, str]]] = {}
+
+def _modulo_fallido(ciclo_codigo: str, pos: int, m: Dict[str, Any], e: Exception) -> None:
+    metrics.inc("scraper_modulo_errors_total")
+    print(f"      ! Error al parsear módulo {m.get('codigo','?')} -> {e}")
+    modulos_fallidos.setdefault(ciclo_codigo, []).append((pos, m.get("codigo") or "", m.get("nombre") or ""))
+
+def _collect(mods: List[Modulo], mod: Modulo, nivel: str, sink: Optional[ModuloSink]) -> None:
+    if sink is None:
+        mods.append(mod)
+    else:
+        sink(mod, nivel)
+    check_memory()
+
+def _close_ciclo(ciclos: List[Ciclo], ciclo: Ciclo, sink: Optional[ModuloSink]) -> None:
+    ciclos.append(ciclo)
+    cierre = getattr(sink, "ciclo", None)
+    if cierre is not None:
+        cierre(ciclo)
+
+def scrape_ifc(concurrency: int = 1, sink: Optional[ModuloSink] = None) -> List[Ciclo]:
+    reset_flights()
+    if concurrency > 1:
+        return _scrape_ifc_concurrente(concurrency, sink)
     ciclos: List[Ciclo] = []
-    for c in ciclos_info:
+    for orden, c in shard_ciclos(parse_ciclos_ifc()):
         print(f"[+] Ciclo: {c['nombre']} ({c['codigo']}) - {c['nivel']}")
-        time.sleep(SLEEP[0])
+        pause(0)
         inf = parse_info_ciclo(c["url"])
         mods: List[Modulo] = []
-        for m in inf["modulos"]:
+        for pos, m in enumerate(inf["modulos"]):
             print(f"    - Módulo: {m['codigo']} {m['nombre']} [{m['curso']}]")
-            time.sleep(SLEEP[0])
+            # sin descarga no hace falta pausa
+            descarga = not modulo_flight.known(modulo_key(m["url"]))
+            if descarga:
+                pause(0)
+            revalidadas = cache_stats["revalidated"]
             try:
                 mod = parse_modulo(m["url"], inf["ciclo_codigo"], inf["ciclo_nombre"], m["curso"])
-                mods.append(mod)
+                _collect(mods, mod, c["nivel"], sink)
             except Exception as e:
-                print(f"      ! Error al parsear módulo {m.get('codigo','?')} -> {e}")
-            time.sleep(SLEEP[1])
-        ciclos.append(Ciclo(
+                _modulo_fallido(inf["ciclo_codigo"], pos, m, e)
+            # un 304 (--cache, --incremental) no le ha costado nada al servidor: sin pausa larga
+            if descarga and cache_stats["revalidated"] == revalidadas:
+                pause(1)
+        _close_ciclo(ciclos, Ciclo(
             codigo=inf["ciclo_codigo"],
             nombre=inf["ciclo_nombre"],
             nivel=c["nivel"],
-            modulos=mods
-        ))
+            modulos=mods,
+            orden=(0, orden)
+        ), sink)
+    single_flight_report()
+    return ciclos
+
+@contextmanager
+def concurrent_pipeline(concurrency: int):
+    """Pool de `concurrency` descargas (token bucket por host) + un único hilo de parseo.
+
+    Devuelve submit(url, parse, *args): descarga `url` en el pool y encadena
+    parse(html, *args) en el hilo de parseo, de modo que parsear nunca bloquea una
+    descarga. submit() devuelve un futuro cuyo resultado es el futuro del parseo.
+    """
+    global rate_limiter
+    rate_limiter = TokenBucket(RATE, burst=concurrency)
+    mount_adapters(pool_maxsize=concurrency)
+    # En --low-memory las descargas no pueden adelantarse al parseo más de 2x concurrency
+    # páginas: si no, todo el HTML descargado espera en la cola del hilo de parseo.
+    en_vuelo = threading.BoundedSemaphore(concurrency * 2) if low_memory else None
+    try:
+        with ThreadPoolExecutor(concurrency) as descargas, ThreadPoolExecutor(1) as parseo:
+            def parse_and_release(parse, html, *args):
+                try:
+                    return parse(html, *args)
+                finally:
+                    en_vuelo.release()
+
+            def pipeline(url, parse, *args):
+                if en_vuelo is None:
+                    return parseo.submit(parse, fetch_html(url), *args)
+                en_vuelo.acquire()
+                try:
+                    html = fetch_html(url)
+                except BaseException:
+                    en_vuelo.release()
+                    raise
+                return parseo.submit(parse_and_release, parse, html, *args)
+
+            def submit(url, parse, *args):
+                return descargas.submit(pipeline, url, parse, *args)
+
+            yield submit
+    finally:
+        rate_limiter = None
+
+def _parse_info_html(html: str, url: str) -> Dict[str, Any]:
+    return parse_html(html, parse_info_ciclo_soup, url)
+
+def submit_modulo(submit, url: str) -> Future:
+    """Futuro del Modulo de la página por el pipeline `submit` de concurrent_pipeline();
+    si ya está pedida (modulo_flight), el de la primera petición."""
+    key = modulo_key(url)
+    fut, owner = modulo_flight.claim(key)
+    if not owner:
+        return modulo_flight.share(fut)
+
+    def settle(parsed: Future) -> None:
+        e = parsed.exception()
+        modulo_flight.resolve(key, fut, None if e else parsed.result(), e)
+
+    def downloaded(d: Future) -> None:
+        e = d.exception()
+        if e:
+            modulo_flight.resolve(key, fut, exc=e)
+        else:
+            d.result().add_done_callback(settle)
+
+    submit(url, parse_modulo_pagina, url).add_done_callback(downloaded)
+    return fut
+
+def _scrape_ifc_concurrente(concurrency: int, sink: Optional[ModuloSink] = None) -> List[Ciclo]:
+    """Igual que scrape_ifc() pero con `concurrency` descargas en paralelo.
+
+    Los resultados se recogen en el orden original, así que la salida es idéntica
+    a la del modo secuencial.
+    """
+    with concurrent_pipeline(concurrency) as submit:
+        ciclos_info = shard_ciclos(parse_ciclos_ifc())
+        infos = [submit(c["url"], _parse_info_html, c["url"]) for _, c in ciclos_info]
+        pendientes = []
+        for (orden, c), fut in zip(ciclos_info, infos):
+            inf = fut.result().result()
+            mods = [(m, submit_modulo(submit, m["url"])) for m in inf["modulos"]]
+            pendientes.append((orden, c, inf, mods))
+
+        ciclos: List[Ciclo] = []
+        # se sueltan los futuros de cada ciclo al emitirlo: un Modulo compartido vive
+        # hasta que sale el último ciclo que lo enlaza
+        pendientes = deque(pendientes)
+        while pendientes:
+            orden, c, inf, mods_fut = pendientes.popleft()
+            print(f"[+] Ciclo: {c['nombre']} ({c['codigo']}) - {c['nivel']}")
+            mods: List[Modulo] = []
+            for pos, (m, fut) in enumerate(mods_fut):
+                print(f"    - Módulo: {m['codigo']} {m['nombre']} [{m['curso']}]")
+                try:
+                    mod = para_ciclo(fut.result(), inf["ciclo_codigo"], inf["ciclo_nombre"], m["curso"])
+                    _collect(mods, mod, c["nivel"], sink)
+                except Exception as e:
+                    _modulo_fallido(inf["ciclo_codigo"], pos, m, e)
+            _close_ciclo(ciclos, Ciclo(
+                codigo=inf["ciclo_codigo"],
+                nombre=inf["ciclo_nombre"],
+                nivel=c["nivel"],
+                modulos=mods,
+                orden=(0, orden)
+            ), sink)
+    single_flight_report()
+    return ciclos
+
+# ================== Scrape: todas las familias (reanudable) ==================
+def _parse_frontier_html(html: str, kind: str, url: str, meta: Dict[str, Any]):
+    """Devuelve (resultado, hijos) de una fila de la frontier; hijos = [(kind, url, meta)]."""
+    if kind == "familia":
+        ciclos = parse_html(html, parse_ciclos_soup, url)
+        return None, [("ciclo", c["url"], dict(c, orden=i)) for i, c in shard_ciclos(ciclos)]
+    if kind == "ciclo":
+        inf = parse_html(html, parse_info_ciclo_soup, url)
+        hijos = [
+            ("modulo", m["url"], dict(m, ciclo_codigo=inf["ciclo_codigo"], ciclo_nombre=inf["ciclo_nombre"]))
+            for m in inf["modulos"]
+        ]
+        return {"ciclo_codigo": inf["ciclo_codigo"], "ciclo_nombre": inf["ciclo_nombre"]}, hijos
+    raise ValueError(f"Las filas '{kind}' van por _frontier_modulo()")
+
+def _frontier_modulo(base: Modulo, meta: Dict[str, Any]):
+    """(resultado, hijos) de una fila de módulo a partir de la página ya parseada (modulo_flight):
+    cada ciclo que enlaza el módulo (FOL, EIE...) tiene su fila, pero la página se baja una vez."""
+    return asdict(para_ciclo(base, meta["ciclo_codigo"], meta["ciclo_nombre"], meta["curso"])), []
+
+def _log_frontier_row(row, meta: Dict[str, Any]) -> None:
+    if row["kind"] == "familia":
+        print(f"[+] Familia: {meta['familia']}")
+    elif row["kind"] == "ciclo":
+        print(f"[+] Ciclo: {meta['nombre']} ({meta['codigo']}) - {meta['nivel']}")
+    else:
+        print(f"    - Módulo: {meta['codigo']} {meta['nombre']} [{meta['curso']}] ({meta['ciclo_codigo']})")
+
+def crawl_familias(frontier: Frontier, familias: List[str], concurrency: int = 1,
+                   sink: Optional[ModuloSink] = None) -> List[Ciclo]:
+    """Crawl de varias familias guiado por una frontier SQLite.
+
+    Cada página terminada se guarda en la frontier en cuanto se parsea, así que
+    si el proceso muere basta con relanzarlo con la misma frontier para seguir
+    donde se quedó.
+    """
+    reset_flights()
+    for fam in familias:
+        frontier.seed("familia", familia_url(fam), {"familia": fam})
+
+    def checkpoint(row, meta, parse_result):
+        _log_frontier_row(row, meta)
+        try:
+            result, hijos = parse_result()
+        except Exception as e:
+            metrics.inc("scraper_frontier_errors_total", pagina=row["kind"])
+            print(f"      ! Error en {row['kind']} {row['url']} -> {e}")
+            frontier.fail(row["id"], str(e))
+        else:
+            frontier.complete(row["id"], result, hijos)
+        check_memory()
+
+    if concurrency > 1:
+        with concurrent_pipeline(concurrency) as submit:
+            while True:
+                batch = frontier.pending(limit=concurrency * 4)
+                if not batch:
+                    break
+                # varias filas de módulo pueden compartir el mismo futuro
+                futs: Dict[Future, List[Tuple[Any, Dict[str, Any]]]] = {}
+                for row in batch:
+                    meta = json.loads(row["meta"])
+                    if row["kind"] == "modulo":
+                        # futuro del Modulo (compartido), no del parseo
+                        fut = submit_modulo(submit, row["url"])
+                    else:
+                        fut = submit(row["url"], _parse_frontier_html, row["kind"], row["url"], meta)
+                    futs.setdefault(fut, []).append((row, meta))
+                for fut in as_completed(futs):
+                    for row, meta in futs[fut]:
+                        if row["kind"] == "modulo":
+                            checkpoint(row, meta, lambda: _frontier_modulo(fut.result(), meta))
+                        else:
+                            checkpoint(row, meta, lambda: fut.result().result())
+    else:
+        while True:
+            batch = frontier.pending()
+            if not batch:
+                break
+            for row in batch:
+                meta = json.loads(row["meta"])
+                if row["kind"] == "modulo":
+                    # sin descarga no hace falta pausa
+                    if not modulo_flight.known(modulo_key(row["url"])):
+                        pause(0)
+                    checkpoint(row, meta, lambda: _frontier_modulo(modulo_pagina(row["url"]), meta))
+                    continue
+                pause(0)
+                checkpoint(row, meta, lambda: _parse_frontier_html(fetch_html(row["url"]), row["kind"], row["url"], meta))
+
+    print(f"[=] Frontier: {frontier.stats()}")
+    single_flight_report()
+    return frontier_ciclos(frontier, sink)
+
+def frontier_ciclos(frontier: Frontier, sink: Optional[ModuloSink] = None) -> List[Ciclo]:
+    """Reconstruye familia -> ciclo -> módulo (en orden de descubrimiento) desde la frontier."""
+    ciclos: List[Ciclo] = []
+    for k, fam in enumerate(frontier.children(0, "familia")):
+        for j, c in enumerate(frontier.children(fam["id"], "ciclo")):
+            if c["status"] != "done":
+                continue
+            inf = json.loads(c["result"])
+            meta = json.loads(c["meta"])
+            nivel = meta["nivel"]
+            mods: List[Modulo] = []
+            for pos, m in enumerate(frontier.children(c["id"], "modulo")):
+                if m["status"] == "done":
+                    _collect(mods, modulo_from_dict(json.loads(m["result"])), nivel, sink)
+                else:
+                    modulos_fallidos.setdefault(inf["ciclo_codigo"], []).append(
+                        (pos, *(json.loads(m["meta"]).get(k) or "" for k in ("codigo", "nombre"))))
+            _close_ciclo(ciclos, Ciclo(
+                codigo=inf["ciclo_codigo"],
+                nombre=inf["ciclo_nombre"],
+                nivel=nivel,
+                modulos=mods,
+                # frontiers de antes de --shard no guardan "orden": sin filtrar coincide con j
+                orden=(k, meta.get("orden", j))
+            ), sink)
     return ciclos
 
 # ================== Transformación a MODELO CORRECTO (legacy) ==================
+def legacy_record(m: Modulo) -> Optional[Dict[str, Any]]:
+    """Un módulo en esquema legacy (None si le falta código o nombre)."""
+    def norm(s): return (s or "").strip()
+    if not norm(m.codigo) or not norm(m.nombre):
+        return None
+    return {
+        "id": norm(m.codigo),
+        "nombre": norm(m.nombre),
+        "creditos": (m.creditos if m.creditos is not None else None),
+        "descripcion": {
+            "duracion": (f"{m.horas_totales}h" if m.horas_totales is not None else None),
+            "centro": None,
+            "empresa": None
+        },
+        "CE": [],
+        "RA": [
+            {
+                "codigo": ra.codigo,
+                "descripcion": ra.descripcion,
+                "CE": [asdict(ce) for ce in ra.CE]
+            } for ra in m.RA
+        ]
+    }
+
+def legacy_key(a: Dict[str, Any]) -> str:
+    """Clave con la que to_legacy() desambigua: mismo código con otro nombre es otra asignatura."""
+    return f"{a['id']}::{a['nombre'].lower()}"
+
+class LegacyBuilder:
+    """Versión incremental de to_legacy(): se le van dando módulos uno a uno.
+
+    Desambigua duplicados por (id, nombre) quedándose con el que más RA/CE tenga
+    (el primero en caso de empate) y ordena por id numérico. Con `ref` sólo guarda
+    esa referencia (p. ej. el offset del registro en un NDJSON) en lugar del
+    registro legacy, para que la memoria no crezca con el tamaño del catálogo.
+    """
+
+    def __init__(self):
+        self.by_key: Dict[str, Tuple[int, Any, Tuple[int, str]]] = {}
+
+    @staticmethod
+    def score(a: Dict[str, Any]) -> int:
+        return len(a.get("RA", [])) + sum(len(x.get("CE", [])) for x in a.get("RA", []))
+
+    def add(self, m: Modulo, ref: Any = None) -> None:
+        a = legacy_record(m)
+        if a is None:
+            return
+        k = legacy_key(a)
+        sc = self.score(a)
+        prev = self.by_key.get(k)
+        if (not prev) or sc > prev[0]:
+            sort_key = (int(a["id"]) if a["id"].isdigit() else 99999, a["nombre"])
+            self.by_key[k] = (sc, a if ref is None else ref, sort_key)
+
+    def result(self) -> List[Any]:
+        return [v[1] for v in sorted(self.by_key.values(), key=lambda v: v[2])]
+
 def to_legacy(ciclos: List[Ciclo]) -> List[Dict[str, Any]]:
     """Convierte ciclos->módulos a lista plana de asignaturas con esquema legacy."""
-    def norm(s): return (s or "").strip()
-    legacy = []
+    builder = LegacyBuilder()
     for c in ciclos:
         for m in c.modulos:
-            if not norm(m.codigo) or not norm(m.nombre):
-                continue
-            legacy.append({
-                "id": norm(m.codigo),
-                "nombre": norm(m.nombre),
-                "creditos": (m.creditos if m.creditos is not None else None),
-                "descripcion": {
-                    "duracion": (f"{m.horas_totales}h" if m.horas_totales is not None else None),
-                    "centro": None,
-                    "empresa": None
-                },
-                "CE": [],
-                "RA": [
-                    {
-                        "codigo": ra.codigo,
-                        "descripcion": ra.descripcion,
-                        "CE": [asdict(ce) for ce in ra.CE]
-                    } for ra in m.RA
-                ]
-            })
-    # Desambiguar duplicados por (id,nombre): nos quedamos con el que más RA/CE tenga
-    by_key: Dict[str, Dict[str, Any]] = {}
-    def score(a):
-        return len(a.get("RA", [])) + sum(len(x.get("CE", [])) for x in a.get("RA", []))
-    for a in legacy:
-        k = f"{a['id']}::{a['nombre'].lower()}"
-        prev = by_key.get(k)
-        if (not prev) or score(a) > score(prev):
-            by_key[k] = a
-    deduped = list(by_key.values())
-    deduped.sort(key=lambda x: (int(x["id"]) if x["id"].isdigit() else 99999, x["nombre"]))
-    return deduped
+            builder.add(m)
+    return builder.result()
+
+# ================== Salida en streaming (NDJSON) ==================
+def write_json_array(f: TextIO, items: Iterable[Any]) -> int:
+    """Escribe una lista JSON elemento a elemento; mismos bytes que json.dump(list, indent=2)."""
+    n = 0
+    for item in items:
+        f.write("[\n  " if n == 0 else ",\n  ")
+        f.write(json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+        n += 1
+    f.write("\n]" if n else "[]")
+    return n
+
+class NdjsonSink:
+    """Escribe cada Modulo como una línea JSON en cuanto se parsea.
+
+    Tras los módulos de cada ciclo va una línea de cierre {"tipo": "ciclo", ...}, así
+    que los ciclos sin módulos también quedan en el NDJSON. Sólo se queda en memoria
+    el índice de LegacyBuilder (clave -> offset de la línea); el legacy final se
+    genera releyendo esas líneas del propio NDJSON.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, "w", encoding="utf-8", newline="\n")
+        self.legacy = LegacyBuilder()
+        self.count = 0
+
+    def __call__(self, mod: Modulo, nivel: str) -> None:
+        rec = asdict(mod)
+        rec["nivel"] = nivel
+        offset = self.f.tell()
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.f.flush()
+        self.legacy.add(mod, ref=offset)
+        self.count += 1
+
+    def ciclo(self, c: Ciclo) -> None:
+        rec = {"tipo": "ciclo", "ciclo": c.nombre, "codigo": c.codigo, "nivel": c.nivel, "orden": list(c.orden)}
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def close(self) -> None:
+        self.f.close()
+
+def es_cierre_ciclo(rec: Dict[str, Any]) -> bool:
+    return rec.get("tipo") == "ciclo"
+
+def iter_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_ciclos_ndjson(path: str) -> Iterator[Dict[str, Any]]:
+    """Ciclos del NDJSON en orden, como en ifc_catedu.json más su "orden" (None si no consta).
+
+    Cada ciclo son los módulos que preceden a su línea de cierre. Los NDJSON de antes
+    de las líneas de cierre se agrupan por ciclo_codigo (ahí los ciclos vacíos no constan).
+    """
+    mods: List[Dict[str, Any]] = []
+
+    def ciclo(rec: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "orden": rec.get("orden"),
+            "ciclo": rec["ciclo"],
+            "codigo": rec["codigo"],
+            "nivel": rec["nivel"],
+            "modulos": [asdict(modulo_from_dict(r)) for r in mods],
+        }
+
+    def sin_cierre() -> Dict[str, Any]:
+        return ciclo({"ciclo": mods[0]["ciclo_nombre"], "codigo": mods[0]["ciclo_codigo"], "nivel": mods[0]["nivel"]})
+
+    for rec in iter_ndjson(path):
+        if es_cierre_ciclo(rec):
+            yield ciclo(rec)
+            mods = []
+            continue
+        if mods and rec["ciclo_codigo"] != mods[0]["ciclo_codigo"]:
+            yield sin_cierre()
+            mods = []
+        mods.append(rec)
+    if mods:
+        yield sin_cierre()
+
+def legacy_from_ndjson(path: str) -> LegacyBuilder:
+    builder = LegacyBuilder()
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                if not es_cierre_ciclo(rec):
+                    builder.add(modulo_from_dict(rec), ref=offset)
+            offset += len(line)
+    return builder
+
+def write_legacy_from_ndjson(ndjson_path: str, builder: LegacyBuilder, out_path: str) -> int:
+    with open(ndjson_path, "rb") as src, open(out_path, "w", encoding="utf-8") as out:
+        def registros():
+            for offset in builder.result():
+                src.seek(offset)
+                yield legacy_record(modulo_from_dict(json.loads(src.readline())))
+        return write_json_array(out, registros())
+
+def write_ifc_from_ndjson(ndjson_path: str, out_path: str) -> int:
+    """ifc_catedu.json a partir del NDJSON (los módulos de cada ciclo van seguidos)."""
+    def ciclos():
+        for c in iter_ciclos_ndjson(ndjson_path):
+            del c["orden"]
+            yield c
+    with open(out_path, "w", encoding="utf-8") as out:
+        return write_json_array(out, ciclos())
+
+# ================== Shards (--shard i/N) ==================
+# Cada proceso (o máquina) scrapea los ciclos de su shard y deja una salida parcial:
+# una cabecera JSON y después un ciclo por línea (formato ifc_catedu.json + "orden").
+# --merge-shards junta las N parciales en el orden del crawl completo y pasa los
+# módulos por LegacyBuilder en ese mismo orden, así que ifc_catedu.json y
+# asignaturas_FP.json salen idénticos a los de un único proceso, sea cual sea N.
+def shard_of(codigo: str, n: int) -> int:
+    """Shard de un ciclo; estable entre procesos y máquinas (hash() cambia con PYTHONHASHSEED)."""
+    return int.from_bytes(hashlib.sha1(codigo.encode("utf-8")).digest()[:8], "big") % n
+
+def shard_ciclos(ciclos_info: List[Dict[str, str]]) -> List[Tuple[int, Dict[str, str]]]:
+    """(posición en el listado, ciclo) de los ciclos que tocan a este proceso."""
+    return [(i, c) for i, c in enumerate(ciclos_info) if SHARD is None or shard_of(c["codigo"], SHARD[1]) == SHARD[0]]
+
+def parse_shard_arg(s: str) -> Tuple[int, int]:
+    m = re.fullmatch(r"(\d+)/(\d+)", s.strip())
+    if not m or not 0 <= int(m.group(1)) < int(m.group(2)):
+        raise argparse.ArgumentTypeError(f"'{s}': tiene que ser i/N con 0 <= i < N (p. ej. 0/4)")
+    return int(m.group(1)), int(m.group(2))
+
+def shard_path(ifc_out: str, shard: Tuple[int, int]) -> str:
+    """ifc_catedu.json -> ifc_catedu.shard0-4.ndjson"""
+    return f"{os.path.splitext(ifc_out)[0]}.shard{shard[0]}-{shard[1]}.ndjson"
+
+def ciclos_shard_json(ciclos: List[Ciclo]) -> Iterator[Dict[str, Any]]:
+    for c, d in zip(ciclos, ciclos_to_json(ciclos)):
+        yield {"orden": list(c.orden), **d}
+
+def ciclos_shard_ndjson(ndjson_path: str) -> Iterator[Dict[str, Any]]:
+    """Como ciclos_shard_json() pero desde el NDJSON del crawl (en streaming los Ciclo llegan vacíos)."""
+    return iter_ciclos_ndjson(ndjson_path)
+
+def write_shard(path: str, shard: Tuple[int, int], familias: List[str], ciclos: Iterable[Dict[str, Any]]) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps({"shard": list(shard), "familias": familias}) + "\n")
+        for c in ciclos:
+            f.write(json.dumps(c, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+def _iter_shard(f: TextIO) -> Iterator[Dict[str, Any]]:
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def merge_shards(paths: List[str], ifc_out: str, legacy_out: str) -> Tuple[int, int]:
+    """Fusiona las salidas parciales de los N shards; devuelve (ciclos, asignaturas).
+
+    Cada parcial ya viene en orden de crawl, así que basta una mezcla de N vías
+    (heapq.merge) leyendo cada fichero una sola vez, sin cargar ninguno entero.
+    """
+    files = [open(p, "r", encoding="utf-8") for p in paths]
+    try:
+        cabeceras = [json.loads(f.readline() or "{}") for f in files]
+        for p, cab in zip(paths, cabeceras):
+            if "shard" not in cab:
+                raise ValueError(f"'{p}' no es una salida de --shard")
+        n = cabeceras[0]["shard"][1]
+        if any(cab["shard"][1] != n for cab in cabeceras):
+            raise ValueError("Los parciales son de particiones distintas (N no coincide)")
+        if any(cab["familias"] != cabeceras[0]["familias"] for cab in cabeceras):
+            raise ValueError("Los parciales son de familias distintas")
+        vistos = Counter(cab["shard"][0] for cab in cabeceras)
+        faltan = [i for i in range(n) if not vistos[i]]
+        repetidos = [i for i, k in vistos.items() if k > 1]
+        if faltan or repetidos:
+            raise ValueError(f"Shards de {n}: faltan {faltan or '-'}, repetidos {repetidos or '-'}")
+
+        builder = LegacyBuilder()
+        def ciclos():
+            for c in heapq.merge(*(_iter_shard(f) for f in files), key=lambda c: c["orden"]):
+                del c["orden"]
+                for m in c["modulos"]:
+                    builder.add(modulo_from_dict(m))
+                yield c
+        with open(ifc_out, "w", encoding="utf-8") as out:
+            n_ciclos = write_json_array(out, ciclos())
+    finally:
+        for f in files:
+            f.close()
+    legacy = builder.result()
+    with open(legacy_out, "w", encoding="utf-8") as out:
+        json.dump(legacy, out, ensure_ascii=False, indent=2)
+    return n_ciclos, len(legacy)
 
 # ================== Main ==================
 if __name__ == "__main__":
-    ciclos = scrape_ifc()
-    # Genera directamente el JSON que TU APP espera
-    asignaturas_legacy = to_legacy(ciclos)
+    ap = argparse.ArgumentParser(description="Scraper de ciclos IFC (CATEDU) -> asignaturas_FP.json (modelo legacy).")
+    ap.add_argument("--concurrency", type=int, default=1,
+                    help="Descargas simultáneas (1 = modo secuencial con pausas fijas)")
+    ap.add_argument("--rate", type=float, default=RATE,
+                    help="Peticiones/segundo por host en modo concurrente")
+    ap.add_argument("--cache-dir", default=CACHE_DIR,
+                    help="Directorio de trabajo: caché HTTP (--cache), frontier, manifest y NDJSON de "
+                         "--low-memory (por defecto <repo>/.cache/catedu)")
+    ap.add_argument("--cache", action="store_true",
+                    help="Guarda las páginas en la caché HTTP de --cache-dir y las revalida con "
+                         "ETag/Last-Modified en lugar de descargarlas enteras")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Descarga todo sin caché en disco (lo que se hace si no se pasa --cache ni --incremental)")
+    ap.add_argument("--offline", action="store_true",
+                    help="Sirve sólo desde la caché HTTP en disco, sin acceder a la red (implica --cache)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Reparsea sólo los módulos cuyo HTML (o PARSER_VERSION) ha cambiado "
+                         "y fusiona el resultado con --ifc-out. Implica --cache: las páginas sin "
+                         "cambios se revalidan (304) sin pausa en lugar de bajarse enteras; con "
+                         "--no-cache se descargan todas y sólo se ahorra el parseo")
+    ap.add_argument("--manifest", default=None,
+                    help="Manifest del modo incremental (por defecto <cache-dir>/manifest.json)")
+    ap.add_argument("--parser", choices=("html.parser", "lxml"), default=PARSER_BACKEND,
+                    help="Backend de BeautifulSoup (lxml es más rápido si está instalado)")
+    ap.add_argument("--ifc-out", default="ifc_catedu.json", help="Salida por ciclos (ifc_catedu.json)")
+    ap.add_argument("--familia", action="append", default=None, metavar="COD",
+                    help="Familia profesional a scrapear (repetible, p. ej. --familia IFC --familia ELE)")
+    ap.add_argument("--todas", action="store_true", help="Scrapea las 26 familias profesionales")
+    ap.add_argument("--frontier", default=None,
+                    help="SQLite con la cola de trabajo reanudable (por defecto <cache-dir>/frontier.sqlite "
+                         "si se usa --familia/--todas)")
+    ap.add_argument("--frontier-reset", action="store_true",
+                    help="Vacía la frontier y empieza el crawl desde cero")
+    ap.add_argument("--ndjson", default=None,
+                    help="Streaming: escribe cada módulo en este NDJSON según se parsea y genera las "
+                         "salidas desde él, con memoria constante")
+    ap.add_argument("--from-ndjson", default=None,
+                    help="No scrapea: regenera ifc_catedu.json y asignaturas_FP.json desde un NDJSON previo")
+    ap.add_argument("--shards", default=None, metavar="DIR",
+                    help="Además, trocea el catálogo por ciclo/módulo con manifest de índices (p. ej. public/catalogo)")
+    ap.add_argument("--search-index", default=None, metavar="DB",
+                    help="Además, construye el índice FTS5 de RA/CE (p. ej. public/catalogo_busqueda.sqlite)")
+    ap.add_argument("--ce-vectors", default=None, metavar="DIR",
+                    help="Además, construye el índice vectorial de CE para comparar actividades (p. ej. public/ce_vectores)")
+    ap.add_argument("--low-memory", action="store_true",
+                    help="Memoria acotada: destruye cada árbol HTML tras extraerlo, limita las descargas "
+                         "pendientes de parsear y escribe los módulos en streaming (--ndjson, por defecto "
+                         "<cache-dir>/modulos.ndjson)")
+    ap.add_argument("--max-rss", type=float, default=None, metavar="MB",
+                    help="Aborta el crawl si el pico de memoria (RSS) supera estos MB")
+    ap.add_argument("--metrics-json", default=None, metavar="PATH",
+                    help="Informe JSON de la ejecución: latencias, bytes, reintentos, caché, tiempos de parseo...")
+    ap.add_argument("--metrics-prom", default=None, metavar="PATH",
+                    help="Las mismas métricas como textfile de Prometheus (node_exporter)")
+    ap.add_argument("--profile-modulo", default=None, metavar="COD",
+                    help="Perfila el parseo del módulo con este código (p. ej. 0485)")
+    ap.add_argument("--profiler", choices=("cprofile", "pyinstrument"), default=PROFILER)
+    ap.add_argument("--profile-out", default=None, metavar="PATH",
+                    help="Fichero del perfil (por defecto perfil_<COD>.prof / .html)")
+    ap.add_argument("--shard", type=parse_shard_arg, default=None, metavar="i/N",
+                    help="Scrapea sólo los ciclos del shard i de N (hash estable del código de ciclo) y "
+                         "deja una salida parcial (--shard-out) para --merge-shards")
+    ap.add_argument("--shard-out", default=None, metavar="PATH",
+                    help="Salida parcial del shard (por defecto <ifc-out>.shard<i>-<N>.ndjson)")
+    ap.add_argument("--merge-shards", nargs="+", default=None, metavar="PARCIAL",
+                    help="No scrapea: fusiona las salidas parciales de los N shards en --ifc-out y "
+                         "asignaturas_FP.json, idénticas a las de un único proceso")
+    ap.add_argument("--base-url", default=BASE,
+                    help="Raíz del sitio de CATEDU (p. ej. el servidor local de scripts/mock_catedu.py)")
+    args = ap.parse_args()
+    BASE = args.base_url.rstrip("/")
+    FAMILIA_URL = familia_url("IFC")
+    if args.profiler == "pyinstrument" and args.profile_modulo:
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            ap.error("--profiler pyinstrument necesita el paquete pyinstrument (pip install pyinstrument)")
+    PROFILE_MODULO, PROFILER, PROFILE_OUT = args.profile_modulo, args.profiler, args.profile_out
+
+    def export_metrics() -> None:
+        for resultado, n in cache_stats.items():
+            metrics.inc("scraper_cache_total", n, resultado=resultado)
+        metrics.set("scraper_peak_rss_bytes", peak_rss_mb() * 1024 * 1024)
+        metrics.set("scraper_run_seconds", time.time() - metrics.started)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+
+    # también si el crawl se aborta (--max-rss, Ctrl+C...)
+    if args.metrics_json or args.metrics_prom:
+        atexit.register(export_metrics)
+    if args.low_memory and args.incremental:
+        ap.error("--low-memory no se puede combinar con --incremental (el manifest guarda todos los módulos en memoria)")
+    if args.shard and (args.incremental or args.from_ndjson or args.merge_shards):
+        ap.error("--shard no se puede combinar con --incremental, --from-ndjson ni --merge-shards")
+    SHARD = args.shard
+    # varios shards en la misma máquina comparten --cache-dir: frontier y NDJSON propios
+    sufijo = f".shard{SHARD[0]}-{SHARD[1]}" if SHARD else ""
+    if args.low_memory and not (args.ndjson or args.from_ndjson):
+        args.ndjson = os.path.join(args.cache_dir, f"modulos{sufijo}.ndjson")
+        os.makedirs(args.cache_dir, exist_ok=True)
+    low_memory = args.low_memory
+    MAX_RSS_MB = args.max_rss
+    if args.ndjson and args.incremental:
+        ap.error("--ndjson no se puede combinar con --incremental (la fusión necesita ifc_catedu.json en memoria)")
+    RATE = args.rate
+    if args.parser == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            ap.error("--parser lxml necesita el paquete lxml (pip install lxml)")
+    PARSER_BACKEND = args.parser
+    if (args.offline or args.cache) and args.no_cache:
+        ap.error("--cache/--offline usan la caché (no se pueden combinar con --no-cache)")
+    if args.cache or args.offline or (args.incremental and not args.no_cache):
+        enable_http_cache(args.cache_dir, offline_mode=args.offline)
 
     os.makedirs("public", exist_ok=True)
     out_path = os.path.join("public", "asignaturas_FP.json")
+
+    familias = list(FAMILIAS) if args.todas else args.familia
+
+    def crawl(sink: Optional[ModuloSink] = None) -> List[Ciclo]:
+        if not (familias or args.frontier):
+            return scrape_ifc(concurrency=args.concurrency, sink=sink)
+        frontier = Frontier(args.frontier or os.path.join(args.cache_dir, f"frontier{sufijo}.sqlite"))
+        if args.frontier_reset:
+            frontier.reset()
+        try:
+            return crawl_familias(frontier, familias or ["IFC"], concurrency=args.concurrency, sink=sink)
+        finally:
+            frontier.close()
+
+    def post_build(ciclos: Callable[[], Iterable[Ciclo]]) -> None:
+        """Etapas opcionales sobre el catálogo ya escrito (cada una recorre los ciclos de nuevo)."""
+        if args.shards:
+            from catalog_shards import build_shards
+            m = build_shards(ciclos(), args.shards)
+            print(f"🧩 {len(m['ciclos'])} ciclos y {len(m['modulos'])} módulos troceados en {args.shards}")
+        if args.search_index:
+            from catalog_search import build_index
+            st = build_index(ciclos(), args.search_index)
+            print(f"🔎 Índice de búsqueda {args.search_index}: {st['ra']} RA y {st['ce']} CE")
+        if args.ce_vectors:
+            from catalog_vectors import build_index as build_vectors
+            st = build_vectors(ciclos(), args.ce_vectors)
+            print(f"🧮 Índice vectorial {args.ce_vectors}: {st['ce']} CE x {st['dim']}")
+
+    def save_shard(parciales: Iterable[Dict[str, Any]]) -> None:
+        path = args.shard_out or shard_path(args.ifc_out, SHARD)
+        n = write_shard(path, SHARD, familias or ["IFC"], parciales)
+        print(f"🧩 Shard {SHARD[0]}/{SHARD[1]}: {n} ciclos en {path} (júntalos con --merge-shards)")
+        print(f"📈 Pico de memoria (RSS): {peak_rss_mb():.0f} MB")
+        raise SystemExit(0)
+
+    if args.merge_shards:
+        t0 = time.perf_counter()
+        try:
+            n_ciclos, n_asig = merge_shards(args.merge_shards, args.ifc_out, out_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ No se pudieron fusionar los shards: {e}")
+            raise SystemExit(2)
+        print(f"✅ {len(args.merge_shards)} shards fusionados en {(time.perf_counter() - t0) * 1000:.0f} ms: "
+              f"{args.ifc_out} con {n_ciclos} ciclos y {out_path} con {n_asig} asignaturas (modelo legacy).")
+        from catalog_shards import iter_ciclos_json
+        post_build(lambda: iter_ciclos_json(args.ifc_out))
+        raise SystemExit(0)
+
+    ndjson_path = args.from_ndjson or args.ndjson
+    if ndjson_path:
+        if args.from_ndjson:
+            legacy = legacy_from_ndjson(ndjson_path)
+        else:
+            sink = NdjsonSink(ndjson_path)
+            crawl(sink)
+            sink.close()
+            legacy = sink.legacy
+            print(f"📝 {sink.count} módulos en {ndjson_path}")
+            if SHARD:
+                save_shard(ciclos_shard_ndjson(ndjson_path))
+        write_ifc_from_ndjson(ndjson_path, args.ifc_out)
+        n = write_legacy_from_ndjson(ndjson_path, legacy, out_path)
+        print(f"✅ Guardado {out_path} con {n} asignaturas (modelo legacy).")
+        from catalog_shards import iter_ciclos_json
+        post_build(lambda: iter_ciclos_json(args.ifc_out))
+        print(f"📈 Pico de memoria (RSS): {peak_rss_mb():.0f} MB")
+        raise SystemExit(0)
+
+    if args.incremental:
+        manifest = ModuloManifest(args.manifest or os.path.join(args.cache_dir, "manifest.json"))
+
+    ciclos = crawl()
+    if SHARD:
+        save_shard(ciclos_shard_json(ciclos))
+
+    if manifest is not None:
+        manifest.save()
+        print(f"♻️  Incremental: {manifest.reused} módulos reutilizados, {manifest.parsed} reparseados.")
+        if os.path.exists(args.ifc_out):
+            ciclos = merge_ciclos(load_ciclos(args.ifc_out), ciclos, modulos_fallidos)
+
+    with open(args.ifc_out, "w", encoding="utf-8") as f:
+        json.dump(ciclos_to_json(ciclos), f, ensure_ascii=False, indent=2)
+
+    # Genera directamente el JSON que TU APP espera
+    asignaturas_legacy = to_legacy(ciclos)
+
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(asignaturas_legacy, f, ensure_ascii=False, indent=2)
     print(f"✅ Guardado {out_path} con {len(asignaturas_legacy)} asignaturas (modelo legacy).")
+    post_build(lambda: ciclos)
+    print(f"📈 Pico de memoria (RSS): {peak_rss_mb():.0f} MB")
@@ -0,0 +1,196 @@
+"""Contadores e histogramas del scraper, exportables como JSON o textfile de Prometheus.
+
+    metrics.inc("scraper_http_responses_total", status="200")
+    metrics.observe("scraper_fetch_seconds", 0.42, pagina="modulo")
+    with metrics.timer("scraper_parse_seconds", pagina="modulo"):
+        ...
+
+Los nombres siguen las convenciones de Prometheus (_total para contadores, unidad
+en el sufijo). Todo es thread-safe: el pool de descargas y el hilo de parseo
+escriben a la vez.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Límites superiores de los buckets por unidad (el último, +Inf, es implícito)
+BUCKETS = {
+    "seconds": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    "bytes": (1024, 4096, 16384, 65536, 262144, 1048576),
+    "default": (0, 1, 2, 5, 10, 20, 50, 100, 200),
+}
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _buckets_for(name: str) -> Tuple[float, ...]:
+    for unit in ("seconds", "bytes"):
+        if name.endswith("_" + unit):
+            return BUCKETS[unit]
+    return BUCKETS["default"]
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.count += 1
+        self.sum += v
+        self.min = v if self.min is None else min(self.min, v)
+        self.max = v if self.max is None else max(self.max, v)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Aproximación por interpolación lineal dentro del bucket (como histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        acc = 0
+        for i, n in enumerate(self.counts):
+            if acc + n >= rank and n:
+                # el bucket acotado por los valores realmente observados
+                lo = max(self.bounds[i - 1], self.min) if i > 0 else self.min
+                hi = min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+                return lo + (hi - lo) * (rank - acc) / n
+            acc += n
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[LabelKey, float] = {}
+        self.gauges: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        k = _key(name, labels)
+        with self._lock:
+            self.counters[k] = self.counters.get(k, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        k = _key(name, labels)
+        with self._lock:
+            h = self.histograms.get(k)
+            if h is None:
+                h = self.histograms[k] = Histogram(_buckets_for(name))
+            h.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get(_key(name, labels), 0)
+
+    # ---------- Exportación ----------
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            counters: Dict[str, List[Dict[str, Any]]] = {}
+            for (name, labels), v in sorted(self.counters.items()):
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": v})
+            gauges: Dict[str, List[Dict[str, Any]]] = {}
+            for (name, labels), v in sorted(self.gauges.items()):
+                gauges.setdefault(name, []).append({"labels": dict(labels), "value": v})
+            histograms: Dict[str, List[Dict[str, Any]]] = {}
+            for (name, labels), h in sorted(self.histograms.items()):
+                histograms.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "min": h.min,
+                    "max": h.max,
+                    "mean": h.sum / h.count if h.count else None,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "buckets": dict(zip([str(b) for b in h.bounds] + ["+Inf"], h.counts)),
+                })
+        return {
+            "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "duracion_s": time.time() - self.started,
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self) -> str:
+        def fmt(labels, extra=()) -> str:
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+        out: List[str] = []
+        with self._lock:
+            tipos = {}
+            for name, _ in self.counters:
+                tipos[name] = "counter"
+            for name, _ in self.gauges:
+                tipos[name] = "gauge"
+            for name, _ in self.histograms:
+                tipos[name] = "histogram"
+            for name in sorted(tipos):
+                out.append(f"# TYPE {name} {tipos[name]}")
+                if tipos[name] in ("counter", "gauge"):
+                    valores = self.counters if tipos[name] == "counter" else self.gauges
+                    for (n, labels), v in sorted(valores.items()):
+                        if n == name:
+                            out.append(f"{name}{fmt(labels)} {v:g}")
+                    continue
+                for (n, labels), h in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    acc = 0
+                    for bound, c in zip(list(h.bounds) + ["+Inf"], h.counts):
+                        acc += c
+                        out.append(f"{name}_bucket{fmt(labels, [('le', bound if bound == '+Inf' else f'{bound:g}')])} {acc}")
+                    out.append(f"{name}_sum{fmt(labels)} {h.sum:g}")
+                    out.append(f"{name}_count{fmt(labels)} {h.count}")
+        return "\n".join(out) + "\n"
+
+    def write_json(self, path: str) -> None:
+        _write_text(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str) -> None:
+        # node_exporter lee el directorio del textfile collector: escritura atómica
+        _write_text(path, self.to_prometheus())
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _write_text(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+metrics = Metrics()
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
-import json, re, sys, argparse
-from collections import Counter, defaultdict
-from typing import List, Dict, Any
+import json, re, sys, argparse, hashlib, os, shutil, sqlite3, tempfile
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
 
 RA_RE = re.compile(r"^RA(\d+)$", re.I)
 CE_RE = re.compile(r"^CE(\d+)\.(\d+)$", re.I)
@@ -87,56 +89,492 @@ def validate_asignatura(a: Dict[str, Any]) -> Dict[str, List[str]]:
 
     return {"errors": errors, "warns": warns}
 
+# ================== Lectura en streaming ==================
+class FormatoInvalido(ValueError):
+    pass
+
+def iter_json_array(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Itera los elementos de una lista JSON leyendo el fichero por trozos.
+
+    Acepta lo mismo que json.load() con una lista en la raíz: un fichero vacío o algo
+    más que espacios tras el ']' final son FormatoInvalido.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    leidos = 0  # caracteres ya descartados de buf, para dar posiciones absolutas
+
+    def fill():
+        nonlocal buf, pos, eof, leidos
+        data = f.read(chunk_size)
+        eof = not data
+        leidos += pos
+        buf, pos = buf[pos:] + data, 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    def fin():
+        nonlocal pos
+        pos += 1
+        skip_ws()
+        if pos < len(buf):
+            raise FormatoInvalido(f"Contenido inesperado tras el ']' final en la posición {leidos + pos}")
+
+    fill()
+    skip_ws()
+    if pos == len(buf):
+        raise FormatoInvalido("El fichero está vacío: se esperaba una lista de asignaturas.")
+    if buf[pos] != "[":
+        raise FormatoInvalido("El JSON raíz debe ser una lista de asignaturas.")
+    pos += 1
+    skip_ws()
+    if buf[pos:pos + 1] == "]":
+        fin()
+        return
+    while True:
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise FormatoInvalido(f"JSON inválido en la posición {leidos + e.pos}: {e.msg}")
+                fill()
+                continue
+            # un número cortado por el final del trozo se decodifica a medias ("3" de "33",
+            # "1." de "1.5"): sólo vale si lo que sigue ya es un separador
+            if not eof and (end == len(buf) or buf[end] not in " \t\r\n,]"):
+                fill()
+                continue
+            break
+        yield obj
+        pos = end
+        skip_ws()
+        c = buf[pos:pos + 1]
+        if c == ",":
+            pos += 1
+            skip_ws()
+        elif c == "]":
+            fin()
+            return
+        else:
+            raise FormatoInvalido(f"Se esperaba ',' o ']' en la posición {leidos + pos}")
+
+def from_modulo_record(r: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro NDJSON del scraper (Modulo) -> asignatura legacy; los legacy pasan tal cual."""
+    if "id" in r or "codigo" not in r:
+        return r
+    return {"id": r.get("codigo"), "nombre": r.get("nombre"), "RA": r.get("RA")}
+
+def _primer_caracter(f: TextIO, chunk_size: int = 4096) -> str:
+    """Primer carácter que no es espacio ("" si no hay ninguno); deja f al principio."""
+    first = ""
+    while not first:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        first = data.lstrip()[:1]
+    f.seek(0)
+    return first
+
+def iter_asignaturas(f: TextIO) -> Iterator[Dict[str, Any]]:
+    """Lista JSON legacy o NDJSON (legacy o módulos del scraper), sin cargarlo entero en memoria."""
+    first = _primer_caracter(f)
+    if first == "[":
+        yield from iter_json_array(f)
+    elif first == "{":
+        for line in f:
+            if not line.strip():
+                continue
+            r = json.loads(line)
+            # igual que to_legacy(): los módulos sin código o nombre no llegan al legacy
+            if "ciclo_codigo" in r and not (norm(r.get("codigo")) and norm(r.get("nombre"))):
+                continue
+            yield from_modulo_record(r)
+    elif not first:
+        raise FormatoInvalido("El fichero está vacío: se esperaba una lista de asignaturas.")
+    else:
+        raise FormatoInvalido("El JSON raíz debe ser una lista de asignaturas.")
+
+# ================== Caché de resultados ==================
+# Con --cache sin ruta: <repo>/.cache (ignorado por git), sea cual sea el directorio actual
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache",
+                          "validate_asignaturas.json")
+
+def _rules_version() -> str:
+    # Cambiar cualquier regla de este fichero invalida la caché entera
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def record_hash(a: Dict[str, Any]) -> str:
+    canon = json.dumps(a, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """hash del registro -> {errors, warns}, ligado a la versión de las reglas."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = _rules_version()
+        self.entries: Dict[str, Dict[str, List[str]]] = {}
+        self.used: set = set()
+        self.hits = 0
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == self.version:
+                self.entries = data.get("results", {})
+
+    def get(self, key: str) -> Optional[Dict[str, List[str]]]:
+        res = self.entries.get(key)
+        if res is not None:
+            self.used.add(key)
+            self.hits += 1
+        return res
+
+    def put(self, key: str, res: Dict[str, List[str]]) -> None:
+        self.entries[key] = res
+        self.used.add(key)
+
+    def save(self) -> None:
+        # sólo se conservan los registros vistos en esta ejecución
+        data = {"version": self.version, "results": {k: v for k, v in self.entries.items() if k in self.used}}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+# ================== Validación en paralelo ==================
+def validate_all(asignaturas: Iterable[Dict[str, Any]], jobs: int = 1,
+                 cache: Optional[ResultCache] = None) -> Iterator[Tuple[Dict[str, Any], Dict[str, List[str]]]]:
+    """(asignatura, resultado) en el orden de entrada, con --jobs procesos y la caché delante.
+
+    Como mucho jobs*4 asignaturas en vuelo, así que la lectura sigue siendo en streaming.
+    """
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    pending: deque = deque()  # (asignatura, hash, resultado o future)
+
+    def drain(limit: int):
+        while len(pending) > limit:
+            a, key, res = pending.popleft()
+            if pool is not None and key is not None:
+                res = res.result()
+                if cache is not None:
+                    cache.put(key, res)
+            yield a, res
+
+    try:
+        for a in asignaturas:
+            key = record_hash(a) if cache is not None else None
+            res = cache.get(key) if cache is not None else None
+            if res is not None:
+                pending.append((a, None, res))
+            elif pool is None:
+                res = validate_asignatura(a)
+                if cache is not None:
+                    cache.put(key, res)
+                pending.append((a, None, res))
+            else:
+                pending.append((a, key or "", pool.submit(validate_asignatura, a)))
+            yield from drain(jobs * 4)
+        yield from drain(0)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+# ================== Validación sobre SQLite ==================
+# Las mismas reglas que validate_asignatura(), pero sobre las tablas asignaturas/ra/ce
+# de la app y en una sola consulta. Cada fila es un mensaje con su clave de orden
+# (sección, RA, fase, CE, regla), que reproduce el orden en que los emite la versión
+# Python recorriendo RA y CE en orden de inserción (rowid).
+VALIDATE_SQL = """
+WITH
+r AS (
+    SELECT rowid AS pos, id, asignatura_id AS aid,
+           trim(coalesce(codigo, '')) AS cod, trim(coalesce(descripcion, '')) AS descr
+    FROM ra
+),
+rv AS (  -- RA con código RA<n>
+    SELECT *, CAST(substr(cod, 3) AS INTEGER) AS num FROM r
+    WHERE upper(substr(cod, 1, 2)) = 'RA' AND length(cod) > 2 AND substr(cod, 3) NOT GLOB '*[^0-9]*'
+),
+c AS (  -- CE de esos RA, con el código partido en CE<a>.<b>
+    SELECT pos, ra_id, aid, ra_pos, rcode, num, cod, descr,
+           CASE WHEN instr(cod, '.') > 3 THEN substr(cod, 3, instr(cod, '.') - 3) ELSE '' END AS a,
+           CASE WHEN instr(cod, '.') > 0 THEN substr(cod, instr(cod, '.') + 1) ELSE '' END AS b
+    FROM (
+        SELECT ce.rowid AS pos, rv.id AS ra_id, rv.aid, rv.pos AS ra_pos, rv.cod AS rcode, rv.num,
+               trim(coalesce(ce.codigo, '')) AS cod, trim(coalesce(ce.descripcion, '')) AS descr
+        FROM ce JOIN rv ON rv.id = ce.ra_id
+    )
+),
+cv AS (
+    SELECT *, (upper(substr(cod, 1, 2)) = 'CE' AND a <> '' AND b <> ''
+               AND a NOT GLOB '*[^0-9]*' AND b NOT GLOB '*[^0-9]*') AS ok
+    FROM c
+),
+validos AS (  -- CE con código válido: número, el del CE válido anterior (LAG) y repeticiones
+    SELECT ra_id, pos, aid, ra_pos, rcode, num, cod, CAST(a AS INTEGER) AS ra_en_ce, CAST(b AS INTEGER) AS idx,
+           LAG(CAST(b AS INTEGER), 1, 0) OVER (PARTITION BY ra_id ORDER BY pos) AS prev,
+           ROW_NUMBER() OVER (PARTITION BY ra_id, cod ORDER BY pos) AS vez
+    FROM cv WHERE ok
+),
+por_ra AS (
+    SELECT ra_id, sum(cod <> '' AND NOT ok) AS invalidos FROM cv GROUP BY ra_id
+),
+saltos AS (
+    SELECT ra_id FROM validos WHERE idx <> prev + 1 AND idx <> 1 GROUP BY ra_id
+),
+msgs (aid, tipo, seccion, ra_pos, fase, ce_pos, regla, msg) AS (
+    SELECT id, 'E', 0, 0, 0, 0, 0, 'Falta o vacío: id' FROM asignaturas WHERE trim(coalesce(id, '')) = ''
+    UNION ALL
+    SELECT id, 'E', 0, 0, 0, 0, 1, 'Falta o vacío: nombre' FROM asignaturas WHERE trim(coalesce(nombre, '')) = ''
+    UNION ALL
+    SELECT id, 'E', 1, 0, 0, 0, 0, 'Falta RA[] o está vacío' FROM asignaturas
+    WHERE id NOT IN (SELECT aid FROM r)
+    UNION ALL
+    SELECT aid, 'E', 2, 0, 0, 0, 0, 'RA duplicados: ' || group_concat(cod, ', ') FROM (
+        SELECT aid, cod, min(pos) AS primero FROM r GROUP BY aid, cod HAVING count(*) > 1 ORDER BY aid, primero
+    ) GROUP BY aid
+    UNION ALL
+    SELECT aid, 'E', 3, pos, 0, 0, 0, 'RA sin ''codigo''' FROM r WHERE cod = ''
+    UNION ALL
+    SELECT aid, 'E', 3, pos, 0, 0, 0, 'RA codigo inválido: ' || cod || ' (esperado RA#)' FROM r
+    WHERE cod <> '' AND id NOT IN (SELECT id FROM rv)
+    UNION ALL
+    SELECT aid, 'W', 3, pos, 0, 0, 0, cod || ' sin descripcion' FROM rv WHERE descr = ''
+    UNION ALL
+    SELECT DISTINCT aid, 'E', 3, ra_pos, 1, 0, 0, rcode || ' tiene CE duplicados exactos' FROM (
+        SELECT aid, ra_pos, rcode FROM cv GROUP BY ra_id, cod, descr HAVING count(*) > 1
+    )
+    UNION ALL
+    SELECT aid, 'E', 3, ra_pos, 2, pos, 0, rcode || ' contiene CE sin ''codigo''' FROM cv WHERE cod = ''
+    UNION ALL
+    SELECT aid, 'E', 3, ra_pos, 2, pos, 0, rcode || ' CE codigo inválido: ' || cod || ' (esperado CE' || num || '.#)'
+    FROM cv WHERE cod <> '' AND NOT ok
+    UNION ALL
+    SELECT aid, 'E', 3, ra_pos, 2, pos, 1,
+           rcode || ' CE mal referenciado: ' || cod || ' (RA en CE=' || ra_en_ce || ' != ' || num || ')'
+    FROM validos WHERE ra_en_ce <> num
+    UNION ALL
+    SELECT aid, 'E', 3, ra_pos, 2, pos, 2, rcode || ' CE codigo repetido: ' || cod
+    FROM validos WHERE vez > 1
+    UNION ALL
+    SELECT rv.aid, 'W', 3, rv.pos, 3, 0, 0, rv.cod || ' sin CE' FROM rv
+    LEFT JOIN por_ra p ON p.ra_id = rv.id WHERE p.ra_id IS NULL
+    UNION ALL
+    SELECT rv.aid, 'W', 3, rv.pos, 3, 0, 0, rv.cod || ' CE no consecutivos (revisa numeración)' FROM rv
+    JOIN por_ra p ON p.ra_id = rv.id JOIN saltos s ON s.ra_id = rv.id WHERE p.invalidos = 0
+)
+SELECT aid, tipo, msg FROM msgs ORDER BY aid, seccion, ra_pos, fase, ce_pos, regla
+"""
+
+# En el JSON no pueden darse: RA de una asignatura que no existe y CE de un RA que no existe
+HUERFANOS_SQL = """
+SELECT 'RA', ra.codigo, ra.asignatura_id FROM ra
+LEFT JOIN asignaturas a ON a.id = ra.asignatura_id WHERE a.id IS NULL
+UNION ALL
+SELECT 'CE', ce.codigo, ce.ra_id FROM ce
+LEFT JOIN ra ON ra.id = ce.ra_id WHERE ra.id IS NULL
+"""
+
+def validate_db(conn: sqlite3.Connection) -> Iterator[Tuple[Dict[str, Any], Dict[str, List[str]]]]:
+    """(asignatura, resultado) por cada fila de asignaturas, en orden de inserción.
+
+    Los RA/CE huérfanos salen al final en una entrada aparte, sin id.
+    """
+    mensajes: Dict[Any, Dict[str, List[str]]] = defaultdict(lambda: {"errors": [], "warns": []})
+    for aid, tipo, msg in conn.execute(VALIDATE_SQL):
+        mensajes[aid]["errors" if tipo == "E" else "warns"].append(msg)
+    for aid, nombre in conn.execute("SELECT id, nombre FROM asignaturas ORDER BY rowid"):
+        yield {"id": aid, "nombre": nombre}, mensajes.get(aid, {"errors": [], "warns": []})
+    huerfanos = [
+        f"{tipo} huérfano: {norm(cod) or '(sin código)'} "
+        f"({'asignatura_id' if tipo == 'RA' else 'ra_id'}={padre} no existe)"
+        for tipo, cod, padre in conn.execute(HUERFANOS_SQL)
+    ]
+    if huerfanos:
+        yield {"id": "", "nombre": "RA/CE huérfanos"}, {"errors": huerfanos, "warns": []}
+
+def open_db_readonly(path: str) -> sqlite3.Connection:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No existe '{path}'")
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+# ================== Salida ==================
+def report_text(path: str, rows: Iterable[Tuple[Dict[str, Any], Dict[str, List[str]]]], out: TextIO) -> Tuple[int, int, int]:
+    total = 0
+    num_ok = 0
+    resumen_warns = 0
+
+    # El cuerpo va a un temporal (en memoria hasta 1 MB): la cabecera lleva el total, que
+    # no se sabe hasta el final, y si la entrada resulta inválida a mitad no se ha escrito nada
+    with tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+", encoding="utf-8") as body:
+        for a, res in rows:
+            total += 1
+            nombre = f"{norm(a.get('id'))} – {norm(a.get('nombre'))}"
+            if res["errors"]:
+                print(f"❌ {nombre}", file=body)
+                for e in res["errors"]:
+                    print(f"   • ERROR: {e}", file=body)
+                for w in res["warns"]:
+                    print(f"   • WARN : {w}", file=body)
+                print(file=body)
+            else:
+                num_ok += 1
+                if res["warns"]:
+                    resumen_warns += len(res["warns"])
+                    print(f"⚠️  {nombre}", file=body)
+                    for w in res["warns"]:
+                        print(f"   • WARN : {w}", file=body)
+                    print(file=body)
+                else:
+                    # OK silencioso para no saturar
+                    pass
+
+        print(f"🔎 Validando {total} asignaturas de '{path}'...\n", file=out)
+        body.seek(0)
+        shutil.copyfileobj(body, out)
+
+    print("———", file=out)
+    print(f"✅ OK: {num_ok}/{total} asignaturas sin errores", file=out)
+    if resumen_warns:
+        print(f"⚠️  Avisos: {resumen_warns} (no bloquean)", file=out)
+    return total, num_ok, resumen_warns
+
+def collect(rows: Iterable[Tuple[Dict[str, Any], Dict[str, List[str]]]]) -> List[Dict[str, Any]]:
+    # sólo id/nombre y mensajes, no la asignatura entera
+    return [{"id": norm(a.get("id")), "nombre": norm(a.get("nombre")),
+             "errors": res["errors"], "warns": res["warns"]} for a, res in rows]
+
+def report_json(path: str, results: List[Dict[str, Any]], out: TextIO) -> None:
+    json.dump({
+        "path": path,
+        "total": len(results),
+        "ok": sum(1 for r in results if not r["errors"]),
+        "errors": sum(len(r["errors"]) for r in results),
+        "warns": sum(len(r["warns"]) for r in results),
+        "asignaturas": results,
+    }, out, ensure_ascii=False, indent=2)
+    out.write("\n")
+
+def report_junit(path: str, results: List[Dict[str, Any]], out: TextIO) -> None:
+    fallos = sum(1 for r in results if r["errors"])
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(f'<testsuite name={quoteattr("validate_asignaturas:" + path)} tests="{len(results)}" '
+              f'failures="{fallos}" errors="0" skipped="0">\n')
+    for r in results:
+        nombre = f"{r['id']} – {r['nombre']}"
+        out.write(f"  <testcase classname={quoteattr(path)} name={quoteattr(nombre)}>")
+        if r["errors"]:
+            msg = "\n".join(r["errors"])
+            out.write(f'\n    <failure message={quoteattr(r["errors"][0])} type="validation">{escape(msg)}</failure>')
+        if r["warns"]:
+            avisos = "\n".join(f"WARN: {w}" for w in r["warns"])
+            out.write(f"\n    <system-out>{escape(avisos)}</system-out>")
+        out.write("\n  </testcase>\n" if r["errors"] or r["warns"] else "</testcase>\n")
+    out.write("</testsuite>\n")
+
+def validate_db_main(args) -> None:
+    try:
+        conn = open_db_readonly(args.db)
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ No se pudo abrir '{args.db}': {e}")
+        sys.exit(2)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    has_errors = False
+
+    def rows():
+        nonlocal has_errors
+        for a, res in validate_db(conn):
+            has_errors = has_errors or bool(res["errors"])
+            yield a, res
+
+    try:
+        if args.format == "text":
+            report_text(args.db, rows(), out)
+        elif args.format == "json":
+            report_json(args.db, collect(rows()), out)
+        else:
+            report_junit(args.db, collect(rows()), out)
+    except sqlite3.Error as e:
+        print(f"❌ No se pudo validar '{args.db}': {e}")
+        sys.exit(2)
+    finally:
+        conn.close()
+        if out is not sys.stdout:
+            out.close()
+
+    sys.exit(1 if has_errors else 0)
+
 def main():
     ap = argparse.ArgumentParser(description="Valida JSON legacy de asignaturas (id, nombre, RA[], CE[]).")
-    ap.add_argument("path", nargs="?", default="public/asignaturas_FP.json", help="Ruta del JSON legacy")
+    ap.add_argument("path", nargs="?", default="public/asignaturas_FP.json",
+                    help="Ruta del JSON legacy (lista JSON o NDJSON)")
+    ap.add_argument("--jobs", "-j", type=int, default=1, help="Procesos en paralelo (el informe sale en el orden de entrada)")
+    ap.add_argument("--cache", nargs="?", const=CACHE_PATH, default=None, metavar="PATH",
+                    help="Guarda los resultados por hash de asignatura para saltarse las que no cambian "
+                         "(por defecto en <repo>/.cache/validate_asignaturas.json)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Valida todo sin leer ni escribir caché (lo que se hace si no se pasa --cache)")
+    ap.add_argument("--format", choices=("text", "json", "junit"), default="text", help="Formato del informe")
+    ap.add_argument("--output", "-o", default=None, help="Fichero para el informe (por defecto, stdout)")
+    ap.add_argument("--db", default=None, metavar="SQLITE",
+                    help="Valida las tablas asignaturas/ra/ce de esta base de datos (p. ej. data/db.sqlite) en lugar del JSON")
     args = ap.parse_args()
+    if args.cache and args.no_cache:
+        ap.error("--cache no se puede combinar con --no-cache")
+
+    if args.db:
+        validate_db_main(args)
 
     try:
-        with open(args.path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        f = open(args.path, "r", encoding="utf-8")
     except Exception as e:
         print(f"❌ No se pudo leer '{args.path}': {e}")
         sys.exit(2)
 
-    if not isinstance(data, list):
-        print("❌ El JSON raíz debe ser una lista de asignaturas.")
-        sys.exit(2)
-
-    total = len(data)
-    num_ok = 0
+    cache = ResultCache(args.cache) if args.cache else None
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
     has_errors = False
-    resumen_warns = 0
 
-    print(f"🔎 Validando {total} asignaturas de '{args.path}'...\n")
-
-    for a in data:
-        nombre = f"{norm(a.get('id'))} – {norm(a.get('nombre'))}"
-        res = validate_asignatura(a)
-        if res["errors"]:
-            has_errors = True
-            print(f"❌ {nombre}")
-            for e in res["errors"]:
-                print(f"   • ERROR: {e}")
-            for w in res["warns"]:
-                print(f"   • WARN : {w}")
-            print()
+    def rows():
+        nonlocal has_errors
+        for a, res in validate_all(iter_asignaturas(f), max(1, args.jobs), cache):
+            has_errors = has_errors or bool(res["errors"])
+            yield a, res
+
+    try:
+        if args.format == "text":
+            report_text(args.path, rows(), out)
+            if cache is not None and cache.hits:
+                print(f"💾 Caché: {cache.hits} asignaturas sin cambios", file=out)
+        elif args.format == "json":
+            report_json(args.path, collect(rows()), out)
         else:
-            num_ok += 1
-            if res["warns"]:
-                resumen_warns += len(res["warns"])
-                print(f"⚠️  {nombre}")
-                for w in res["warns"]:
-                    print(f"   • WARN : {w}")
-                print()
-            else:
-                # OK silencioso para no saturar
-                pass
+            report_junit(args.path, collect(rows()), out)
+    except FormatoInvalido as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    except ValueError as e:
+        print(f"❌ No se pudo leer '{args.path}': {e}")
+        sys.exit(2)
+    finally:
+        f.close()
+        if out is not sys.stdout:
+            out.close()
 
-    print("———")
-    print(f"✅ OK: {num_ok}/{total} asignaturas sin errores")
-    if resumen_warns:
-        print(f"⚠️  Avisos: {resumen_warns} (no bloquean)")
+    if cache is not None:
+        cache.save()
 
     sys.exit(1 if has_errors else 0)
 